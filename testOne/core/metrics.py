@@ -0,0 +1,156 @@
+"""
+core/metrics.py
+---------------
+Métricas por request (vista, tiempo, SQL, duplicados, tamaño de respuesta).
+
+RequestMetricsMiddleware (core/middleware.py) arma un registro por request y lo
+entrega a `record()`, que lo escribe como una línea JSON y emite un warning si
+la vista supera su presupuesto de PERF_VIEW_BUDGETS. `aggregate()` relee los
+archivos para la página de rendimiento (p50/p95 por vista).
+
+RotatingFileHandler no es seguro entre procesos (dos workers de Gunicorn que
+rotan a la vez pierden o pisan líneas), así que cada proceso escribe y rota su
+propio archivo: PERF_METRICS_LOG con el PID antes de la extensión, ej.
+logs/request_metrics.4321.jsonl.
+"""
+import json
+import logging
+import os
+import re
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+
+warning_logger = logging.getLogger('sst.performance')
+
+_metrics_logger = None
+# PID dueño de _metrics_logger: tras un fork el hijo abre su propio archivo
+_metrics_pid = None
+
+# Listas de parámetros (IN (%s, %s, ...)) de distinta longitud cuentan como la misma consulta
+_PARAM_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+def fingerprint(sql):
+    """SQL parametrizado sin variaciones de longitud en listas IN (...)."""
+    return _PARAM_LIST_RE.sub('(%s, ...)', sql)
+
+
+def _log_path():
+    return Path(getattr(settings, 'PERF_METRICS_LOG', settings.BASE_DIR / 'logs' / 'request_metrics.jsonl'))
+
+
+def _process_log_path():
+    path = _log_path()
+    return path.with_name(f'{path.stem}.{os.getpid()}{path.suffix}')
+
+
+def _get_metrics_logger():
+    global _metrics_logger, _metrics_pid
+    if _metrics_logger is None or _metrics_pid != os.getpid():
+        path = _process_log_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=getattr(settings, 'PERF_METRICS_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=getattr(settings, 'PERF_METRICS_BACKUP_COUNT', 3),
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger('sst.request_metrics')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        # Handler heredado del proceso padre: se cierra sin escribir en su archivo
+        for inherited in list(logger.handlers):
+            logger.removeHandler(inherited)
+            inherited.close()
+        logger.addHandler(handler)
+        _metrics_logger = logger
+        _metrics_pid = os.getpid()
+    return _metrics_logger
+
+
+def get_budget(entry):
+    """
+    Presupuesto de la vista: PERF_VIEW_BUDGETS acepta el nombre de la clase
+    o el url_name, con un entero (máximo de consultas) o un dict
+    {'queries': int, 'time_ms': int}.
+    """
+    budgets = getattr(settings, 'PERF_VIEW_BUDGETS', {})
+    budget = budgets.get(entry['view'], budgets.get(entry['url_name']))
+    if budget is None:
+        return {}
+    if isinstance(budget, int):
+        return {'queries': budget}
+    return budget
+
+
+def record(entry):
+    budget = get_budget(entry)
+    exceeded = []
+    if 'queries' in budget and entry['sql_count'] > budget['queries']:
+        exceeded.append(f"{entry['sql_count']} consultas (máx. {budget['queries']})")
+    if 'time_ms' in budget and entry['time_ms'] > budget['time_ms']:
+        exceeded.append(f"{entry['time_ms']} ms (máx. {budget['time_ms']})")
+    entry['over_budget'] = bool(exceeded)
+    if exceeded:
+        warning_logger.warning(
+            'Presupuesto excedido en %s (%s): %s', entry['view'], entry['path'], ', '.join(exceeded)
+        )
+    try:
+        _get_metrics_logger().info(json.dumps(entry, ensure_ascii=False, default=str))
+    except OSError:
+        warning_logger.exception('No se pudo escribir %s', _process_log_path())
+
+
+def read_entries():
+    """Registros de los archivos de todos los procesos y de sus respaldos rotados."""
+    path = _log_path()
+    files = sorted(path.parent.glob(f'{path.stem}*{path.suffix}*'))
+    for file in files:
+        if not file.is_file():
+            continue
+        with file.open(encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def aggregate():
+    """Resumen por vista ordenado por p95 de tiempo descendente."""
+    by_view = {}
+    for entry in read_entries():
+        by_view.setdefault(entry.get('view') or '-', []).append(entry)
+
+    rows = []
+    for view, entries in by_view.items():
+        times = [e['time_ms'] for e in entries]
+        queries = [e['sql_count'] for e in entries]
+        sizes = [e['size'] for e in entries if e.get('size') is not None]
+        rows.append({
+            'view': view,
+            'url_name': entries[-1].get('url_name'),
+            'requests': len(entries),
+            'time_p50': _percentile(times, 50),
+            'time_p95': _percentile(times, 95),
+            'sql_p50': _percentile(queries, 50),
+            'sql_p95': _percentile(queries, 95),
+            'sql_time_p95': _percentile([e['sql_ms'] for e in entries], 95),
+            'duplicates_max': max(sum(d['count'] for d in e.get('duplicates', [])) for e in entries),
+            'size_p50': _percentile(sizes, 50),
+            'over_budget': sum(1 for e in entries if e.get('over_budget')),
+            'budget': get_budget(entries[-1]),
+        })
+    rows.sort(key=lambda r: r['time_p95'] or 0, reverse=True)
+    return rows
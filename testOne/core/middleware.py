@@ -0,0 +1,103 @@
+"""
+core/middleware.py
+------------------
+Instrumentación de requests.
+
+RequestMetricsMiddleware mide cada request resuelta por una vista: tiempo
+total, número y tiempo de consultas SQL, consultas repetidas (N+1) y tamaño
+de la respuesta. El registro se delega a core.metrics.record().
+
+Debe ir primero en MIDDLEWARE para incluir el costo del resto de middlewares
+(sesión, autenticación, simulación de roles).
+
+RequestProfilerMiddleware perfila bajo demanda las requests con ?__profile=1
+de usuarios autorizados (ver core.profiling). Va después de
+AuthenticationMiddleware porque necesita request.user.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+from .profiling import RequestProfiler, is_profiling_allowed
+
+
+class _QueryRecorder:
+    """execute_wrapper que cuenta consultas y su tiempo sin depender de DEBUG."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[metrics.fingerprint(sql)] += 1
+
+
+class RequestMetricsMiddleware:
+    # Consultas repetidas que se reportan por request (las más frecuentes)
+    MAX_DUPLICATES = 5
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERF_METRICS_ENABLED', True)
+        self.skip_prefixes = tuple(p for p in (settings.STATIC_URL, settings.MEDIA_URL) if p)
+        self.skip_prefixes = tuple(p if p.startswith('/') else f'/{p}' for p in self.skip_prefixes)
+
+    def __call__(self, request):
+        if not self.enabled or request.path.startswith(self.skip_prefixes):
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+
+        view_class = getattr(match.func, 'view_class', None)
+        metrics.record({
+            'ts': time.time(),
+            'view': view_class.__name__ if view_class else getattr(match.func, '__name__', match.view_name),
+            'url_name': match.view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'time_ms': round(elapsed * 1000, 1),
+            'sql_count': recorder.count,
+            'sql_ms': round(recorder.time * 1000, 1),
+            'duplicates': [
+                {'sql': sql[:300], 'count': count}
+                for sql, count in recorder.fingerprints.most_common(self.MAX_DUPLICATES)
+                if count > 1
+            ],
+            'size': None if response.streaming else len(response.content),
+        })
+        return response
+
+
+class RequestProfilerMiddleware:
+    PARAM = '__profile'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.GET.get(self.PARAM) != '1' or not is_profiling_allowed(request.user):
+            return self.get_response(request)
+
+        profiler = RequestProfiler()
+        response = profiler.run(self.get_response, request)
+        response['X-Profile-Id'] = profiler.save(request, response)
+        return response
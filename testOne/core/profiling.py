@@ -0,0 +1,209 @@
+"""
+core/profiling.py
+-----------------
+Perfilado bajo demanda de una request (?__profile=1).
+
+RequestProfilerMiddleware (core/middleware.py) ejecuta la request con
+`RequestProfiler`, que combina:
+  - cProfile: estadísticas por función (archivo .prof, abrir con pstats/snakeviz).
+  - Muestreo de la pila del hilo cada PROFILER_SAMPLE_INTERVAL segundos:
+    archivo .collapsed ("a;b;c N") listo para flamegraph.pl / speedscope.
+  - SQL ejecutado con su tiempo y la línea del proyecto que lo originó.
+
+Los perfiles se guardan en PROFILER_DIR como un buffer circular de
+PROFILER_MAX_PROFILES entradas (se eliminan los más antiguos).
+"""
+import cProfile
+import json
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+# Extensiones de los archivos que componen un perfil
+PROFILE_FILES = {
+    'prof': 'application/octet-stream',
+    'collapsed': 'text/plain',
+    'json': 'application/json',
+}
+# Consultas SQL guardadas por perfil (las más lentas)
+MAX_SQL_ENTRIES = 200
+# La instrumentación propia no cuenta como origen de una consulta
+_INSTRUMENTATION_FILES = {__file__, str(Path(__file__).with_name('middleware.py'))}
+
+
+def profiles_dir():
+    return Path(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'logs' / 'profiles'))
+
+
+def is_profiling_allowed(user):
+    """Superusuarios siempre; staff solo si la configuración 'perfilado_staff' está activa."""
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    if not user.is_staff:
+        return False
+    from system_config.models import SystemConfig
+    return bool(SystemConfig.get_value('perfilado_staff', False))
+
+
+def _project_origin():
+    """Primera línea de código del proyecto (fuera de Django y librerías) en la pila actual."""
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(base) and 'site-packages' not in frame.filename
+                and frame.filename not in _INSTRUMENTATION_FILES):
+            return f'{Path(frame.filename).relative_to(base)}:{frame.lineno} ({frame.name})'
+    return ''
+
+
+def _view_path(match):
+    """Ruta con puntos de la vista (clase para las CBV), sin la API privada de ResolverMatch."""
+    view = getattr(match.func, 'view_class', match.func)
+    name = getattr(view, '__qualname__', type(view).__qualname__)
+    module = getattr(view, '__module__', None)
+    return f'{module}.{name}' if module else name
+
+
+class _StackSampler(threading.Thread):
+    """Muestrea la pila de un hilo y acumula pilas colapsadas."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.sql = []
+        self.profile = cProfile.Profile()
+
+    def _record_sql(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - start) * 1000, 2),
+                'origin': _project_origin(),
+            })
+
+    def run(self, get_response, request):
+        sampler = _StackSampler(threading.get_ident(), getattr(settings, 'PROFILER_SAMPLE_INTERVAL', 0.002))
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._record_sql):
+                response = self.profile.runcall(get_response, request)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            sampler.stop()
+        self.stacks = sampler.stacks
+        return response
+
+    def save(self, request, response):
+        """Escribe .prof, .collapsed y .json; retorna el id del perfil."""
+        directory = profiles_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:6]}'
+
+        self.profile.dump_stats(directory / f'{profile_id}.prof')
+        (directory / f'{profile_id}.collapsed').write_text(
+            ''.join(f'{stack} {count}\n' for stack, count in self.stacks.items()), encoding='utf-8'
+        )
+
+        by_origin = Counter(q['origin'] for q in self.sql)
+        match = getattr(request, 'resolver_match', None)
+        meta = {
+            'id': profile_id,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': _view_path(match) if match else '',
+            'user': request.user.get_username(),
+            'status': response.status_code,
+            'time_ms': round(self.elapsed * 1000, 1),
+            'sql_count': len(self.sql),
+            'sql_ms': round(sum(q['ms'] for q in self.sql), 1),
+            'sql_by_origin': by_origin.most_common(20),
+            'sql': sorted(self.sql, key=lambda q: q['ms'], reverse=True)[:MAX_SQL_ENTRIES],
+        }
+        (directory / f'{profile_id}.json').write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding='utf-8')
+        _trim(directory)
+        return profile_id
+
+
+def _trim(directory):
+    """Buffer circular: conserva solo los PROFILER_MAX_PROFILES perfiles más recientes."""
+    keep = getattr(settings, 'PROFILER_MAX_PROFILES', 30)
+    metas = sorted(directory.glob('*.json'), reverse=True)
+    for meta in metas[keep:]:
+        for ext in PROFILE_FILES:
+            meta.with_suffix(f'.{ext}').unlink(missing_ok=True)
+
+
+def list_profiles(username=None):
+    """Perfiles más recientes primero; con `username`, solo los capturados por ese usuario."""
+    directory = profiles_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        if username is None or meta.get('user') == username:
+            profiles.append(meta)
+    return profiles
+
+
+def can_view_profile(user, profile_id):
+    """Superusuarios ven todos los perfiles; el staff con perfilado habilitado, solo los propios."""
+    if user.is_superuser:
+        return True
+    if not is_profiling_allowed(user):
+        return False
+    path = profile_file(profile_id, 'json')
+    if path is None:
+        return False
+    try:
+        meta = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return False
+    return meta.get('user') == user.get_username()
+
+
+def profile_file(profile_id, ext):
+    """Ruta de un archivo de perfil; None si el id o la extensión no son válidos."""
+    if ext not in PROFILE_FILES or not profile_id.replace('-', '').isalnum():
+        return None
+    path = profiles_dir() / f'{profile_id}.{ext}'
+    return path if path.exists() else None
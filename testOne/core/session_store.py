@@ -0,0 +1,97 @@
+"""
+core/session_store.py
+---------------------
+Motor de sesiones con caché y BD que solo escribe cuando hace falta.
+
+Con SESSION_SAVE_EVERY_REQUEST = True, el motor por defecto hace un UPDATE
+sobre django_session en cada request (incluidas las llamadas AJAX) solo para
+mover la fecha de expiración. Este motor mantiene el mismo vencimiento
+deslizante por inactividad, pero omite la escritura cuando:
+  - los datos de la sesión no cambiaron, y
+  - la nueva expiración adelanta la guardada en menos de
+    SESSION_WRITE_THRESHOLD segundos (por defecto 60).
+
+Como consecuencia, una sesión puede vencer hasta SESSION_WRITE_THRESHOLD
+segundos antes de los 30 minutos exactos de inactividad.
+
+Las lecturas van primero a la caché (SESSION_CACHE_ALIAS) y, si no está la
+entrada, a la BD. En caché se guardan los datos junto con la expiración
+persistida para poder decidir sin consultar la BD. La entrada en caché vive
+como máximo SESSION_WRITE_THRESHOLD segundos: con una caché en memoria por
+proceso (SESSION_CACHE_ALIAS = 'sessions'), un logout o un cambio hecho en
+otro worker se ve en ese plazo.
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+DEFAULT_WRITE_THRESHOLD = 60
+
+logger = logging.getLogger('django.contrib.sessions')
+
+
+class SessionStore(CachedDBStore):
+    # Prefijo propio: el valor en caché incluye la expiración y no es compatible con cached_db
+    cache_key_prefix = 'sst.sessions.'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Expiración guardada en BD para esta sesión (None = desconocida / nueva)
+        self._persisted_expiry = None
+
+    @property
+    def write_threshold(self):
+        return timedelta(seconds=getattr(settings, 'SESSION_WRITE_THRESHOLD', DEFAULT_WRITE_THRESHOLD))
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # Claves inválidas para el backend de caché: se recurre a la BD
+            entry = None
+
+        if entry is not None:
+            self._persisted_expiry = entry['expire_date']
+            return entry['data']
+
+        s = self._get_session_from_db()
+        if not s:
+            self._persisted_expiry = None
+            return {}
+        data = self.decode(s.session_data)
+        self._persisted_expiry = s.expire_date
+        self._cache_entry(data, s.expire_date)
+        return data
+
+    def save(self, must_create=False):
+        if not must_create and self._can_skip_write():
+            return
+        expire_date = self.get_expiry_date()
+        # DBStore.save(): la escritura en caché de cached_db se reemplaza por _cache_entry
+        super(CachedDBStore, self).save(must_create)
+        self._persisted_expiry = expire_date
+        self._cache_entry(self._session, expire_date)
+
+    def _can_skip_write(self):
+        if self.session_key is None or self.modified or self._persisted_expiry is None:
+            return False
+        return self.get_expiry_date() - self._persisted_expiry < self.write_threshold
+
+    def _cache_entry(self, data, expire_date):
+        # TTL acotado: pasado el umbral se vuelve a leer la BD, fuente de verdad
+        timeout = min(self.get_expiry_age(expiry=expire_date), int(self.write_threshold.total_seconds()))
+        try:
+            self._cache.set(self.cache_key, {'data': data, 'expire_date': expire_date}, timeout)
+        except Exception:
+            # La BD sigue siendo la fuente de verdad
+            logger.exception('Error saving session to cache (%s)', self._cache)
+
+    # El proyecto corre en WSGI; las variantes async reutilizan la lógica síncrona
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Métricas por request (tiempo, SQL, N+1): primero para medir toda la cadena
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +57,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     # Simulación de roles: debe ir DESPUÉS de AuthenticationMiddleware
     'roles.middleware.RoleSimulationMiddleware',
+    # Perfilado bajo demanda (?__profile=1): necesita request.user
+    'core.middleware.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,6 +78,8 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 # Expone 'simulated_role' a todos los templates
                 'roles.context_processors.role_simulation',
+                # Clave del fragmento cacheado del sidebar (rol, sección, versión de permisos)
+                'roles.context_processors.sidebar_cache',
             ],
         },
     },
@@ -154,12 +161,79 @@ AUTH_USER_MODEL = 'users.CustomUser'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Cache: facetas de filtros, fragmento del sidebar, reportes cerrados, versiones
+# de estado (activos, marcadores), temporales disponibles y sesiones.
+# Debe ser COMPARTIDA entre todos los workers (gunicorn --workers N): las
+# invalidaciones por señales solo llegan a los demás procesos a través de ella.
+# Con REDIS_URL se usa Redis (requiere el paquete 'redis'); si no, la tabla de
+# caché en la BD (crear con `python manage.py createcachetable`).
+# LocMemCache (por proceso) solo es válida con un único proceso.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'sst_cache',
+        }
+    }
+# Copia de las sesiones (core/session_store.py): en memoria del proceso. La
+# entrada vive como máximo SESSION_WRITE_THRESHOLD segundos y la BD sigue
+# siendo la fuente de verdad; en la caché compartida cada lectura sería otra
+# consulta y cada escritura tocaría sst_cache además de django_session.
+CACHES['sessions'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'sst-sessions',
+}
+
 # Session Settings: 30 minutes inactivity timeout
 SESSION_COOKIE_AGE = 1800  # 1800 seconds = 30 minutes
 SESSION_SAVE_EVERY_REQUEST = True
+# Sesiones en caché + BD: solo se escribe si cambian los datos o si la
+# expiración deslizante avanza más de SESSION_WRITE_THRESHOLD segundos
+SESSION_ENGINE = 'core.session_store'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_WRITE_THRESHOLD = 60
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Instrumentación de requests (core/middleware.py + core/metrics.py)
+PERF_METRICS_ENABLED = True
+# Base del nombre: cada proceso escribe request_metrics.<pid>.jsonl (ver core/metrics.py)
+PERF_METRICS_LOG = BASE_DIR / 'logs' / 'request_metrics.jsonl'
+PERF_METRICS_MAX_BYTES = 5 * 1024 * 1024
+PERF_METRICS_BACKUP_COUNT = 3
+# Presupuesto por vista (nombre de clase o url_name): entero = máximo de consultas,
+# o dict {'queries': N, 'time_ms': M}. Al excederse se emite un warning en 'sst.performance'.
+PERF_VIEW_BUDGETS = {
+    'InspectionListView': 25,
+    'InspectionReportView': {'queries': 30, 'time_ms': 1500},
+    'DashboardView': 30,
+    'DashboardModalDataView': 10,
+    'AssetListView': 20,
+    'AssetInventoryReportView': 15,
+    'AssetInventoryTableView': 10,
+    'PlanosView': 15,
+}
+
+# Perfilado bajo demanda (core/profiling.py): superusuarios, o staff si
+# la configuración 'perfilado_staff' está activa
+PROFILER_DIR = BASE_DIR / 'logs' / 'profiles'
+PROFILER_MAX_PROFILES = 30
+PROFILER_SAMPLE_INTERVAL = 0.002  # segundos entre muestras de la pila
+
+# Planos SVG: `manage.py collectplanos` minifica los SVG de PLANOS_SOURCE_DIR y
+# escribe en PLANOS_BUILD_DIR archivos con hash (+ .gz/.br) servidos como estáticos.
+# El servidor web puede servirlos con Cache-Control: max-age=31536000, immutable.
+PLANOS_SOURCE_DIR = BASE_DIR / 'static' / 'planos'
+PLANOS_BUILD_DIR = BASE_DIR / 'static' / 'planos' / 'build'
+# Teselas PNG/WEBP por nivel de zoom (`manage.py tileplanos`, requiere cairosvg)
+PLANOS_TILES_DIR = BASE_DIR / 'static' / 'planos' / 'tiles'
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.session_store import SessionStore
+
+
+@override_settings(
+    SESSION_WRITE_THRESHOLD=60,
+    SESSION_COOKIE_AGE=1800,
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests'},
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests-sessions'},
+    },
+    SESSION_CACHE_ALIAS='sessions',
+)
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        self.store = SessionStore()
+        self.store['user'] = 'admin'
+        self.store.save(must_create=True)
+        self.addCleanup(self.store._cache.clear)
+
+    def reload(self):
+        store = SessionStore(self.store.session_key)
+        store.load()
+        return store
+
+    def advance(self, seconds):
+        now = timezone.now() + timedelta(seconds=seconds)
+        return mock.patch('django.contrib.sessions.backends.base.timezone.now', return_value=now)
+
+    def test_unmodified_session_skips_write_within_threshold(self):
+        store = self.reload()
+        with self.assertNumQueries(0):
+            store.save()
+
+    def test_write_once_threshold_is_exceeded(self):
+        before = Session.objects.get(pk=self.store.session_key).expire_date
+        store = self.reload()
+        with self.advance(120):
+            store.save()
+        self.assertGreater(Session.objects.get(pk=self.store.session_key).expire_date, before)
+
+    def test_modified_session_is_written(self):
+        store = self.reload()
+        store['filtro'] = 'area'
+        store.save()
+        self.assertEqual(SessionStore(self.store.session_key).load()['filtro'], 'area')
+
+    def test_cache_entry_ttl_is_capped_by_threshold(self):
+        store = SessionStore(self.store.session_key)
+        with mock.patch.object(store._cache, 'set') as cache_set:
+            store._cache.delete(store.cache_key)
+            store.load()
+        self.assertLessEqual(cache_set.call_args.args[2], 60)
+
+    def test_expired_session_is_not_loaded(self):
+        self.store._cache.delete(self.store.cache_key)
+        Session.objects.filter(pk=self.store.session_key).update(expire_date=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(SessionStore(self.store.session_key).load(), {})
+
+    def test_flush_removes_cached_entry(self):
+        other = self.reload()
+        self.assertIsNotNone(other._cache.get(other.cache_key))
+        old_key = self.store.session_key
+        self.store.flush()
+        self.assertIsNone(self.store._cache.get(SessionStore.cache_key_prefix + old_key))
+        self.assertFalse(Session.objects.filter(pk=old_key).exists())
+        self.assertEqual(SessionStore(old_key).load(), {})
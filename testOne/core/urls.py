@@ -19,7 +19,7 @@ from django.urls import path, include
 from django.shortcuts import redirect
 from django.conf import settings
 from django.conf.urls.static import static
-from core.views import ConfigurationView
+from core.views import ConfigurationView, PerformanceMetricsView, ProfileListView, ProfileDownloadView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,6 +30,9 @@ urlpatterns = [
     path('notifications/', include('notifications.urls')),
     path('configuration/advanced/', include('system_config.urls')),
     path('configuration/', ConfigurationView.as_view(), name='configuration'),
+    path('configuration/performance/', PerformanceMetricsView.as_view(), name='performance_metrics'),
+    path('configuration/performance/profiles/', ProfileListView.as_view(), name='profile_list'),
+    path('configuration/performance/profiles/<str:profile_id>.<str:ext>', ProfileDownloadView.as_view(), name='profile_download'),
     path('activos/', include('gestion_activos.urls')),
     path('planos/', include('planos.urls')),
 ]
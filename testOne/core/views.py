@@ -1,3 +1,5 @@
+from django.http import FileResponse, Http404
+from django.views import View
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
@@ -9,6 +11,63 @@ class ConfigurationView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         return self.request.user.is_staff
     
     def get_context_data(self, **kwargs):
+        from .profiling import is_profiling_allowed
+
         context = super().get_context_data(**kwargs)
         context['page_title'] = 'Configuración del Sistema'
+        context['perfilado_permitido'] = is_profiling_allowed(self.request.user)
+        return context
+
+
+class PerformanceMetricsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """p50/p95 de tiempo y consultas por vista a partir del log de RequestMetricsMiddleware."""
+    template_name = 'configuration/performance.html'
+
+    def test_func(self):
+        # Solo superusuarios: el log incluye rutas y SQL de todas las vistas
+        return self.request.user.is_superuser
+
+    def get_context_data(self, **kwargs):
+        from .metrics import aggregate
+
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = 'Rendimiento por Vista'
+        context['rows'] = aggregate()
+        return context
+
+
+class ProfileListView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    Perfiles capturados con ?__profile=1 (buffer circular en PROFILER_DIR).
+    Superusuarios ven todos; el staff con 'perfilado_staff' activo, solo los suyos.
+    """
+    template_name = 'configuration/profiles.html'
+
+    def test_func(self):
+        from .profiling import is_profiling_allowed
+        return is_profiling_allowed(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        from .profiling import list_profiles
+
+        user = self.request.user
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = 'Perfiles de Requests'
+        context['profiles'] = list_profiles(None if user.is_superuser else user.get_username())
         return context
+
+
+class ProfileDownloadView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        from .profiling import is_profiling_allowed
+        return is_profiling_allowed(self.request.user)
+
+    def get(self, request, profile_id, ext):
+        from .profiling import PROFILE_FILES, can_view_profile, profile_file
+
+        path = profile_file(profile_id, ext)
+        # Un perfil ajeno responde igual que uno inexistente
+        if path is None or not can_view_profile(request.user, profile_id):
+            raise Http404('Perfil no encontrado')
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name,
+                            content_type=PROFILE_FILES[ext])
@@ -5,3 +5,6 @@ class GestionActivosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion_activos'
     verbose_name = 'Gestión de Activos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
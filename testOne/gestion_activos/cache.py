@@ -0,0 +1,73 @@
+"""
+gestion_activos/cache.py
+------------------------
+Versión global del estado de los activos.
+
+El estado de un activo (Asset.estado_actual) depende del activo, de su
+detalle (extintor / montacargas / botiquín) y de las inspecciones de
+botiquín cerradas. `gestion_activos/signals.py` llama a
+`bump_asset_state_version()` cuando cambia cualquiera de ellos; las
+respuestas cacheadas (ETag de marcadores de planos, etc.) incluyen
+`asset_state_version()` para quedar invalidadas.
+
+También guarda la lista de extintores temporales disponibles para un
+reemplazo (diálogo de movimientos), compartida por todos los usuarios e
+invalidada por las escrituras de MovimientoActivo y de los datos que muestra.
+La invalidación depende de la caché compartida (CACHES en settings); el TTL
+corto acota lo que puede quedar desactualizado si una escritura no emite
+señales (bulk_update, update()) o si la caché no es compartida.
+"""
+import time
+
+from django.core.cache import cache
+
+ASSET_STATE_VERSION_KEY = 'gestion_activos:asset_state_version'
+TEMPORALES_DISPONIBLES_KEY = 'gestion_activos:temporales_disponibles'
+TEMPORALES_DISPONIBLES_TIMEOUT = 60
+
+
+def asset_state_version():
+    version = cache.get(ASSET_STATE_VERSION_KEY)
+    if version is None:
+        # Valor no reutilizable aunque se reinicie el proceso y se pierda la caché
+        version = time.time_ns()
+        cache.add(ASSET_STATE_VERSION_KEY, version, None)
+        version = cache.get(ASSET_STATE_VERSION_KEY, version)
+    return version
+
+
+def bump_asset_state_version():
+    cache.set(ASSET_STATE_VERSION_KEY, time.time_ns(), None)
+
+
+def temporales_disponibles():
+    """
+    Extintores temporales activos con estado de movimiento NORMAL (libres para
+    un reemplazo), ordenados por código. Usa asset_temporal_disponible_idx.
+    """
+    data = cache.get(TEMPORALES_DISPONIBLES_KEY)
+    if data is None:
+        from .models import Asset
+
+        qs = Asset.objects.filter(
+            temporal=True,
+            activo=True,
+            extintor_detail__estado_movimiento='NORMAL',
+        ).select_related('area', 'extintor_detail__tipo_agente').order_by('code')
+        data = []
+        for t in qs:
+            detail = t.extintor_detail
+            data.append({
+                'pk': t.pk,
+                'code': t.code,
+                'area': str(t.area),
+                'tipo': str(detail.tipo_agente) if detail.tipo_agente else '-',
+                'capacidad': str(detail.capacidad_kg),
+                'vence': detail.fecha_vencimiento.strftime('%d/%m/%Y'),
+            })
+        cache.set(TEMPORALES_DISPONIBLES_KEY, data, TEMPORALES_DISPONIBLES_TIMEOUT)
+    return data
+
+
+def invalidate_temporales_disponibles():
+    cache.delete(TEMPORALES_DISPONIBLES_KEY)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_activos', '0007_asset_plano'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoactivo',
+            index=models.Index(fields=['activo', '-created_at'], name='movimiento_activo_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:35
+
+from django.db import migrations
+
+
+# Índice GIN con pg_trgm para la búsqueda por código (code__icontains). Solo PostgreSQL.
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS asset_code_trgm_idx ON gestion_activos_asset USING gin ((UPPER(code::text)) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS asset_code_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_activos', '0008_movimiento_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_activos', '0009_asset_code_trigram_index'),
+        ('inspections', '0038_backfill_schedule_module_key'),
+        ('system_config', '0002_plano'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('activo', True), ('temporal', True)), fields=['code'], name='asset_temporal_disponible_idx'),
+        ),
+    ]
@@ -1,9 +1,96 @@
 from django.db import models
+from django.db.models import Case, When, Value, Q, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
 
+ESTADO_LABELS = {
+    'VENCIDO': 'Vencido',
+    'PROXIMO_A_VENCER': 'Proximo a Vencer',
+    'ACTIVO': 'Activo',
+    'REEMPLAZADO': 'Reemplazado',
+    'FUERA_DE_SERVICIO': 'Fuera de servicio',
+    'MANTENIMIENTO_VENCIDO': 'Mantenimiento Vencido',
+    'PROXIMO_MANTENIMIENTO': 'Proximo Mantenimiento',
+    'OPERATIVO': 'Operativo',
+    'REVISION_VENCIDA': 'Revisión Vencida',
+    'PROXIMA_REVISION': 'Próxima Revisión',
+    'AL_DIA': 'Al Día',
+    'SIN_INSPECCION': 'Sin Inspección',
+    'SIN_CLASIFICAR': 'Sin Clasificar',
+}
+
+ESTADO_CSS = {
+    'VENCIDO': 'badge-danger',
+    'PROXIMO_A_VENCER': 'badge-warning',
+    'ACTIVO': 'badge-success',
+    'REEMPLAZADO': 'badge-warning',
+    'FUERA_DE_SERVICIO': 'badge-secondary',
+    'MANTENIMIENTO_VENCIDO': 'badge-danger',
+    'PROXIMO_MANTENIMIENTO': 'badge-warning',
+    'OPERATIVO': 'badge-success',
+    'REVISION_VENCIDA': 'badge-danger',
+    'PROXIMA_REVISION': 'badge-warning',
+    'AL_DIA': 'badge-success',
+    'SIN_INSPECCION': 'badge-secondary',
+    'SIN_CLASIFICAR': 'badge-secondary',
+}
+
+
+def estado_expression(prefix=''):
+    """
+    Misma lógica que Asset.estado_actual como expresión SQL.
+    `prefix` permite usarla desde otro modelo, ej: estado_expression('activo__').
+    """
+    from inspections.models import FirstAidInspection
+
+    hoy = timezone.now().date()
+    pronto = hoy + timedelta(days=30)
+    ext = f'{prefix}extintor_detail'
+    mnt = f'{prefix}montacargas_detail'
+    bot = f'{prefix}botiquin_detail'
+    botiquin_inspeccionado = Exists(FirstAidInspection.objects.filter(
+        asset=OuterRef(f'{prefix}pk'), status__in=['Cerrada', 'Cerrada con seguimientos'],
+    ))
+    return Case(
+        # Extintor: el estado de movimiento tiene prioridad sobre las fechas
+        When(Q(**{f'{ext}__estado_movimiento': 'REEMPLAZADO'}), then=Value('REEMPLAZADO')),
+        When(Q(**{f'{ext}__estado_movimiento': 'FUERA_DE_SERVICIO'}), then=Value('FUERA_DE_SERVICIO')),
+        When(Q(**{f'{ext}__fecha_vencimiento__lt': hoy}), then=Value('VENCIDO')),
+        When(Q(**{f'{ext}__fecha_vencimiento__lte': pronto}), then=Value('PROXIMO_A_VENCER')),
+        When(Q(**{f'{ext}__isnull': False}), then=Value('ACTIVO')),
+        # Montacargas
+        When(Q(**{f'{mnt}__fecha_proximo_mantenimiento__lt': hoy}), then=Value('MANTENIMIENTO_VENCIDO')),
+        When(Q(**{f'{mnt}__fecha_proximo_mantenimiento__lte': pronto}), then=Value('PROXIMO_MANTENIMIENTO')),
+        When(Q(**{f'{mnt}__isnull': False}), then=Value('OPERATIVO')),
+        # Botiquín
+        When(Q(**{f'{bot}__isnull': False}) & ~botiquin_inspeccionado, then=Value('SIN_INSPECCION')),
+        When(Q(**{f'{bot}__fecha_proxima_revision__lt': hoy}), then=Value('REVISION_VENCIDA')),
+        When(Q(**{f'{bot}__fecha_proxima_revision__lte': pronto}), then=Value('PROXIMA_REVISION')),
+        When(Q(**{f'{bot}__isnull': False}), then=Value('AL_DIA')),
+        default=Value('SIN_CLASIFICAR'),
+        output_field=models.CharField(),
+    )
+
+
+def ultima_fecha_expression(prefix=''):
+    """Última recarga / mantenimiento / revisión según el tipo de activo."""
+    return Coalesce(
+        f'{prefix}extintor_detail__fecha_recarga',
+        f'{prefix}montacargas_detail__fecha_ultimo_mantenimiento',
+        f'{prefix}botiquin_detail__fecha_ultima_revision',
+        output_field=models.DateField(),
+    )
+
+
+class AssetQuerySet(models.QuerySet):
+    def with_estado(self):
+        """Anota `estado_sql` (ver estado_expression); estado_actual lo reutiliza sin consultas extra."""
+        return self.annotate(estado_sql=estado_expression())
+
+
 class TipoExtintor(models.Model):
     """
     Tipos/Clases de extintores gestionables desde Configuracion.
@@ -74,6 +161,16 @@ class Asset(models.Model):
         verbose_name = "Activo"
         verbose_name_plural = "Activos"
         ordering = ['code']
+        indexes = [
+            # Temporales disponibles para reemplazo (diálogo de movimientos), ordenados por código
+            models.Index(
+                fields=['code'],
+                name='asset_temporal_disponible_idx',
+                condition=models.Q(temporal=True, activo=True),
+            ),
+        ]
+
+    objects = AssetQuerySet.as_manager()
 
     def __str__(self):
         return self.code
@@ -83,7 +180,10 @@ class Asset(models.Model):
         """
         Calcula el estado dinamicamente segun el tipo de activo.
         Para extintores: estado_movimiento tiene prioridad sobre la logica de fechas.
+        Si el queryset usó with_estado() se retorna el valor calculado en SQL.
         """
+        if 'estado_sql' in self.__dict__:
+            return self.estado_sql
         hoy = timezone.now().date()
         pronto = hoy + timedelta(days=30)
 
@@ -133,42 +233,12 @@ class Asset(models.Model):
     @property
     def estado_label(self):
         """Etiqueta legible del estado."""
-        labels = {
-            'VENCIDO': 'Vencido',
-            'PROXIMO_A_VENCER': 'Proximo a Vencer',
-            'ACTIVO': 'Activo',
-            'REEMPLAZADO': 'Reemplazado',
-            'FUERA_DE_SERVICIO': 'Fuera de servicio',
-            'MANTENIMIENTO_VENCIDO': 'Mantenimiento Vencido',
-            'PROXIMO_MANTENIMIENTO': 'Proximo Mantenimiento',
-            'OPERATIVO': 'Operativo',
-            'REVISION_VENCIDA': 'Revisión Vencida',
-            'PROXIMA_REVISION': 'Próxima Revisión',
-            'AL_DIA': 'Al Día',
-            'SIN_INSPECCION': 'Sin Inspección',
-            'SIN_CLASIFICAR': 'Sin Clasificar',
-        }
-        return labels.get(self.estado_actual, self.estado_actual)
+        return ESTADO_LABELS.get(self.estado_actual, self.estado_actual)
 
     @property
     def estado_css(self):
         """Clase CSS correspondiente al estado."""
-        css = {
-            'VENCIDO': 'badge-danger',
-            'PROXIMO_A_VENCER': 'badge-warning',
-            'ACTIVO': 'badge-success',
-            'REEMPLAZADO': 'badge-warning',
-            'FUERA_DE_SERVICIO': 'badge-secondary',
-            'MANTENIMIENTO_VENCIDO': 'badge-danger',
-            'PROXIMO_MANTENIMIENTO': 'badge-warning',
-            'OPERATIVO': 'badge-success',
-            'REVISION_VENCIDA': 'badge-danger',
-            'PROXIMA_REVISION': 'badge-warning',
-            'AL_DIA': 'badge-success',
-            'SIN_INSPECCION': 'badge-secondary',
-            'SIN_CLASIFICAR': 'badge-secondary',
-        }
-        return css.get(self.estado_actual, 'badge-secondary')
+        return ESTADO_CSS.get(self.estado_actual, 'badge-secondary')
 
     @property
     def tipo_nombre(self):
@@ -362,6 +432,9 @@ class MovimientoActivo(models.Model):
         verbose_name = "Movimiento de Activo"
         verbose_name_plural = "Movimientos de Activos"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['activo', '-created_at'], name='movimiento_activo_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_movimiento_display()} - {self.activo.code} ({self.fecha})"
@@ -0,0 +1,413 @@
+"""
+gestion_activos/services.py
+---------------------------
+Movimientos de extintores por lotes (campañas de recarga).
+
+`registrar_salidas_lote()` y `registrar_retornos_lote()` aplican el mismo
+flujo que RegistrarSalidaYReemplazoView / RegistrarRetornoView a muchos
+extintores a la vez:
+  1. Validan todas las filas por adelantado con un número fijo de consultas,
+     sin importar el tamaño del lote.
+  2. Aplican las filas válidas en UNA transacción, con los detalles de
+     extintor bloqueados (`select_for_update`) y revalidados: bulk_create de
+     los temporales nuevos, de sus ExtintorDetail y de los MovimientoActivo;
+     bulk_update de `ExtintorDetail.estado_movimiento`.
+
+Cada fila recibe su resultado, en el orden recibido: {'ok': True, ...} o
+{'ok': False, 'error': ...} / {'ok': False, 'errors': {campo: mensaje}}.
+Un IntegrityError (p. ej. un código de temporal creado por otra sesión
+entre la validación y el bulk_create) revierte el lote y se propaga; la
+vista lo traduce a 409.
+
+bulk_create/bulk_update no emiten señales: las cachés que dependen de los
+movimientos (asset_state_version, temporales disponibles) se invalidan
+explícitamente al confirmar la transacción.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .cache import bump_asset_state_version, invalidate_temporales_disponibles
+from .models import Asset, ExtintorDetail, MovimientoActivo, TipoExtintor, ESTADO_LABELS
+
+# Estados del original que permiten registrar la salida (igual que el flujo individual)
+ESTADOS_SALIDA = ('ACTIVO', 'VENCIDO', 'PROXIMO_A_VENCER')
+MAX_MOVIMIENTOS_LOTE = 200
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _invalidar_caches():
+    transaction.on_commit(bump_asset_state_version)
+    transaction.on_commit(invalidate_temporales_disponibles)
+
+
+def _datos_temporal_nuevo(datos):
+    """Valida el formato de un temporal nuevo; retorna (datos_limpios, errores)."""
+    errors = {}
+    code = str(datos.get('code') or '').strip()
+    area_id = _to_int(datos.get('area_id'))
+    tipo_id = _to_int(datos.get('tipo_id')) if datos.get('tipo_id') not in (None, '') else None
+    if not code:
+        errors['temp_code'] = 'El codigo del temporal es obligatorio.'
+    if area_id is None:
+        errors['temp_area_id'] = 'El area del temporal es obligatoria.'
+    if datos.get('tipo_id') not in (None, '') and tipo_id is None:
+        errors['temp_tipo_id'] = 'Tipo de extintor invalido.'
+    try:
+        capacidad = Decimal(str(datos.get('capacidad')).strip())
+        if not capacidad.is_finite() or capacidad <= 0 or capacidad >= 10000:
+            raise InvalidOperation
+        capacidad = capacidad.quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        capacidad = None
+        errors['temp_capacidad'] = 'La capacidad es obligatoria y debe ser un numero positivo.'
+    try:
+        fecha_recarga = date.fromisoformat(str(datos.get('fecha_recarga') or ''))
+    except ValueError:
+        fecha_recarga = None
+        errors['temp_fecha_recarga'] = 'La fecha de recarga es obligatoria (AAAA-MM-DD).'
+    limpio = {
+        'code': code, 'area_id': area_id, 'tipo_id': tipo_id,
+        'capacidad': capacidad, 'fecha_recarga': fecha_recarga,
+    }
+    return limpio, errors
+
+
+def registrar_salidas_lote(items, *, fecha, responsable, motivo, observaciones='', user=None):
+    """
+    Salida + reemplazo con temporal para cada fila de `items`:
+      {'original_pk': N, 'temporal_pk': M}
+      {'original_pk': N, 'temporal_nuevo': {code, area_id, tipo_id, capacidad, fecha_recarga}}
+    Los datos de la salida (fecha, responsable, motivo, observaciones) son comunes al lote.
+    """
+    from inspections.models import Area
+
+    resultados = []
+    filas = []
+    for item in items:
+        original_pk = _to_int(item.get('original_pk')) if isinstance(item, dict) else None
+        resultado = {'original_pk': original_pk, 'ok': False}
+        resultados.append(resultado)
+        if original_pk is None:
+            resultado['error'] = 'original_pk es obligatorio.'
+            continue
+        if item.get('temporal_nuevo') is not None:
+            if not isinstance(item['temporal_nuevo'], dict):
+                resultado['error'] = 'temporal_nuevo debe ser un objeto.'
+                continue
+            nuevo, errors = _datos_temporal_nuevo(item['temporal_nuevo'])
+            if errors:
+                resultado['errors'] = errors
+                continue
+            filas.append({'resultado': resultado, 'original_pk': original_pk, 'temporal_pk': None, 'nuevo': nuevo})
+        else:
+            temporal_pk = _to_int(item.get('temporal_pk'))
+            if temporal_pk is None:
+                resultado['errors'] = {'temporal_pk': 'Selecciona un temporal o indica temporal_nuevo.'}
+                continue
+            filas.append({'resultado': resultado, 'original_pk': original_pk, 'temporal_pk': temporal_pk, 'nuevo': None})
+
+    # ── Validación contra la BD: una consulta por tabla para todo el lote ──
+    originales = {
+        a['pk']: a for a in Asset.objects.with_estado().filter(
+            pk__in=[f['original_pk'] for f in filas],
+        ).values('pk', 'code', 'temporal', 'asset_type_id', 'estado_sql', 'extintor_detail__pk')
+    }
+    temporales = {
+        a['pk']: a for a in Asset.objects.filter(
+            pk__in=[f['temporal_pk'] for f in filas if f['temporal_pk']], temporal=True, activo=True,
+        ).values('pk', 'code', 'extintor_detail__pk', 'extintor_detail__estado_movimiento')
+    }
+    nuevos = [f['nuevo'] for f in filas if f['nuevo']]
+    codigos_existentes = set(
+        Asset.objects.filter(code__in=[n['code'] for n in nuevos]).values_list('code', flat=True)
+    )
+    areas = set(Area.objects.filter(pk__in=[n['area_id'] for n in nuevos]).values_list('pk', flat=True))
+    tipos = set(
+        TipoExtintor.objects.filter(pk__in=[n['tipo_id'] for n in nuevos if n['tipo_id']]).values_list('pk', flat=True)
+    )
+
+    usados_originales, usados_temporales, usados_codigos = set(), set(), set()
+    validas = []
+    for fila in filas:
+        resultado = fila['resultado']
+        original = originales.get(fila['original_pk'])
+        if original is None:
+            resultado['error'] = 'Activo no encontrado.'
+            continue
+        resultado['original_code'] = original['code']
+        if original['extintor_detail__pk'] is None:
+            resultado['error'] = 'Este activo no es un extintor.'
+            continue
+        if original['temporal']:
+            resultado['error'] = 'No se puede registrar salida de un extintor que es de reemplazo temporal.'
+            continue
+        if original['estado_sql'] not in ESTADOS_SALIDA:
+            estado_label = ESTADO_LABELS.get(original['estado_sql'], original['estado_sql'])
+            resultado['error'] = f'Estado "{estado_label}" no permite registrar salida.'
+            continue
+        if original['pk'] in usados_originales:
+            resultado['error'] = 'El activo aparece más de una vez en el lote.'
+            continue
+
+        nuevo = fila['nuevo']
+        if nuevo:
+            errors = {}
+            if nuevo['code'] in codigos_existentes:
+                errors['temp_code'] = f'Ya existe un activo con codigo "{nuevo["code"]}".'
+            elif nuevo['code'] in usados_codigos:
+                errors['temp_code'] = f'El codigo "{nuevo["code"]}" se repite en el lote.'
+            if nuevo['area_id'] not in areas:
+                errors['temp_area_id'] = 'Area no encontrada.'
+            if nuevo['tipo_id'] and nuevo['tipo_id'] not in tipos:
+                errors['temp_tipo_id'] = 'Tipo de extintor no encontrado.'
+            if errors:
+                resultado['errors'] = errors
+                continue
+            usados_codigos.add(nuevo['code'])
+        else:
+            temporal = temporales.get(fila['temporal_pk'])
+            if temporal is None:
+                resultado['error'] = 'Temporal no encontrado.'
+                continue
+            if temporal['extintor_detail__pk'] is None:
+                resultado['error'] = 'El temporal no tiene datos de extintor.'
+                continue
+            if temporal['extintor_detail__estado_movimiento'] != 'NORMAL':
+                resultado['error'] = 'El temporal seleccionado no esta disponible.'
+                continue
+            if temporal['pk'] in usados_temporales:
+                resultado['error'] = 'El temporal ya fue asignado a otro extintor del lote.'
+                continue
+            usados_temporales.add(temporal['pk'])
+        usados_originales.add(original['pk'])
+        validas.append(fila)
+
+    if not validas:
+        return resultados
+
+    with transaction.atomic():
+        # Revalidación con los detalles bloqueados: otra sesión pudo mover alguno entretanto
+        detalles = {
+            d.asset_id: d for d in ExtintorDetail.objects.select_for_update().filter(
+                asset_id__in=[f['original_pk'] for f in validas] + [f['temporal_pk'] for f in validas if f['temporal_pk']],
+            )
+        }
+        aplicables = []
+        for fila in validas:
+            # El detalle pudo eliminarse desde otra sesión después de la validación
+            detalle = detalles.get(fila['original_pk'])
+            detalle_temporal = detalles.get(fila['temporal_pk']) if fila['temporal_pk'] else None
+            if detalle is None:
+                fila['resultado']['error'] = 'El activo ya no tiene datos de extintor.'
+            elif detalle.estado_movimiento != 'NORMAL':
+                fila['resultado']['error'] = 'El activo fue movido desde otra sesión.'
+            elif fila['temporal_pk'] and (detalle_temporal is None or detalle_temporal.estado_movimiento != 'NORMAL'):
+                fila['resultado']['error'] = 'El temporal seleccionado ya no esta disponible.'
+            else:
+                aplicables.append(fila)
+        if not aplicables:
+            return resultados
+
+        # Temporales nuevos y sus detalles
+        por_crear = [f for f in aplicables if f['nuevo']]
+        creados = Asset.objects.bulk_create([
+            Asset(
+                code=f['nuevo']['code'],
+                asset_type_id=originales[f['original_pk']]['asset_type_id'],
+                area_id=f['nuevo']['area_id'],
+                activo=True,
+                temporal=True,
+                observaciones=f'Temporal para reemplazo de {originales[f["original_pk"]]["code"]}',
+            )
+            for f in por_crear
+        ])
+        ExtintorDetail.objects.bulk_create([
+            ExtintorDetail(
+                asset=temporal,
+                tipo_agente_id=f['nuevo']['tipo_id'],
+                capacidad_kg=f['nuevo']['capacidad'],
+                fecha_recarga=f['nuevo']['fecha_recarga'],
+                fecha_vencimiento=f['nuevo']['fecha_recarga'] + relativedelta(years=1),
+                estado_movimiento='NORMAL',
+            )
+            for f, temporal in zip(por_crear, creados)
+        ])
+        for f, temporal in zip(por_crear, creados):
+            f['temporal_pk'] = temporal.pk
+            temporales[temporal.pk] = {'pk': temporal.pk, 'code': temporal.code}
+
+        # Salida del original + reemplazo del temporal
+        movimientos = []
+        for f in aplicables:
+            original_code = originales[f['original_pk']]['code']
+            movimientos += [
+                MovimientoActivo(
+                    activo_id=f['original_pk'],
+                    tipo_movimiento='salida',
+                    activo_relacionado_id=f['temporal_pk'],
+                    fecha=fecha,
+                    responsable=responsable,
+                    motivo=motivo,
+                    observaciones=observaciones,
+                    created_by=user,
+                ),
+                MovimientoActivo(
+                    activo_id=f['temporal_pk'],
+                    tipo_movimiento='reemplazo',
+                    activo_relacionado_id=f['original_pk'],
+                    fecha=fecha,
+                    responsable=responsable,
+                    motivo=motivo,
+                    observaciones=f'Temporal asignado como reemplazo de: {original_code}',
+                    created_by=user,
+                ),
+            ]
+        MovimientoActivo.objects.bulk_create(movimientos)
+
+        cambios = []
+        for f in aplicables:
+            detalle = detalles[f['original_pk']]
+            detalle.estado_movimiento = 'REEMPLAZADO'
+            cambios.append(detalle)
+        ExtintorDetail.objects.bulk_update(cambios, ['estado_movimiento'])
+        _invalidar_caches()
+
+    for f in aplicables:
+        f['resultado'].update({
+            'ok': True,
+            'nuevo_estado': 'REEMPLAZADO',
+            'temporal_pk': f['temporal_pk'],
+            'temporal_code': temporales[f['temporal_pk']]['code'],
+        })
+    return resultados
+
+
+def registrar_retornos_lote(items, *, fecha, responsable, observaciones='', user=None):
+    """
+    Retorno del original para cada fila de `items` ({'original_pk': N}):
+    el original vuelve a NORMAL y su temporal (el de la última salida) queda
+    FUERA_DE_SERVICIO. Los datos del retorno son comunes al lote.
+    """
+    resultados = []
+    pks = []
+    for item in items:
+        original_pk = _to_int(item.get('original_pk')) if isinstance(item, dict) else None
+        resultado = {'original_pk': original_pk, 'ok': False}
+        resultados.append(resultado)
+        if original_pk is None:
+            resultado['error'] = 'original_pk es obligatorio.'
+            continue
+        pks.append((original_pk, resultado))
+
+    # Temporal asociado: el de la última salida (mismo criterio que Asset.get_temporal_activo)
+    ultimo_temporal = MovimientoActivo.objects.filter(
+        activo=OuterRef('pk'),
+        tipo_movimiento='salida',
+        activo_relacionado__isnull=False,
+    ).order_by('-created_at')
+    originales = {
+        a['pk']: a for a in Asset.objects.filter(pk__in=[pk for pk, _ in pks]).annotate(
+            temporal_pk=Subquery(ultimo_temporal.values('activo_relacionado')[:1]),
+            temporal_code=Subquery(ultimo_temporal.values('activo_relacionado__code')[:1]),
+        ).values('pk', 'code', 'extintor_detail__pk', 'extintor_detail__estado_movimiento', 'temporal_pk', 'temporal_code')
+    }
+
+    usados = set()
+    validas = []
+    for original_pk, resultado in pks:
+        original = originales.get(original_pk)
+        if original is None:
+            resultado['error'] = 'Activo no encontrado.'
+            continue
+        resultado['original_code'] = original['code']
+        if original['extintor_detail__pk'] is None:
+            resultado['error'] = 'Este activo no es un extintor.'
+            continue
+        if original['extintor_detail__estado_movimiento'] != 'REEMPLAZADO':
+            resultado['error'] = 'El activo no esta en estado Reemplazado.'
+            continue
+        if original['temporal_pk'] is None:
+            resultado['error'] = 'No se encontro el temporal asociado. Contacta al administrador.'
+            continue
+        if original_pk in usados:
+            resultado['error'] = 'El activo aparece más de una vez en el lote.'
+            continue
+        usados.add(original_pk)
+        validas.append((original, resultado))
+
+    if not validas:
+        return resultados
+
+    with transaction.atomic():
+        detalles = {
+            d.asset_id: d for d in ExtintorDetail.objects.select_for_update().filter(
+                asset_id__in=[o['pk'] for o, _ in validas] + [o['temporal_pk'] for o, _ in validas],
+            )
+        }
+        aplicables = []
+        cambios = []
+        for original, resultado in validas:
+            detalle = detalles.get(original['pk'])
+            if detalle is None:
+                resultado['error'] = 'El activo ya no tiene datos de extintor.'
+                continue
+            if detalle.estado_movimiento != 'REEMPLAZADO':
+                resultado['error'] = 'El activo fue movido desde otra sesión.'
+                continue
+            detalle.estado_movimiento = 'NORMAL'
+            cambios.append(detalle)
+            # El temporal puede no tener detalle de extintor (igual que el flujo individual)
+            detalle_temporal = detalles.get(original['temporal_pk'])
+            if detalle_temporal is not None:
+                detalle_temporal.estado_movimiento = 'FUERA_DE_SERVICIO'
+                cambios.append(detalle_temporal)
+            aplicables.append((original, resultado))
+        if not aplicables:
+            return resultados
+
+        ExtintorDetail.objects.bulk_update(cambios, ['estado_movimiento'])
+        movimientos = []
+        for original, _ in aplicables:
+            movimientos += [
+                MovimientoActivo(
+                    activo_id=original['pk'],
+                    tipo_movimiento='retorno',
+                    activo_relacionado_id=original['temporal_pk'],
+                    fecha=fecha,
+                    responsable=responsable,
+                    motivo='',
+                    observaciones=observaciones,
+                    created_by=user,
+                ),
+                MovimientoActivo(
+                    activo_id=original['temporal_pk'],
+                    tipo_movimiento='baja_temporal',
+                    activo_relacionado_id=original['pk'],
+                    fecha=fecha,
+                    responsable=responsable,
+                    motivo='',
+                    observaciones=f'Dado de baja al retornar {original["code"]}',
+                    created_by=user,
+                ),
+            ]
+        MovimientoActivo.objects.bulk_create(movimientos)
+        _invalidar_caches()
+
+    for original, resultado in aplicables:
+        resultado.update({
+            'ok': True,
+            'nuevo_estado': 'ACTIVO',
+            'temporal_pk': original['temporal_pk'],
+            'temporal_code': original['temporal_code'],
+        })
+    return resultados
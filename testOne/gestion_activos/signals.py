@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from inspections.models import Area, FirstAidInspection
+from .cache import bump_asset_state_version, invalidate_temporales_disponibles
+from .models import Asset, ExtintorDetail, MontacargasDetail, BotiquinDetail, MovimientoActivo, TipoExtintor
+
+
+# Estado de activos: cambia con el activo, su detalle o las inspecciones de botiquín
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=ExtintorDetail)
+@receiver(post_delete, sender=ExtintorDetail)
+@receiver(post_save, sender=MontacargasDetail)
+@receiver(post_delete, sender=MontacargasDetail)
+@receiver(post_save, sender=BotiquinDetail)
+@receiver(post_delete, sender=BotiquinDetail)
+@receiver(post_save, sender=FirstAidInspection)
+@receiver(post_delete, sender=FirstAidInspection)
+def invalidate_asset_state(sender, **kwargs):
+    bump_asset_state_version()
+
+
+# Temporales disponibles: cambian con cada movimiento (salida/reemplazo/retorno)
+# y con los datos que muestra el diálogo. Se invalida al confirmar la transacción
+# para que otra request no vuelva a cachear el estado anterior al commit.
+@receiver(post_save, sender=MovimientoActivo)
+@receiver(post_delete, sender=MovimientoActivo)
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=ExtintorDetail)
+@receiver(post_delete, sender=ExtintorDetail)
+@receiver(post_save, sender=TipoExtintor)
+@receiver(post_save, sender=Area)
+def invalidate_temporales(sender, **kwargs):
+    transaction.on_commit(invalidate_temporales_disponibles)
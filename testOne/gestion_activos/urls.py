@@ -10,8 +10,9 @@ from .views import (
     AssetInspectionHistoryView,
     # Movimientos de Activos
     AssetMovimientosView, RegistrarSalidaYReemplazoView, RegistrarRetornoView, TemporalesDisponiblesView,
+    MovimientosLoteView,
     # Reportes
-    AssetInventoryReportView,
+    AssetInventoryReportView, AssetInventoryTableView,
     # AJAX
     AssetTypeDetailFormView,
 )
@@ -41,10 +42,12 @@ urlpatterns = [
     path('<int:pk>/movimientos/', AssetMovimientosView.as_view(), name='asset_movimientos'),
     path('<int:pk>/movimientos/salida/', RegistrarSalidaYReemplazoView.as_view(), name='asset_registrar_salida'),
     path('<int:pk>/movimientos/retorno/', RegistrarRetornoView.as_view(), name='asset_registrar_retorno'),
+    path('movimientos/lote/', MovimientosLoteView.as_view(), name='asset_movimientos_lote'),
     path('temporales-disponibles/', TemporalesDisponiblesView.as_view(), name='asset_temporales_disponibles'),
 
     # -- Reportes --------------------------------------------------------------------------
     path('reporte/', AssetInventoryReportView.as_view(), name='asset_report'),
+    path('reporte/tabla/', AssetInventoryTableView.as_view(), name='asset_report_table'),
 
     # -- AJAX ------------------------------------------------------------------------------
     path('ajax/detail-form/', AssetTypeDetailFormView.as_view(), name='asset_detail_form_ajax'),
@@ -3,10 +3,11 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy, reverse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Count, F, Q
 from django.http import JsonResponse
 
-from .models import Asset, AssetType, ExtintorDetail, MontacargasDetail, BotiquinDetail, TipoExtintor
+from .models import Asset, AssetType, ExtintorDetail, MontacargasDetail, BotiquinDetail, TipoExtintor, ESTADO_LABELS, ESTADO_CSS
+from .cache import temporales_disponibles
 from .forms import AssetForm, ExtintorDetailForm, MontacargasDetailForm, BotiquinDetailForm, AssetTypeForm, TipoExtintorForm
 from roles.mixins import RolePermissionRequiredMixin
 
@@ -76,9 +77,11 @@ class AssetListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
     model = Asset
     template_name = 'gestion_activos/asset_list.html'
     context_object_name = 'assets'
+    paginate_by = 25
 
     def get_queryset(self):
-        qs = Asset.objects.select_related('asset_type', 'area', 'plano').all()
+        # Estado calculado en SQL (with_estado): filtrable y paginable en la BD
+        qs = Asset.objects.select_related('asset_type', 'area', 'plano').with_estado()
 
         f_type = self.request.GET.get('tipo', '')
         f_area = self.request.GET.get('area', '')
@@ -95,12 +98,9 @@ class AssetListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
         if f_activo != '':
             qs = qs.filter(activo=(f_activo == '1'))
 
-        # Filtro de estado se aplica en Python (es calculado)
         f_status = self.request.GET.get('estado', '')
         if f_status:
-            # Prefetch detail relations for state calculation
-            qs = qs.prefetch_related('extintor_detail', 'montacargas_detail', 'botiquin_detail', 'first_aid_inspections')
-            qs = [a for a in qs if a.estado_actual == f_status]
+            qs = qs.filter(estado_sql=f_status)
         return qs
 
     def get_context_data(self, **kwargs):
@@ -113,21 +113,24 @@ class AssetListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
         context['f_search'] = self.request.GET.get('search', '')
         context['f_estado'] = self.request.GET.get('estado', '')
 
-        # Stats
-        all_assets = Asset.objects.select_related(
-            'asset_type', 'area', 'plano'
-        ).prefetch_related('extintor_detail', 'montacargas_detail').all()
-        context['total_assets'] = all_assets.count()
-        context['activos_count'] = sum(
-            1 for a in all_assets
-            if a.estado_actual in ('ACTIVO', 'OPERATIVO', 'AL_DIA')
-        )
-        context['alertas_count'] = sum(
-            1 for a in all_assets
-            if a.estado_actual in ('VENCIDO', 'PROXIMO_A_VENCER',
-                                   'MANTENIMIENTO_VENCIDO', 'PROXIMO_MANTENIMIENTO')
+        # Filtros actuales para los enlaces de paginación
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['filter_querystring'] = params.urlencode()
+
+        # Stats: una sola consulta con agregados condicionales sobre el estado en SQL
+        stats = Asset.objects.with_estado().aggregate(
+            total=Count('pk'),
+            activos=Count('pk', filter=Q(estado_sql__in=('ACTIVO', 'OPERATIVO', 'AL_DIA'))),
+            alertas=Count('pk', filter=Q(estado_sql__in=(
+                'VENCIDO', 'PROXIMO_A_VENCER', 'MANTENIMIENTO_VENCIDO', 'PROXIMO_MANTENIMIENTO',
+            ))),
+            temporales=Count('pk', filter=Q(temporal=True)),
         )
-        context['temporales_count'] = sum(1 for a in all_assets if getattr(a, 'temporal', False))
+        context['total_assets'] = stats['total']
+        context['activos_count'] = stats['activos']
+        context['alertas_count'] = stats['alertas']
+        context['temporales_count'] = stats['temporales']
         return context
 
 
@@ -387,13 +390,18 @@ class TipoExtintorDeleteView(LoginRequiredMixin, RolePermissionRequiredMixin, De
 
 class AssetInspectionHistoryView(LoginRequiredMixin, View):
     """
-    Devuelve el historial de inspecciones de un activo como JSON.
+    Devuelve el historial de inspecciones de un activo como JSON, paginado
+    (más reciente primero, ?page=N).
 
     Soporta dos tipos de relación:
     - 'direct': el FK al activo está directamente en el modelo de inspección
     - 'items':  el FK al activo está en el modelo de ítems (inspection.items__asset)
 
     Agregar nuevos módulos es trivial ampliando INSPECTION_SOURCES.
+
+    Consultas: una sobre el activo (totales y firma del ETag como subconsultas)
+    y un UNION ALL de todas las fuentes para la página pedida. Con un
+    If-None-Match vigente se responde 304 tras la primera.
     """
 
     # Mapa: (app_label.Model, tipo_relacion, label, url_name)
@@ -403,90 +411,193 @@ class AssetInspectionHistoryView(LoginRequiredMixin, View):
         ('inspections.ForkliftInspection',     'direct', 'Montacargas', 'forklift_detail'),
         ('inspections.FirstAidInspection',     'direct', 'Botiquín',    'first_aid_detail'),
     ]
+    PAGE_SIZE = 10
+
+    def _sources(self):
+        """(clave, Model, tipo_relacion, label, url_name) de las fuentes instaladas."""
+        from django.apps import apps
+
+        for i, (model_path, rel_type, tipo_label, detail_url_name) in enumerate(self.INSPECTION_SOURCES):
+            try:
+                Model = apps.get_model(model_path)
+            except (LookupError, ValueError):
+                continue
+            yield f'm{i}', Model, rel_type, tipo_label, detail_url_name
 
-    def _build_queryset(self, Model, rel_type, asset):
+    def _build_queryset(self, Model, rel_type, asset_pk):
         """Construye el queryset según el tipo de relación."""
+        from django.db.models import Exists, OuterRef
+
         if rel_type == 'direct':
             # El FK está directamente en la inspección
-            return Model.objects.filter(asset=asset).select_related('inspector', 'area')
+            return Model.objects.filter(asset_id=asset_pk)
         elif rel_type == 'items':
-            # El FK está en los ítems: buscar inspecciones que contengan ese activo
-            return Model.objects.filter(items__asset=asset).distinct().select_related('inspector', 'area')
+            # El FK está en los ítems: inspecciones con al menos un ítem de ese activo (sin JOIN ni DISTINCT)
+            Item = Model._meta.get_field('items').related_model
+            return Model.objects.filter(Exists(Item.objects.filter(inspection=OuterRef('pk'), asset_id=asset_pk)))
         return Model.objects.none()
 
-    def get(self, request, pk):
-        asset = get_object_or_404(Asset, pk=pk)
-        records = []
-
-        from django.apps import apps
-        from django.urls import reverse
+    def _recharge_items(self, Model, asset_pk):
+        """Ítems del activo con recarga realizada; None si el módulo no registra recargas."""
+        Item = Model._meta.get_field('items').related_model
+        fields = {f.name for f in Item._meta.get_fields()}
+        if not {'asset', 'fecha_recarga_realizada'} <= fields:
+            return None
+        return Item.objects.filter(asset_id=asset_pk)
+
+    def _summary(self, pk):
+        """
+        Código del activo, número de inspecciones y última modificación por fuente,
+        y total de recargas: una consulta con subconsultas escalares.
+        """
+        from django.db.models import DateTimeField, Func, IntegerField, Subquery
+
+        def scalar(qs, expression, function, output_field):
+            return Subquery(
+                qs.order_by().annotate(v=Func(expression, function=function, output_field=output_field)).values('v'),
+                output_field=output_field,
+            )
+
+        annotations = {}
+        for key, Model, rel_type, _label, _url in self._sources():
+            qs = self._build_queryset(Model, rel_type, pk)
+            annotations[f'{key}_total'] = scalar(qs, F('pk'), 'COUNT', IntegerField())
+            annotations[f'{key}_updated'] = scalar(qs, F('updated_at'), 'MAX', DateTimeField())
+            recharges = self._recharge_items(Model, pk)
+            if recharges is not None:
+                annotations[f'{key}_recargas'] = scalar(
+                    recharges.filter(fecha_recarga_realizada__isnull=False), F('pk'), 'COUNT', IntegerField()
+                )
+        return Asset.objects.filter(pk=pk).annotate(**annotations).values('code', *annotations).first()
+
+    def _page_rows(self, pk, start, stop):
+        """Filas de la página: UNION ALL de todas las fuentes con las mismas columnas."""
+        from django.db.models import CharField, IntegerField, OuterRef, Subquery, TextField, Value
+        from django.db.models.functions import Coalesce, NullIf
+
+        branches = []
+        sources = {}
+        for key, Model, rel_type, tipo_label, detail_url_name in self._sources():
+            field_names = {f.name for f in Model._meta.get_fields()}
+            observations = F('observations')
+            if 'additional_observations' in field_names:
+                observations = Coalesce(
+                    NullIf('observations', Value('')), 'additional_observations', output_field=TextField(),
+                )
 
-        for model_path, rel_type, tipo_label, detail_url_name in self.INSPECTION_SOURCES:
-            try:
-                app_label, model_name = model_path.split('.')
-                Model = apps.get_model(app_label, model_name)
-            except (LookupError, ValueError):
-                continue
+            # Recargas del activo en cada inspección: subconsulta con Count filtrado
+            recargas = Value(0, output_field=IntegerField())
+            recharges = self._recharge_items(Model, pk)
+            if recharges is not None:
+                recargas = Coalesce(
+                    Subquery(
+                        recharges.filter(inspection=OuterRef('pk')).order_by().values('inspection').annotate(
+                            n=Count('pk', filter=Q(fecha_recarga_realizada__isnull=False)),
+                        ).values('n'),
+                        output_field=IntegerField(),
+                    ),
+                    0,
+                )
 
-            qs = self._build_queryset(Model, rel_type, asset).order_by('-inspection_date')
+            branches.append(
+                self._build_queryset(Model, rel_type, pk).order_by().annotate(
+                    module=Value(key, output_field=CharField()),
+                    area_name=F('area__name'),
+                    inspector_first=F('inspector__first_name'),
+                    inspector_last=F('inspector__last_name'),
+                    inspector_username=F('inspector__username'),
+                    obs=observations,
+                    recargas=recargas,
+                ).values(
+                    'id', 'inspection_date', 'status', 'module', 'parent_inspection_id', 'area_name',
+                    'inspector_first', 'inspector_last', 'inspector_username', 'obs', 'recargas',
+                )
+            )
+            sources[key] = (tipo_label, detail_url_name)
 
-            for insp in qs:
-                # Estado
-                status_val = getattr(insp, 'status', None) or getattr(insp, 'general_status', '-')
+        if not branches:
+            return [], sources
+        union_qs = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        return list(union_qs.order_by('-inspection_date', '-id')[start:stop]), sources
 
-                # Inspector
-                inspector_name = '-'
-                if insp.inspector:
-                    inspector_name = insp.inspector.get_full_name() or insp.inspector.username
+    def get(self, request, pk):
+        import hashlib
+        import json
+        import math
+        from django.http import Http404
+        from django.urls import reverse, NoReverseMatch
+        from django.utils.cache import get_conditional_response, patch_cache_control
+
+        summary = self._summary(pk)
+        if summary is None:
+            raise Http404('Activo no encontrado.')
+        total = sum(v for k, v in summary.items() if k.endswith('_total') and v)
+        num_pages = max(1, math.ceil(total / self.PAGE_SIZE))
+        try:
+            page = min(max(int(request.GET.get('page', 1)), 1), num_pages)
+        except ValueError:
+            page = 1
+
+        # El historial cambia si cambia una inspección (updated_at), su número o las recargas del activo
+        etag_source = json.dumps([summary, page], sort_keys=True, default=str)
+        etag = '"%s"' % hashlib.md5(etag_source.encode('utf-8')).hexdigest()
+        # If-None-Match con lista de ETags o '*' (RFC 9110)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
 
-                # Observaciones
-                obs = getattr(insp, 'observations', '') or getattr(insp, 'additional_observations', '') or ''
+        start = (page - 1) * self.PAGE_SIZE
+        rows, sources = self._page_rows(pk, start, start + self.PAGE_SIZE) if total else ([], {})
 
-                # Indicador de si es seguimiento
-                es_seguimiento = getattr(insp, 'parent_inspection_id', None) is not None
+        records = []
+        for row in rows:
+            tipo_label, detail_url_name = sources[row['module']]
 
-                # URL de detalle
-                try:
-                    detail_url = reverse(detail_url_name, args=[insp.pk])
-                except Exception:
-                    detail_url = '#'
+            # Inspector
+            inspector_name = '-'
+            if row['inspector_username']:
+                full_name = f"{row['inspector_first'] or ''} {row['inspector_last'] or ''}".strip()
+                inspector_name = full_name or row['inspector_username']
 
-                # Indicadores adicionales
-                extra = []
-                if es_seguimiento:
-                    extra.append('Seguimiento')
-                if hasattr(insp, 'items'):
-                    try:
-                        items_with_recharge = insp.items.filter(
-                            asset=asset,
-                            fecha_recarga_realizada__isnull=False
-                        ).count()
-                        if items_with_recharge:
-                            extra.append(f'{items_with_recharge} recarga(s)')
-                    except Exception:
-                        pass
-
-                records.append({
-                    'id': insp.pk,
-                    'fecha': insp.inspection_date.strftime('%d/%m/%Y') if insp.inspection_date else '-',
-                    'fecha_iso': insp.inspection_date.isoformat() if insp.inspection_date else '',
-                    'tipo': tipo_label,
-                    'status': status_val,
-                    'area': str(insp.area) if insp.area else '-',
-                    'inspector': inspector_name,
-                    'observaciones': str(obs)[:200] if obs else '',
-                    'extras': extra,
-                    'url': detail_url,
-                })
-
-        # Ordenar más reciente primero
-        records.sort(key=lambda r: r['fecha_iso'], reverse=True)
+            # URL de detalle
+            try:
+                detail_url = reverse(detail_url_name, args=[row['id']])
+            except NoReverseMatch:
+                detail_url = '#'
+
+            # Indicadores adicionales
+            extra = []
+            if row['parent_inspection_id'] is not None:
+                extra.append('Seguimiento')
+            if row['recargas']:
+                extra.append(f"{row['recargas']} recarga(s)")
+
+            fecha = row['inspection_date']
+            records.append({
+                'id': row['id'],
+                'fecha': fecha.strftime('%d/%m/%Y') if fecha else '-',
+                'fecha_iso': fecha.isoformat() if fecha else '',
+                'tipo': tipo_label,
+                'status': row['status'] or '-',
+                'area': row['area_name'] or '-',
+                'inspector': inspector_name,
+                'observaciones': str(row['obs'])[:200] if row['obs'] else '',
+                'extras': extra,
+                'url': detail_url,
+            })
 
-        return JsonResponse({
-            'asset_code': asset.code,
-            'total': len(records),
+        response = JsonResponse({
+            'asset_code': summary['code'],
+            'total': total,
+            'page': page,
+            'num_pages': num_pages,
+            'page_size': self.PAGE_SIZE,
             'records': records,
         })
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 # =============================================================================
@@ -557,13 +668,9 @@ class AssetMovimientosView(LoginRequiredMixin, View):
         # Temporales disponibles para seleccionar al registrar reemplazo
         temporales = []
         if can_manage and not asset.temporal and estado_actual in ('ACTIVO', 'VENCIDO', 'PROXIMO_A_VENCER'):
-            qs_temp = Asset.objects.filter(
-                temporal=True,
-                activo=True,
-            ).prefetch_related('extintor_detail').order_by('code')
-            for t in qs_temp:
-                if hasattr(t, 'extintor_detail') and t.extintor_detail.estado_movimiento == 'NORMAL':
-                    temporales.append({'pk': t.pk, 'code': t.code, 'area': str(t.area)})
+            temporales = [
+                {'pk': t['pk'], 'code': t['code'], 'area': t['area']} for t in temporales_disponibles()
+            ]
 
         # Áreas y Tipos para el formulario de nuevo temporal
         areas_list = []
@@ -849,32 +956,167 @@ class RegistrarRetornoView(LoginRequiredMixin, View):
         })
 
 
+class MovimientosLoteView(LoginRequiredMixin, View):
+    """
+    POST /activos/movimientos/lote/ (JSON): salidas o retornos de varios extintores
+    en una sola petición (campañas de recarga). Ver gestion_activos/services.py.
+
+    Body:
+      { "accion": "salida", "fecha": "AAAA-MM-DD", "responsable": "...", "motivo": "...",
+        "observaciones": "...",
+        "items": [ {"original_pk": 1, "temporal_pk": 9},
+                   {"original_pk": 2, "temporal_nuevo": {"code", "area_id", "tipo_id", "capacidad", "fecha_recarga"}} ] }
+      { "accion": "retorno", "fecha": "...", "responsable": "...", "observaciones": "...",
+        "items": [ {"original_pk": 1}, ... ] }
+    Retorna un resultado por ítem, en el mismo orden recibido.
+    """
+
+    def post(self, request):
+        import json
+        from datetime import date as _date
+        from django.db import IntegrityError
+        from .services import MAX_MOVIMIENTOS_LOTE, registrar_retornos_lote, registrar_salidas_lote
+
+        if not _can_gestionar_movimientos(request.user):
+            return JsonResponse({'ok': False, 'error': 'No tienes permiso para registrar movimientos.'}, status=403)
+
+        try:
+            data = json.loads(request.body)
+        except (ValueError, TypeError):
+            return JsonResponse({'ok': False, 'error': 'JSON inválido.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'ok': False, 'error': 'JSON inválido.'}, status=400)
+
+        accion = data.get('accion')
+        items = data.get('items')
+        if accion not in ('salida', 'retorno'):
+            return JsonResponse({'ok': False, 'error': 'accion debe ser "salida" o "retorno".'}, status=400)
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'ok': False, 'error': 'Se requiere una lista de items.'}, status=400)
+        if len(items) > MAX_MOVIMIENTOS_LOTE:
+            return JsonResponse({'ok': False, 'error': f'Máximo {MAX_MOVIMIENTOS_LOTE} movimientos por petición.'}, status=400)
+
+        # Datos comunes del lote (mismas validaciones que el flujo individual)
+        fecha_str = str(data.get('fecha') or '').strip()
+        responsable = str(data.get('responsable') or '').strip()
+        motivo = str(data.get('motivo') or '').strip()
+        observaciones = str(data.get('observaciones') or '').strip()
+
+        errors = {}
+        fecha = None
+        if not fecha_str:
+            errors['fecha'] = 'La fecha es obligatoria.'
+        else:
+            try:
+                fecha = _date.fromisoformat(fecha_str)
+            except ValueError:
+                errors['fecha'] = 'Formato de fecha invalido.'
+        if not responsable:
+            errors['responsable'] = 'El responsable es obligatorio.'
+        if accion == 'salida' and not motivo:
+            errors['motivo'] = 'El motivo es obligatorio.'
+        if errors:
+            return JsonResponse({'ok': False, 'errors': errors}, status=422)
+
+        try:
+            if accion == 'salida':
+                resultados = registrar_salidas_lote(
+                    items, fecha=fecha, responsable=responsable, motivo=motivo,
+                    observaciones=observaciones, user=request.user,
+                )
+            else:
+                resultados = registrar_retornos_lote(
+                    items, fecha=fecha, responsable=responsable,
+                    observaciones=observaciones, user=request.user,
+                )
+        except IntegrityError:
+            # p. ej. otra sesión creó un activo con el mismo código de temporal; el lote se revirtió completo
+            return JsonResponse({'ok': False, 'error': 'Otra sesión modificó alguno de los activos al mismo tiempo; intente de nuevo.'}, status=409)
+
+        registrados = sum(1 for r in resultados if r['ok'])
+        return JsonResponse({
+            'ok': True,
+            'registrados': registrados,
+            'errores': len(resultados) - registrados,
+            'resultados': resultados,
+        })
+
+
 class TemporalesDisponiblesView(LoginRequiredMixin, View):
     """GET: Lista temporales disponibles (sin reemplazos activos) para seleccionar."""
 
     def get(self, request):
-        from .models import ExtintorDetail
-        qs = Asset.objects.filter(
-            temporal=True,
-            activo=True,
-        ).prefetch_related('extintor_detail').order_by('code')
-
-        data = []
-        for t in qs:
-            if hasattr(t, 'extintor_detail') and t.extintor_detail.estado_movimiento == 'NORMAL':
-                data.append({
-                    'pk': t.pk,
-                    'code': t.code,
-                    'area': str(t.area),
-                    'tipo': str(t.extintor_detail.tipo_agente) if t.extintor_detail.tipo_agente else '-',
-                    'capacidad': str(t.extintor_detail.capacidad_kg),
-                    'vence': t.extintor_detail.fecha_vencimiento.strftime('%d/%m/%Y'),
-                })
-
-        return JsonResponse({'temporales': data})
-
-
-class AssetInventoryReportView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
+        # Lista compartida en caché (gestion_activos/cache.py), invalidada por signals
+        return JsonResponse({'temporales': temporales_disponibles()})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REPORTE EJECUTIVO DE INVENTARIO
+# KPIs y gráficos con GROUP BY sobre el estado calculado en SQL (with_estado);
+# la tabla se pide paginada a AssetInventoryTableView y el CSV se transmite
+# fila a fila, sin cargar todos los activos en memoria.
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Cada tipo de activo tiene su propio vocabulario de estados
+REPORT_ESTADOS_OPTIMOS = (
+    'ACTIVO', 'OPERATIVO', 'AL_DIA', 'PROXIMA_REVISION', 'PROXIMO_A_VENCER', 'PROXIMO_MANTENIMIENTO',
+)
+REPORT_ESTADOS_VENCIDOS = ('VENCIDO', 'MANTENIMIENTO_VENCIDO', 'REVISION_VENCIDA')
+REPORT_ESTADOS_EXCLUIDOS = ('FUERA_DE_SERVICIO', 'REEMPLAZADO')
+REPORT_SIN_TIPO = 'Sin Tipo'
+REPORT_SIN_AREA = 'Sin Área'
+REPORT_TABLE_PAGE_SIZE = 50
+
+
+class AssetInventoryFilterMixin:
+    """Filtros del formulario del reporte (area, tipo, estado, temporal) sobre Asset.with_estado()."""
+
+    def get_report_queryset(self):
+        params = self.request.GET
+        qs = Asset.objects.with_estado()
+        if params.get('area'):
+            qs = qs.filter(area_id=params['area'])
+        if params.get('tipo'):
+            qs = qs.filter(asset_type_id=params['tipo'])
+        if params.get('temporal') == 'si':
+            qs = qs.filter(temporal=True)
+        elif params.get('temporal') == 'no':
+            qs = qs.filter(temporal=False)
+        if params.get('estado'):
+            qs = qs.filter(estado_sql=params['estado'])
+        return qs
+
+    def apply_selection(self, qs):
+        """
+        Filtro interactivo (clic en un KPI o en un gráfico): `grupo` + `valor`.
+        Usa los mismos criterios que los agregados para que el total de la tabla
+        coincida con el número mostrado en la tarjeta o el gráfico.
+        """
+        grupo = self.request.GET.get('grupo', '')
+        valor = self.request.GET.get('valor', '')
+        if grupo == 'estado' and valor:
+            return qs.filter(estado_sql=valor)
+        if grupo == 'optimo':
+            return qs.filter(estado_sql__in=REPORT_ESTADOS_OPTIMOS)
+        if grupo == 'vencidos':
+            return qs.filter(estado_sql__in=REPORT_ESTADOS_VENCIDOS)
+        if grupo == 'tipo' and valor:
+            return qs.filter(asset_type__isnull=True) if valor == REPORT_SIN_TIPO else qs.filter(asset_type__name=valor)
+        if grupo == 'area' and valor:
+            return qs.filter(area__isnull=True) if valor == REPORT_SIN_AREA else qs.filter(area__name=valor)
+        if grupo == 'temporal' and valor in ('si', 'no'):
+            return qs.filter(temporal=(valor == 'si'))
+        return qs
+
+
+def _chart_series(rows, key, empty_label):
+    return {
+        'labels': [row[key] or empty_label for row in rows],
+        'data': [row['n'] for row in rows],
+    }
+
+
+class AssetInventoryReportView(LoginRequiredMixin, RolePermissionRequiredMixin, AssetInventoryFilterMixin, View):
     """
     Reporte Ejecutivo de Inventario para Activos.
     Muestra KPIs, Graficos y Tabla filtrable.
@@ -883,128 +1125,131 @@ class AssetInventoryReportView(LoginRequiredMixin, RolePermissionRequiredMixin,
 
     def get(self, request, *args, **kwargs):
         import json
-        from .models import Asset, AssetType
         from inspections.models import Area
 
-        # Filtros
-        f_area = request.GET.get('area', '')
-        f_tipo = request.GET.get('tipo', '')
-        f_estado = request.GET.get('estado', '')
-        f_temporal = request.GET.get('temporal', '')
-
-        # Base queryset — incluye botiquin_detail para evitar N+1 queries
-        qs = Asset.objects.select_related('asset_type', 'area', 'plano').prefetch_related(
-            'extintor_detail', 'montacargas_detail', 'botiquin_detail'
-        ).all()
-
-        if f_area:
-            qs = qs.filter(area_id=f_area)
-        if f_tipo:
-            qs = qs.filter(asset_type_id=f_tipo)
-        if f_temporal == 'si':
-            qs = qs.filter(temporal=True)
-        elif f_temporal == 'no':
-            qs = qs.filter(temporal=False)
-        
-        # Evaluar estado dinámico
-        assets_list = list(qs)
-        if f_estado:
-            assets_list = [a for a in assets_list if a.estado_actual == f_estado]
-
-        # KPIs — cada tipo de activo tiene su propio vocabulario de estados
-        total_assets = len(assets_list)
-        # Activos/Operativos/Al día (estado óptimo por tipo)
-        total_activos = sum(1 for a in assets_list if a.estado_actual in (
-            'ACTIVO', 'OPERATIVO', 'AL_DIA', 'PROXIMA_REVISION', 'PROXIMO_A_VENCER', 'PROXIMO_MANTENIMIENTO'
-        ))
-        # Vencidos (estado crítico por tipo)
-        total_vencidos = sum(1 for a in assets_list if a.estado_actual in (
-            'VENCIDO', 'MANTENIMIENTO_VENCIDO', 'REVISION_VENCIDA'
-        ))
-        total_reemplazados = sum(1 for a in assets_list if a.estado_actual == 'REEMPLAZADO')
-        total_fueraservicio = sum(1 for a in assets_list if a.estado_actual == 'FUERA_DE_SERVICIO')
-        total_temporales = sum(1 for a in assets_list if a.temporal)
-
-        # Gráficos Data
-        status_counts = {}
-        type_counts = {}
-        area_counts = {}
-        temporal_counts = {'Fijos': 0, 'Temporales': 0}
-
-        for a in assets_list:
-            # Estado
-            st = a.estado_label
-            status_counts[st] = status_counts.get(st, 0) + 1
-            
-            # Tipo
-            tp = a.tipo_nombre or 'Sin Tipo'
-            type_counts[tp] = type_counts.get(tp, 0) + 1
-            
-            # Area
-            ar = a.area.name if getattr(a, 'area', None) else 'Sin Área'
-            area_counts[ar] = area_counts.get(ar, 0) + 1
-            
-            # Temporal vs Fijo
-            if a.temporal:
-                temporal_counts['Temporales'] += 1
-            else:
-                temporal_counts['Fijos'] += 1
-
-        # Generar JSONs para Chart.js
-        chart_status = {'labels': list(status_counts.keys()), 'data': list(status_counts.values())}
-        chart_type = {'labels': list(type_counts.keys()), 'data': list(type_counts.values())}
-        chart_area = {'labels': list(area_counts.keys()), 'data': list(area_counts.values())}
-        chart_temp = {'labels': list(temporal_counts.keys()), 'data': list(temporal_counts.values())}
-
-        # Compliance: activos fijos en estado óptimo vs total fijos elegibles
-        ESTADOS_OPTIMOS = ('ACTIVO', 'OPERATIVO', 'AL_DIA', 'PROXIMA_REVISION', 'PROXIMO_A_VENCER', 'PROXIMO_MANTENIMIENTO')
-        ESTADOS_EXCLUIDOS = ('FUERA_DE_SERVICIO', 'REEMPLAZADO')
-        activos_fijos_optimos = sum(1 for a in assets_list if not a.temporal and a.estado_actual in ESTADOS_OPTIMOS)
-        activos_fijos_base = sum(1 for a in assets_list if not a.temporal and a.estado_actual not in ESTADOS_EXCLUIDOS)
-        cumplimiento = (activos_fijos_optimos / activos_fijos_base * 100) if activos_fijos_base > 0 else 0
+        if request.GET.get('export') == 'excel':
+            return self.export_csv()
+
+        qs = self.get_report_queryset()
+
+        # KPIs y compliance: una sola consulta con agregados condicionales
+        kpis = qs.aggregate(
+            total=Count('pk'),
+            activos=Count('pk', filter=Q(estado_sql__in=REPORT_ESTADOS_OPTIMOS)),
+            vencidos=Count('pk', filter=Q(estado_sql__in=REPORT_ESTADOS_VENCIDOS)),
+            reemplazados=Count('pk', filter=Q(estado_sql='REEMPLAZADO')),
+            fueraservicio=Count('pk', filter=Q(estado_sql='FUERA_DE_SERVICIO')),
+            temporales=Count('pk', filter=Q(temporal=True)),
+            fijos_optimos=Count('pk', filter=Q(temporal=False, estado_sql__in=REPORT_ESTADOS_OPTIMOS)),
+            fijos_base=Count('pk', filter=Q(temporal=False) & ~Q(estado_sql__in=REPORT_ESTADOS_EXCLUIDOS)),
+        )
+        fijos_optimos = kpis.pop('fijos_optimos')
+        fijos_base = kpis.pop('fijos_base')
+        kpis['cumplimiento'] = round(fijos_optimos / fijos_base * 100, 1) if fijos_base else 0.0
+
+        # Series de los gráficos: GROUP BY en la BD
+        by_estado = list(qs.values('estado_sql').annotate(n=Count('pk')).order_by('-n', 'estado_sql'))
+        by_tipo = list(qs.values('asset_type__name').annotate(n=Count('pk')).order_by('-n', 'asset_type__name'))
+        by_area = list(qs.values('area__name').annotate(n=Count('pk')).order_by('-n', 'area__name'))
+
+        chart_status = {
+            'labels': [ESTADO_LABELS.get(row['estado_sql'], row['estado_sql']) for row in by_estado],
+            # Código de estado de cada etiqueta: el filtro interactivo lo envía a la tabla
+            'codes': [row['estado_sql'] for row in by_estado],
+            'data': [row['n'] for row in by_estado],
+        }
+        chart_temp = {
+            'labels': ['Fijos', 'Temporales'],
+            'data': [kpis['total'] - kpis['temporales'], kpis['temporales']],
+        }
 
         context = {
-            'assets': assets_list,
             'areas': Area.objects.filter(is_active=True).order_by('name'),
             'asset_types': AssetType.objects.all().order_by('name'),
-            'kpis': {
-                'total': total_assets,
-                'activos': total_activos,
-                'vencidos': total_vencidos,
-                'reemplazados': total_reemplazados,
-                'fueraservicio': total_fueraservicio,
-                'temporales': total_temporales,
-                'cumplimiento': round(float(cumplimiento), 1),
-            },
+            'kpis': kpis,
             'charts': {
                 'status': json.dumps(chart_status),
-                'type': json.dumps(chart_type),
-                'area': json.dumps(chart_area),
-                'temp': json.dumps(chart_temp)
-            }
+                'type': json.dumps(_chart_series(by_tipo, 'asset_type__name', REPORT_SIN_TIPO)),
+                'area': json.dumps(_chart_series(by_area, 'area__name', REPORT_SIN_AREA)),
+                'temp': json.dumps(chart_temp),
+            },
+            'table_page_size': REPORT_TABLE_PAGE_SIZE,
         }
-        
-        # Soporte Export PDF simple (vista a print mode) con JS, pero si quieren Excel
-        if request.GET.get('export') == 'excel':
-            import csv
-            from django.http import HttpResponse
-            response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-            response['Content-Disposition'] = 'attachment; filename="inventario_activos.csv"'
-            writer = csv.writer(response, delimiter=';')
-            writer.writerow(['Codigo', 'Tipo', 'Area', 'Estado', 'Temporal', 'Fecha Recarga', 'Prox Recarga'])
-            for a in assets_list:
-                dt = a.get_detail_data()
-                fr = dt.fecha_recarga.strftime('%Y-%m-%d') if dt and getattr(dt, 'fecha_recarga', None) else ''
-                fv = dt.fecha_vencimiento.strftime('%Y-%m-%d') if dt and getattr(dt, 'fecha_vencimiento', None) else ''
-                writer.writerow([
-                    a.code,
-                    a.tipo_nombre,
-                    a.area.name if getattr(a, 'area', None) else '',
-                    a.estado_label,
-                    'SI' if a.temporal else 'NO',
-                    fr,
-                    fv
+        return render(request, 'gestion_activos/asset_report.html', context)
+
+    def export_csv(self):
+        """CSV (Excel) transmitido por bloques con .iterator(): memoria constante con cualquier volumen."""
+        import csv
+        from django.http import StreamingHttpResponse
+
+        class _Echo:
+            def write(self, value):
+                return value
+
+        rows = self.get_report_queryset().values_list(
+            'code', 'asset_type__name', 'area__name', 'estado_sql', 'temporal',
+            'extintor_detail__fecha_recarga', 'extintor_detail__fecha_vencimiento',
+        ).order_by('code')
+        writer = csv.writer(_Echo(), delimiter=';')
+
+        def _stream():
+            # BOM una sola vez para que Excel reconozca UTF-8
+            yield '\ufeff'
+            yield writer.writerow(['Codigo', 'Tipo', 'Area', 'Estado', 'Temporal', 'Fecha Recarga', 'Prox Recarga'])
+            for code, tipo, area, estado, temporal, recarga, vence in rows.iterator(chunk_size=2000):
+                yield writer.writerow([
+                    code,
+                    tipo or '',
+                    area or '',
+                    ESTADO_LABELS.get(estado, estado),
+                    'SI' if temporal else 'NO',
+                    recarga.strftime('%Y-%m-%d') if recarga else '',
+                    vence.strftime('%Y-%m-%d') if vence else '',
                 ])
-            return response
 
-        return render(request, 'gestion_activos/asset_report.html', context)
+        response = StreamingHttpResponse(_stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="inventario_activos.csv"'
+        return response
+
+
+class AssetInventoryTableView(LoginRequiredMixin, RolePermissionRequiredMixin, AssetInventoryFilterMixin, View):
+    """
+    Tabla del reporte de inventario, paginada en la BD (JSON).
+    Recibe los filtros del reporte, el filtro interactivo (grupo/valor) y `page`.
+    """
+    permission_required = ('assets', 'view')
+
+    def get(self, request, *args, **kwargs):
+        from django.core.paginator import Paginator
+        from django.db.models.functions import Coalesce
+        from django.db.models import DateField
+
+        qs = self.apply_selection(self.get_report_queryset()).annotate(
+            proxima=Coalesce(
+                'extintor_detail__fecha_vencimiento',
+                'montacargas_detail__fecha_proximo_mantenimiento',
+                output_field=DateField(),
+            ),
+        ).values(
+            'pk', 'code', 'asset_type__name', 'area__name', 'estado_sql', 'temporal', 'proxima',
+        ).order_by('code')
+
+        page_obj = Paginator(qs, REPORT_TABLE_PAGE_SIZE).get_page(request.GET.get('page'))
+        rows = [{
+            'pk': row['pk'],
+            'code': row['code'],
+            'tipo': row['asset_type__name'] or '',
+            'area': row['area__name'] or '-',
+            'estado': row['estado_sql'],
+            'estado_label': ESTADO_LABELS.get(row['estado_sql'], row['estado_sql']),
+            'estado_css': ESTADO_CSS.get(row['estado_sql'], 'badge-secondary'),
+            'temporal': row['temporal'],
+            'proxima': row['proxima'].strftime('%d/%m/%Y') if row['proxima'] else '-',
+        } for row in page_obj]
+
+        return JsonResponse({
+            'rows': rows,
+            'total': page_obj.paginator.count,
+            'page': page_obj.number,
+            'num_pages': page_obj.paginator.num_pages,
+        })
@@ -27,6 +27,13 @@ configs = [
         'config_type': 'boolean',
         'category': 'general',
         'description': 'Activa o desactiva notificaciones internas del sistema.'
+    },
+    {
+        'key': 'perfilado_staff',
+        'value': 'false',
+        'config_type': 'boolean',
+        'category': 'general',
+        'description': 'Permite a usuarios staff perfilar requests con ?__profile=1 (los superusuarios siempre pueden).'
     }
 ]
 
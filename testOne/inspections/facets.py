@@ -0,0 +1,88 @@
+"""
+inspections/facets.py
+---------------------
+Valores de los filtros (años, áreas, tipos) de la matriz, el listado y los reportes.
+
+Todas las consultas DISTINCT se calculan juntas una sola vez y se guardan en
+caché bajo FACETS_CACHE_KEY. `inspections/signals.py` invalida la entrada
+cuando se crea, modifica o elimina un cronograma, una inspección o un área.
+
+Los modelos tienen Meta.ordering: sin `.order_by()` Django agrega la columna
+de orden al SELECT DISTINCT y las filas dejan de ser distintas.
+"""
+from django.core.cache import cache
+
+from .models import (
+    InspectionSchedule, ExtinguisherInspection, FirstAidInspection,
+    ProcessInspection, StorageInspection, ForkliftInspection,
+)
+
+FACETS_CACHE_KEY = 'inspections:facets'
+# Respaldo por si alguna escritura no dispara señales (bulk_create, update())
+FACETS_CACHE_TIMEOUT = 60 * 10
+
+FACET_INSPECTION_MODELS = [
+    ExtinguisherInspection, FirstAidInspection, ProcessInspection,
+    StorageInspection, ForkliftInspection,
+]
+
+
+def _compute_facets():
+    facets = {
+        'schedule_years': sorted({
+            y for y in InspectionSchedule.objects.values_list('scheduled_date__year', flat=True).order_by().distinct()
+            if y
+        }),
+        'schedule_areas': list(
+            InspectionSchedule.objects.values_list('area__id', 'area__name').order_by('area__name').distinct()
+        ),
+        'schedule_types': list(
+            InspectionSchedule.objects.values_list('module_key', 'inspection_type').order_by().distinct()
+        ),
+        'inspection_years': {},
+        'inspection_areas': {},
+    }
+    for model in FACET_INSPECTION_MODELS:
+        label = model._meta.label_lower
+        facets['inspection_years'][label] = sorted({
+            y for y in model.objects.values_list('inspection_date__year', flat=True).order_by().distinct() if y
+        })
+        facets['inspection_areas'][label] = list(
+            model.objects.values_list('area__id', 'area__name').order_by().distinct()
+        )
+    return facets
+
+
+def get_facets():
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        facets = _compute_facets()
+        cache.set(FACETS_CACHE_KEY, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_facets():
+    cache.delete(FACETS_CACHE_KEY)
+
+
+def schedule_years():
+    return sorted(set(get_facets()['schedule_years']))
+
+
+def schedule_areas():
+    """[(area_id, area_name)] ordenado por nombre."""
+    return list(get_facets()['schedule_areas'])
+
+
+def schedule_types(module_keys):
+    """Tipos de inspección distintos del cronograma para los módulos permitidos."""
+    return sorted({t for key, t in get_facets()['schedule_types'] if key in module_keys})
+
+
+def inspection_years(model):
+    return list(get_facets()['inspection_years'][model._meta.label_lower])
+
+
+def inspection_areas(model):
+    """[(area_id, area_name)] de las inspecciones registradas en el módulo."""
+    return list(get_facets()['inspection_areas'][model._meta.label_lower])
@@ -0,0 +1,309 @@
+import json
+import logging
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inspections.models import (
+    ExtinguisherInspection, FirstAidInspection, ProcessInspection, StorageInspection, ForkliftInspection,
+)
+from gestion_activos.models import Asset
+
+
+# Páginas principales: (nombre, url_name, fuente del pk o None, querystring)
+PAGES = [
+    ('inspection_list', 'inspection_list', None, ''),
+    ('extinguisher_list', 'extinguisher_list', None, ''),
+    ('extinguisher_detail', 'extinguisher_detail', ExtinguisherInspection, ''),
+    ('first_aid_list', 'first_aid_list', None, ''),
+    ('first_aid_detail', 'first_aid_detail', FirstAidInspection, ''),
+    ('process_list', 'process_list', None, ''),
+    ('process_detail', 'process_detail', ProcessInspection, ''),
+    ('storage_list', 'storage_list', None, ''),
+    ('storage_detail', 'storage_detail', StorageInspection, ''),
+    ('forklift_list', 'forklift_list', None, ''),
+    ('forklift_detail', 'forklift_detail', ForkliftInspection, ''),
+    ('inspection_reports', 'inspection_reports', None, ''),
+    ('inspection_reports_export', 'inspection_reports_export', None, ''),
+    ('dashboard', 'dashboard', None, ''),
+    ('dashboard_modal_schedule', 'dashboard_modal_data', None, '?table=schedule'),
+    ('dashboard_modal_executed', 'dashboard_modal_data', None, '?table=executed'),
+    ('asset_list', 'asset_list', None, ''),
+    ('asset_report', 'asset_report', None, ''),
+    ('planos_view', 'planos_view', None, ''),
+    ('asset_inspection_history', 'asset_inspection_history', Asset, ''),
+    ('asset_movimientos', 'asset_movimientos', Asset, ''),
+]
+
+# Fecha fija para que el dataset generado sea idéntico entre corridas
+DATASET_ANCHOR = '2026-06-30'
+DATASET_PREFIX = 'BM'
+
+# Cachés propias del benchmark: la caché 'default' es compartida por los workers
+# en producción y no debe vaciarse ni recibir datos de un dataset revertido
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-pages'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-pages-sessions'},
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de las páginas principales con el cliente de pruebas de Django.\n'
+        '  run:     mide latencia mediana, consultas y tamaño de cada página y guarda un JSON.\n'
+        '  growth:  genera datasets de distinta escala y falla si el número de consultas\n'
+        '           de alguna página crece con el volumen de datos (N+1).\n'
+        '  compare: compara dos JSON de `run` y reporta regresiones.\n'
+        'Los datasets y el usuario de prueba se crean dentro de una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        run = subparsers.add_parser('run', help='Mide todas las páginas y escribe un baseline JSON.')
+        run.add_argument('--scale', type=int, default=0,
+                         help='Genera un dataset temporal de esta escala (0 = usar los datos actuales).')
+        run.add_argument('--repeat', type=int, default=5, help='Repeticiones por página para la mediana.')
+        run.add_argument('--pages', default='', help='Nombres de página separados por coma (por defecto todas).')
+        run.add_argument('--output', default='', help='Archivo JSON de salida.')
+
+        growth = subparsers.add_parser('growth', help='Falla si las consultas crecen con la escala del dataset.')
+        growth.add_argument('--scales', default='1,3', help='Escalas a comparar, separadas por coma.')
+        growth.add_argument('--pages', default='', help='Nombres de página separados por coma (por defecto todas).')
+        growth.add_argument('--tolerance', type=int, default=0,
+                            help='Consultas adicionales permitidas entre escalas.')
+        growth.add_argument('--allow-growth', default='',
+                            help='Páginas excluidas de la verificación, separadas por coma.')
+        growth.add_argument('--output', default='', help='Archivo JSON con las consultas por escala.')
+
+        compare = subparsers.add_parser('compare', help='Compara dos resultados de `run`.')
+        compare.add_argument('baseline', help='JSON de referencia.')
+        compare.add_argument('current', help='JSON a evaluar.')
+        compare.add_argument('--threshold', type=float, default=20.0,
+                             help='Porcentaje de aumento de latencia considerado regresión.')
+        compare.add_argument('--fail-on-regression', action='store_true',
+                             help='Termina con error si hay regresiones.')
+
+    def handle(self, *args, **options):
+        getattr(self, f'_handle_{options["action"]}')(options)
+
+    # ------------------------------------------------------------------
+    # Subcomandos
+    # ------------------------------------------------------------------
+
+    def _handle_run(self, options):
+        pages = self._select_pages(options['pages'])
+        results = self._in_rollback(options['scale'], lambda: self._measure(pages, options['repeat']))
+        payload = {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'vendor': connection.vendor,
+                'scale': options['scale'],
+                'repeat': options['repeat'],
+            },
+            'pages': results,
+        }
+        self._print_results(results)
+        self._write(options['output'], payload)
+
+    def _handle_growth(self, options):
+        try:
+            scales = sorted({int(s) for s in options['scales'].split(',') if s.strip()})
+        except ValueError:
+            raise CommandError('--scales debe ser una lista de enteros separados por coma.')
+        if len(scales) < 2 or scales[0] < 1:
+            raise CommandError('--scales necesita al menos dos escalas mayores o iguales a 1.')
+        pages = self._select_pages(options['pages'])
+        allowed = {p.strip() for p in options['allow_growth'].split(',') if p.strip()}
+
+        by_scale = {}
+        for scale in scales:
+            self.stdout.write(f'\nEscala {scale}...')
+            by_scale[scale] = self._in_rollback(scale, lambda: self._measure(pages, repeat=1))
+
+        failures = []
+        self.stdout.write('\n' + f'{"Página":<30}' + ''.join(f'{f"x{s}":>8}' for s in scales))
+        for name, *_ in pages:
+            counts = [by_scale[s].get(name, {}).get('queries') for s in scales]
+            grew = (
+                None not in counts and name not in allowed
+                and max(counts) > counts[0] + options['tolerance']
+            )
+            line = f'{name:<30}' + ''.join(f'{"-" if c is None else c:>8}' for c in counts)
+            if grew:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{line}   crece con los datos'))
+            else:
+                self.stdout.write(line)
+
+        self._write(options['output'], {'scales': scales, 'pages': {
+            name: {str(s): by_scale[s].get(name, {}).get('queries') for s in scales} for name, *_ in pages
+        }})
+        if failures:
+            raise CommandError(f'{len(failures)} página(s) con consultas que crecen con el volumen: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('\nNinguna página aumenta sus consultas con el volumen de datos.'))
+
+    def _handle_compare(self, options):
+        baseline = self._read(options['baseline'])['pages']
+        current = self._read(options['current'])['pages']
+        threshold = options['threshold']
+        regressions = []
+
+        self.stdout.write(f'{"Página":<30}{"ms base":>10}{"ms actual":>11}{"Δ%":>8}{"SQL base":>10}{"SQL actual":>12}')
+        for name in sorted(set(baseline) | set(current)):
+            old, new = baseline.get(name), current.get(name)
+            if not old or not new:
+                self.stdout.write(f'{name:<30}  (solo en {"actual" if new else "base"})')
+                continue
+            delta = ((new['median_ms'] - old['median_ms']) / old['median_ms'] * 100) if old['median_ms'] else 0.0
+            line = (f'{name:<30}{old["median_ms"]:>10.1f}{new["median_ms"]:>11.1f}{delta:>7.0f}%'
+                    f'{old["queries"]:>10}{new["queries"]:>12}')
+            if delta > threshold or new['queries'] > old['queries']:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            elif delta < -threshold or new['queries'] < old['queries']:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            message = f'{len(regressions)} regresión(es): {", ".join(regressions)}'
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(f'\n{message}'))
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+
+    def _select_pages(self, names):
+        if not names:
+            return PAGES
+        wanted = {n.strip() for n in names.split(',') if n.strip()}
+        unknown = wanted - {name for name, *_ in PAGES}
+        if unknown:
+            raise CommandError(f'Páginas desconocidas: {", ".join(sorted(unknown))}')
+        return [page for page in PAGES if page[0] in wanted]
+
+    def _in_rollback(self, scale, measure):
+        """Genera el dataset (si scale > 0), mide y revierte todo al terminar."""
+        results = None
+        # Cachés en memoria y vacías en cada corrida (override_settings reinicia los backends)
+        with override_settings(CACHES=BENCHMARK_CACHES, SESSION_CACHE_ALIAS='sessions'):
+            try:
+                with transaction.atomic():
+                    if scale:
+                        call_command('generate_dataset', scale=scale, anchor=DATASET_ANCHOR,
+                                     prefix=DATASET_PREFIX, stdout=StringIO())
+                    cache.clear()
+                    results = measure()
+                    raise _Rollback()
+            except _Rollback:
+                pass
+            cache.clear()
+        return results
+
+    def _measure(self, pages, repeat):
+        User = get_user_model()
+        user = User.objects.create_superuser(
+            username='__benchmark__', email='benchmark@localhost', password=None,
+        )
+        # Un error en una página se registra como status 500 sin detener el benchmark
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        # Los 500 se reportan en la tabla; se omite el traceback del logger de requests
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            return self._measure_pages(client, pages, repeat)
+        finally:
+            request_logger.setLevel(previous_level)
+
+    def _measure_pages(self, client, pages, repeat):
+        results = {}
+        # Las métricas por request no deben mezclarse con el log de producción
+        with override_settings(PERF_METRICS_ENABLED=False):
+            for name, url_name, source, query in pages:
+                url = self._resolve(url_name, source)
+                if url is None:
+                    self.stdout.write(self.style.WARNING(f'  [--] {name}: sin datos para construir la URL'))
+                    continue
+                url += query
+                client.get(url)  # calentamiento (cachés de facetas, sidebar, plantillas)
+                timings = []
+                queries = None
+                response = None
+                for _ in range(max(repeat, 1)):
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        response = client.get(url)
+                        if response.streaming:
+                            size = sum(len(chunk) for chunk in response.streaming_content)
+                        else:
+                            size = len(response.content)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    if queries is None:
+                        queries = len(captured)
+                results[name] = {
+                    'url': url,
+                    'status': response.status_code,
+                    'queries': queries,
+                    'median_ms': round(statistics.median(timings), 1),
+                    'min_ms': round(min(timings), 1),
+                    'size': size,
+                }
+                style = self.style.ERROR if response.status_code >= 400 else str
+                self.stdout.write(style(f'  {name}: {response.status_code}, {queries} consultas, {results[name]["median_ms"]} ms'))
+        return results
+
+    def _resolve(self, url_name, source):
+        if source is None:
+            return reverse(url_name)
+        if source is Asset:
+            # Extintor con movimientos: ejercita historial y movimientos con datos reales
+            pk = (Asset.objects.filter(movimientos__isnull=False, temporal=False).order_by('pk')
+                  .values_list('pk', flat=True).first()
+                  or Asset.objects.order_by('pk').values_list('pk', flat=True).first())
+        else:
+            # Inspección raíz con seguimientos si existe (la más costosa de renderizar)
+            pk = (source.objects.filter(parent_inspection__isnull=True, follow_ups__isnull=False)
+                  .order_by('pk').values_list('pk', flat=True).first()
+                  or source.objects.order_by('pk').values_list('pk', flat=True).first())
+        return reverse(url_name, args=[pk]) if pk else None
+
+    # ------------------------------------------------------------------
+    # Salida
+    # ------------------------------------------------------------------
+
+    def _print_results(self, results):
+        self.stdout.write(f'\n{"Página":<30}{"Estado":>7}{"SQL":>6}{"Mediana ms":>12}{"KB":>8}')
+        for name, r in results.items():
+            self.stdout.write(f'{name:<30}{r["status"]:>7}{r["queries"]:>6}{r["median_ms"]:>12.1f}{r["size"] // 1024:>8}')
+
+    def _write(self, path, payload):
+        if not path:
+            return
+        Path(path).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'\nResultados guardados en {path}'))
+
+    def _read(self, path):
+        try:
+            return json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'No se pudo leer {path}: {exc}')
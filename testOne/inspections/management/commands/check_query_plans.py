@@ -0,0 +1,243 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from inspections.models import (
+    Area, InspectionSchedule, InspectionEvidence,
+    ExtinguisherInspection, ExtinguisherItem, FirstAidInspection,
+    ProcessInspection, StorageInspection, ForkliftInspection,
+)
+from notifications.models import Notification
+from gestion_activos.models import Asset, AssetType, MovimientoActivo
+from planos.models import UbicacionActivo
+
+
+INSPECTION_MODELS = [
+    ExtinguisherInspection, FirstAidInspection, ProcessInspection,
+    StorageInspection, ForkliftInspection,
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas críticas (cronograma, inspecciones, notificaciones,\n'
+        'evidencias, movimientos, temporales y planos) y verifica que usen los índices compuestos.\n'
+        'Con --seed N inserta un dataset temporal (distribuciones realistas) que se revierte al terminar.\n'
+        'Termina con error si alguna consulta no usa el índice esperado.\n'
+        'inspections/tests.py lo ejecuta con --seed sobre PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Número de filas por tabla a insertar temporalmente antes del EXPLAIN.',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Imprime el plan completo de cada consulta.',
+        )
+
+    def handle(self, *args, **options):
+        self.verbose_plans = options['verbose_plans']
+        self.failures = []
+
+        try:
+            with transaction.atomic():
+                refs = self._seed(options['seed']) if options['seed'] else self._sample_refs()
+                if connection.vendor in ('postgresql', 'sqlite'):
+                    # Estadísticas actualizadas: el planner elige con los datos reales, sin forzar índices
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+                for label, queryset, expected in self._checks(refs):
+                    self._check(label, queryset, expected)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if self.failures:
+            raise CommandError(f'{len(self.failures)} consulta(s) sin el índice esperado: {", ".join(self.failures)}')
+        self.stdout.write(self.style.SUCCESS('\nTodas las consultas usan los índices esperados.'))
+
+    def _checks(self, refs):
+        today = date.today()
+        area_id = refs['area_id']
+        checks = [
+            ('Cronograma por tipo y fecha',
+             InspectionSchedule.objects.filter(inspection_type='Inspección de Montacargas', scheduled_date__gte=today),
+             ['schedule_type_date_idx']),
+            ('Cronograma por área y fecha',
+             InspectionSchedule.objects.filter(area_id=area_id, scheduled_date__gte=today),
+             ['schedule_area_date_idx']),
+            ('Cronograma por estado',
+             InspectionSchedule.objects.filter(status='Pendiente'),
+             ['schedule_status_idx']),
+        ]
+        for model in INSPECTION_MODELS:
+            name = model._meta.model_name
+            checks += [
+                (f'{name} por fecha y padre',
+                 model.objects.filter(inspection_date=today, parent_inspection_id=refs['parent_id']),
+                 [f'{name}_dps_idx']),
+                (f'{name} por área y fecha',
+                 model.objects.filter(area_id=area_id, inspection_date__gte=today),
+                 [f'{name}_ad_idx']),
+            ]
+            if connection.vendor == 'postgresql':
+                # SQLite prefiere el índice del FK para IS NULL; el índice parcial se valida en PostgreSQL
+                checks.append((
+                    f'{name} raíz más recientes',
+                    model.objects.filter(parent_inspection__isnull=True).order_by('-inspection_date')[:20],
+                    [f'{name}_rt_idx'],
+                ))
+        if connection.vendor == 'postgresql':
+            # SQLite elige el índice del FK user_id (sus estadísticas no distinguen is_read)
+            checks.append((
+                'Notificaciones no leídas',
+                Notification.objects.filter(user_id=refs['user_id'], is_read=False).order_by('-created_at'),
+                ['notif_user_read_created_idx'],
+            ))
+        checks += [
+            ('Evidencias de un objeto',
+             InspectionEvidence.objects.filter(content_type_id=refs['item_ct_id'], object_id=refs['item_id']),
+             ['evidence_target_idx']),
+            ('Movimientos de un activo',
+             MovimientoActivo.objects.filter(activo_id=refs['asset_id']).order_by('-created_at'),
+             ['movimiento_activo_created_idx']),
+            ('Ubicación activa de un activo en un plano',
+             UbicacionActivo.objects.filter(plano='PL2P1', estado='Activo', activo_id=refs['asset_id']),
+             ['ubicacion_plano_estado_idx', 'ubicacion_activa_unica']),
+            ('Marcadores de un plano (solo filas activas)',
+             UbicacionActivo.objects.filter(plano='PL2P1', estado='Activo'),
+             ['ubicacion_activa_unica', 'ubicacion_plano_estado_idx']),
+            ('Temporales disponibles para reemplazo',
+             Asset.objects.filter(temporal=True, activo=True).order_by('code'),
+             ['asset_temporal_disponible_idx']),
+        ]
+        if connection.vendor == 'postgresql':
+            checks.append((
+                'Búsqueda de tipo (icontains)',
+                InspectionSchedule.objects.filter(inspection_type__icontains='montacargas'),
+                ['schedule_type_trgm_idx'],
+            ))
+        return checks
+
+    def _check(self, label, queryset, expected):
+        plan = queryset.explain()
+        used = [name for name in expected if name in plan]
+        if used:
+            self.stdout.write(self.style.SUCCESS(f'  [OK] {label}: {used[0]}'))
+        else:
+            self.failures.append(label)
+            self.stdout.write(self.style.ERROR(f'  [XX] {label}: esperado {" | ".join(expected)}'))
+        if self.verbose_plans or not used:
+            for line in plan.splitlines():
+                self.stdout.write(f'       {line}')
+
+    def _sample_refs(self):
+        """Sin --seed: usa ids existentes (o 0) solo para armar las consultas."""
+        return {
+            'area_id': Area.objects.values_list('pk', flat=True).first() or 0,
+            'user_id': get_user_model().objects.values_list('pk', flat=True).first() or 0,
+            'asset_id': Asset.objects.values_list('pk', flat=True).first() or 0,
+            'parent_id': 0,
+            'item_id': 0,
+            'item_ct_id': ContentType.objects.get_for_model(ExtinguisherItem).pk,
+        }
+
+    def _seed(self, n):
+        """
+        Dataset con proporciones parecidas a producción, para que los filtros
+        sean selectivos como en la realidad: cronograma de tres años con pocos
+        pendientes y montacargas como tipo minoritario, notificaciones repartidas
+        entre usuarios y casi todas leídas, una ubicación activa por cada diez
+        de historial.
+        """
+        self.stdout.write(f'Insertando dataset temporal ({n} filas por tabla)...')
+        today = date.today()
+        User = get_user_model()
+        users = User.objects.bulk_create([
+            User(username=f'__query_plan_check_{i}__', email=f'query_plan_check_{i}@localhost') for i in range(50)
+        ])
+        user = users[0]
+        areas = Area.objects.bulk_create([Area(name=f'__qp_area_{i}') for i in range(max(n // 50, 2))])
+        asset_type = AssetType.objects.create(name='__qp_type__')
+        assets = Asset.objects.bulk_create([
+            Asset(code=f'__qp_{i}', asset_type=asset_type, area=areas[i % len(areas)], temporal=(i % 50 == 0))
+            for i in range(n)
+        ])
+
+        modulos = [
+            ('extinguisher', 'Inspección de Extintores'),
+            ('first_aid', 'Inspección de Botiquines'),
+            ('process', 'Inspección de Procesos'),
+        ]
+        schedules = []
+        for i in range(n):
+            module_key, inspection_type = (
+                ('forklift', 'Inspección de Montacargas') if i % 40 == 0 else modulos[i % 3]
+            )
+            scheduled_date = today - timedelta(days=730) + timedelta(days=i % 1095)
+            schedules.append(InspectionSchedule(
+                year=scheduled_date.year,
+                module_key=module_key,
+                area=areas[i % len(areas)],
+                inspection_type=inspection_type,
+                frequency='Mensual',
+                scheduled_date=scheduled_date,
+                status='Pendiente' if i % 20 == 0 else ['Programada', 'Realizada'][i % 2],
+            ))
+        InspectionSchedule.objects.bulk_create(schedules, batch_size=1000)
+
+        parent_id = 0
+        for model in INSPECTION_MODELS:
+            rows = model.objects.bulk_create([
+                model(area=areas[i % len(areas)], inspection_date=today - timedelta(days=i % 365))
+                for i in range(n)
+            ], batch_size=1000)
+            model.objects.bulk_create([
+                model(area=rows[i].area, inspection_date=today, parent_inspection=rows[i])
+                for i in range(0, n, 10)
+            ], batch_size=1000)
+            if model is ExtinguisherInspection:
+                parent_id = rows[0].pk
+
+        items = ExtinguisherItem.objects.bulk_create([
+            ExtinguisherItem(inspection_id=parent_id) for _ in range(n)
+        ], batch_size=1000)
+        item_ct = ContentType.objects.get_for_model(ExtinguisherItem)
+        InspectionEvidence.objects.bulk_create([
+            InspectionEvidence(content_type=item_ct, object_id=item.pk, image='inspections/evidence/qp.png')
+            for item in items
+        ], batch_size=1000)
+        Notification.objects.bulk_create([
+            Notification(user=users[i % len(users)], title='qp', message='qp', is_read=bool(i % 10))
+            for i in range(n)
+        ], batch_size=1000)
+        MovimientoActivo.objects.bulk_create([
+            MovimientoActivo(activo=assets[i % len(assets)], tipo_movimiento='salida', fecha=today, responsable='qp')
+            for i in range(n)
+        ], batch_size=1000)
+        UbicacionActivo.objects.bulk_create([
+            UbicacionActivo(activo=assets[i % len(assets)], plano=f'PL{i % 5}P1', posicion_x=i, posicion_y=i,
+                            estado='Activo' if i % 10 == 0 else 'Inactivo')
+            for i in range(n)
+        ], batch_size=1000)
+
+        return {
+            'area_id': areas[0].pk,
+            'user_id': user.pk,
+            'asset_id': assets[0].pk,
+            'parent_id': parent_id,
+            'item_id': items[0].pk,
+            'item_ct_id': item_ct.pk,
+        }
@@ -0,0 +1,512 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inspections.facets import invalidate_facets
+from inspections.models import (
+    Area, InspectionSchedule, InspectionEvidence, resolve_module_key,
+    ExtinguisherInspection, ExtinguisherItem, InspectionSignature,
+    FirstAidInspection, FirstAidItem, FirstAidSignature,
+    ProcessInspection, ProcessCheckItem, ProcessSignature,
+    StorageInspection, StorageCheckItem, StorageSignature,
+    ForkliftInspection, ForkliftCheckItem, ForkliftSignature,
+)
+from inspections.views import ProcessCreateView, StorageCreateView, ForkliftCreateView
+from gestion_activos.models import (
+    Asset, AssetType, TipoExtintor, ExtintorDetail, MontacargasDetail, BotiquinDetail, MovimientoActivo,
+)
+from planos.models import UbicacionActivo
+from system_config.models import Plano
+
+
+# PNG 1x1 transparente: todas las evidencias generadas apuntan al mismo archivo
+PLACEHOLDER_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+PLACEHOLDER_NAME = 'inspections/evidence/dataset/placeholder.png'
+SIGNATURE_SNAPSHOT = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGNgAAIAAAUAAeIhvDMAAAAASUVORK5CYII='
+
+FIRST_AID_ELEMENTS = [
+    'Gasas estériles', 'Vendas elásticas', 'Esparadrapo', 'Guantes de látex', 'Alcohol antiséptico',
+    'Solución salina', 'Tijeras', 'Curitas', 'Inmovilizadores', 'Termómetro',
+]
+PROCESS_NAMES = ['Extrusión', 'Inyección', 'Soplado', 'Empaque', 'Mantenimiento', 'Bodega de materia prima']
+ROLES = ['Brigadista', 'Equipo SST', 'Copasst']
+FREQUENCIES = ['Mensual', 'Bimestral', 'Trimestral', 'Cuatrimestral', 'Semestral', 'Anual']
+
+# (module_key, tipo de cronograma, modelo, ítem, firma)
+MODULES = [
+    ('extinguisher', 'Extintores', ExtinguisherInspection, ExtinguisherItem, InspectionSignature),
+    ('first_aid', 'Botiquines', FirstAidInspection, FirstAidItem, FirstAidSignature),
+    ('process', 'Instalaciones de Proceso', ProcessInspection, ProcessCheckItem, ProcessSignature),
+    ('storage', 'Almacenamiento', StorageInspection, StorageCheckItem, StorageSignature),
+    ('forklift', 'Montacargas', ForkliftInspection, ForkliftCheckItem, ForkliftSignature),
+]
+CHECKLISTS = {
+    'process': ProcessCreateView.initial_items,
+    'storage': StorageCreateView.initial_items,
+    'forklift': ForkliftCreateView.initial_items,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un dataset sintético y determinista para pruebas de carga y benchmarks.\n'
+        'Con --scale 1 crea ~1.000 inspecciones raíz (200 por módulo) con sus ítems, seguimientos,\n'
+        'firmas y evidencias, además de áreas, activos con detalle, cronogramas de 3 años,\n'
+        'movimientos y ubicaciones en planos. --scale 50 ≈ 50.000 inspecciones.\n'
+        'Todos los registros llevan el prefijo --prefix; --flush elimina los de una corrida anterior.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Factor de volumen (1 ≈ 1.000 inspecciones raíz).')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio.')
+        parser.add_argument('--prefix', default='DS', help='Prefijo de códigos, áreas y usuarios generados.')
+        parser.add_argument('--anchor', help='Fecha de referencia YYYY-MM-DD (por defecto hoy).')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Filas por bulk_create.')
+        parser.add_argument('--flush', action='store_true', help='Elimina primero los datos generados con el mismo prefijo.')
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale debe ser mayor o igual a 1.')
+        self.scale = options['scale']
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+        try:
+            self.anchor = date.fromisoformat(options['anchor']) if options['anchor'] else date.today()
+        except ValueError:
+            raise CommandError('--anchor debe tener el formato YYYY-MM-DD.')
+
+        if options['flush']:
+            self._flush()
+        elif Area.objects.filter(name__startswith=f'{self.prefix} ').exists():
+            raise CommandError(f'Ya existen datos con el prefijo "{self.prefix}". Use --flush o otro --prefix.')
+
+        with transaction.atomic():
+            users = self._users()
+            areas = self.areas = self._areas()
+            assets = self._assets(areas)
+            self._movimientos(assets['extintor'], areas)
+            self._ubicaciones(assets, users)
+            schedules = self._schedules(areas)
+            self._inspections(schedules, assets, users)
+
+        invalidate_facets()
+        self.stdout.write(self.style.SUCCESS('Dataset generado.'))
+
+    # ------------------------------------------------------------------
+    # Utilidades
+    # ------------------------------------------------------------------
+
+    def _bulk(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def _log(self, label, count):
+        self.stdout.write(f'  {label}: {count}')
+
+    def _placeholder_image(self):
+        if not default_storage.exists(PLACEHOLDER_NAME):
+            return default_storage.save(PLACEHOLDER_NAME, ContentFile(PLACEHOLDER_PNG))
+        return PLACEHOLDER_NAME
+
+    # ------------------------------------------------------------------
+    # Catálogos
+    # ------------------------------------------------------------------
+
+    def _users(self):
+        User = get_user_model()
+        password = make_password(None)
+        users = self._bulk(User, [
+            User(
+                username=f'{self.prefix.lower()}_inspector_{i:03d}',
+                email=f'{self.prefix.lower()}_inspector_{i:03d}@dataset.local',
+                first_name='Inspector',
+                last_name=f'{self.prefix} {i:03d}',
+                password=password,
+            )
+            for i in range(5 + self.scale)
+        ])
+        self._log('Usuarios', len(users))
+        return users
+
+    def _areas(self):
+        areas = self._bulk(Area, [
+            Area(name=f'{self.prefix} Área {i:03d}') for i in range(10 + 2 * self.scale)
+        ])
+        self._log('Áreas', len(areas))
+        return areas
+
+    def _asset_type(self, name, pattern):
+        asset_type = AssetType.objects.filter(name__icontains=pattern).first()
+        return asset_type or AssetType.objects.create(name=name)
+
+    def _assets(self, areas):
+        rng = self.rng
+        planos = list(Plano.objects.filter(activo=True).order_by('nombre')[:4])
+        if not planos:
+            planos = [Plano.objects.get_or_create(nombre=f'PL{i}P1')[0] for i in (1, 2)]
+        agentes = [TipoExtintor.objects.get_or_create(nombre=n)[0] for n in ('PQS', 'CO2', 'Solkaflam')]
+        types = {
+            'extintor': (self._asset_type('Extintor', 'extintor'), 'EXT', 60),
+            'montacargas': (self._asset_type('Montacargas', 'montacarga'), 'MNT', 4),
+            'botiquin': (self._asset_type('Botiquín', 'botiqu'), 'BOT', 20),
+        }
+
+        assets = {}
+        for kind, (asset_type, code, per_scale) in types.items():
+            assets[kind] = self._bulk(Asset, [
+                Asset(
+                    code=f'{self.prefix}-{code}-{i:05d}',
+                    asset_type=asset_type,
+                    area=areas[i % len(areas)],
+                    plano=planos[i % len(planos)],
+                    fecha_adquisicion=self.anchor - timedelta(days=rng.randint(30, 3650)),
+                )
+                for i in range(per_scale * self.scale)
+            ])
+            self._log(f'Activos {kind}', len(assets[kind]))
+
+        details = []
+        for asset in assets['extintor']:
+            recarga = self.anchor - timedelta(days=rng.randint(0, 420))
+            details.append(ExtintorDetail(
+                asset=asset,
+                tipo_agente=rng.choice(agentes),
+                capacidad_kg=Decimal(rng.choice(['5.00', '10.00', '20.00'])),
+                fecha_recarga=recarga,
+                fecha_vencimiento=recarga + timedelta(days=365),
+            ))
+        self._bulk(ExtintorDetail, details)
+
+        details = []
+        for i, asset in enumerate(assets['montacargas']):
+            mantenimiento = self.anchor - timedelta(days=rng.randint(0, 200))
+            details.append(MontacargasDetail(
+                asset=asset,
+                marca=rng.choice(['Toyota', 'Yale', 'Hyster']),
+                modelo=f'M-{rng.randint(100, 999)}',
+                numero_serie=f'{self.prefix}SN{i:06d}',
+                tipo_montacargas=rng.choice(['Combustible', 'Electrico']),
+                capacidad_carga_kg=Decimal(rng.choice(['1500.00', '2500.00', '3000.00'])),
+                fecha_ultimo_mantenimiento=mantenimiento,
+                fecha_proximo_mantenimiento=mantenimiento + timedelta(days=180),
+            ))
+        self._bulk(MontacargasDetail, details)
+
+        details = []
+        for asset in assets['botiquin']:
+            revision = self.anchor - timedelta(days=rng.randint(0, 400))
+            # bulk_create no ejecuta save(): la próxima revisión se calcula aquí
+            details.append(BotiquinDetail(
+                asset=asset,
+                fecha_ultima_revision=revision,
+                fecha_proxima_revision=revision + timedelta(days=365),
+            ))
+        self._bulk(BotiquinDetail, details)
+        return assets
+
+    def _movimientos(self, extintores, areas):
+        """Ciclos salida/reemplazo (y a veces retorno/baja) sobre ~10% de los extintores."""
+        rng = self.rng
+        originals = rng.sample(extintores, max(1, len(extintores) // 10))
+        temporales = self._bulk(Asset, [
+            Asset(
+                code=f'{self.prefix}-TMP-{i:05d}',
+                asset_type=original.asset_type,
+                area=original.area,
+                temporal=True,
+                observaciones=f'Temporal para reemplazo de {original.code}',
+            )
+            for i, original in enumerate(originals)
+        ])
+
+        details = []
+        movimientos = []
+        reemplazados = []
+        for original, temporal in zip(originals, temporales):
+            salida = self.anchor - timedelta(days=rng.randint(5, 300))
+            returned = rng.random() < 0.5
+            details.append(ExtintorDetail(
+                asset=temporal,
+                capacidad_kg=Decimal('10.00'),
+                fecha_recarga=salida,
+                fecha_vencimiento=salida + timedelta(days=365),
+                estado_movimiento='FUERA_DE_SERVICIO' if returned else 'NORMAL',
+            ))
+            movimientos += [
+                MovimientoActivo(activo=original, tipo_movimiento='salida', activo_relacionado=temporal,
+                                 fecha=salida, responsable='Equipo SST', motivo='Recarga'),
+                MovimientoActivo(activo=temporal, tipo_movimiento='reemplazo', activo_relacionado=original,
+                                 fecha=salida, responsable='Equipo SST', motivo='Recarga',
+                                 observaciones=f'Temporal asignado como reemplazo de: {original.code}'),
+            ]
+            if returned:
+                retorno = salida + timedelta(days=rng.randint(3, 30))
+                movimientos += [
+                    MovimientoActivo(activo=original, tipo_movimiento='retorno', activo_relacionado=temporal,
+                                     fecha=retorno, responsable='Equipo SST'),
+                    MovimientoActivo(activo=temporal, tipo_movimiento='baja_temporal', activo_relacionado=original,
+                                     fecha=retorno, responsable='Equipo SST'),
+                ]
+            else:
+                reemplazados.append(original.pk)
+        self._bulk(ExtintorDetail, details)
+        self._bulk(MovimientoActivo, movimientos)
+        ExtintorDetail.objects.filter(asset_id__in=reemplazados).update(estado_movimiento='REEMPLAZADO')
+        self._log('Movimientos', len(movimientos))
+
+    def _ubicaciones(self, assets, users):
+        """Ubicación vigente por activo y, para algunos, historial de posiciones anteriores."""
+        rng = self.rng
+        rows = []
+        for kind_assets in assets.values():
+            for asset in kind_assets:
+                for _ in range(rng.choice([0, 0, 1, 2])):
+                    rows.append(self._ubicacion(asset, users, 'Inactivo'))
+                rows.append(self._ubicacion(asset, users, 'Activo'))
+        self._bulk(UbicacionActivo, rows)
+        self._log('Ubicaciones en planos', len(rows))
+
+    def _ubicacion(self, asset, users, estado):
+        return UbicacionActivo(
+            activo=asset,
+            plano=asset.plano.nombre,
+            posicion_x=Decimal(self.rng.randint(0, 200000)) / 100,
+            posicion_y=Decimal(self.rng.randint(0, 120000)) / 100,
+            estado=estado,
+            usuario=self.rng.choice(users),
+        )
+
+    # ------------------------------------------------------------------
+    # Cronograma e inspecciones
+    # ------------------------------------------------------------------
+
+    def _schedules(self, areas):
+        """~250 cronogramas por módulo y escala repartidos en 3 años (dos pasados y el actual)."""
+        rng = self.rng
+        first = date(self.anchor.year - 2, 1, 1)
+        span = (date(self.anchor.year, 12, 31) - first).days
+        rows = []
+        for module_key, inspection_type, *_ in MODULES:
+            for _ in range(250 * self.scale):
+                scheduled = first + timedelta(days=rng.randint(0, span))
+                rows.append(InspectionSchedule(
+                    year=scheduled.year,
+                    area=rng.choice(areas),
+                    inspection_type=inspection_type,
+                    # bulk_create no ejecuta save(): module_key se asigna explícitamente
+                    module_key=resolve_module_key(inspection_type),
+                    frequency=rng.choice(FREQUENCIES),
+                    scheduled_date=scheduled,
+                    status='Programada' if scheduled > self.anchor else rng.choice(['Realizada'] * 4 + ['Pendiente']),
+                ))
+        schedules = self._bulk(InspectionSchedule, rows)
+        self._log('Cronogramas', len(schedules))
+        return schedules
+
+    def _inspections(self, schedules, assets, users):
+        image = self._placeholder_image()
+        for module_key, _, Model, ItemModel, SignatureModel in MODULES:
+            done = [s for s in schedules if s.module_key == module_key and s.status == 'Realizada']
+            roots_count = 200 * self.scale
+            rows = []
+            for i in range(roots_count):
+                schedule = done[i] if i < len(done) else None
+                inspection_date = schedule.scheduled_date if schedule else self.anchor - timedelta(days=self.rng.randint(0, 700))
+                rows.append(self._header(module_key, Model, assets, users, schedule, inspection_date))
+
+            plans = [self._chain_plan() for _ in rows]
+            # Cada nivel se inserta después del anterior para conocer el pk del padre
+            level = [(row, plan[0], plan[1:]) for row, plan in zip(rows, plans)]
+            nodes = []
+            depth = 0
+            while level:
+                for row, status, _ in level:
+                    row.status = status
+                    row.general_status = 'No Cumple' if status in ('Seguimiento en proceso', 'Cerrada con seguimientos') else 'Cumple'
+                created = self._bulk(Model, [row for row, _, _ in level])
+                next_level = []
+                for obj, (_, _, rest) in zip(created, level):
+                    nodes.append((obj, bool(rest)))
+                    if rest:
+                        child = Model(**{
+                            field: getattr(obj, field)
+                            for field in self._follow_up_fields(Model)
+                        })
+                        child.parent_inspection = obj
+                        child.inspection_date = obj.inspection_date + timedelta(days=15)
+                        next_level.append((child, rest[0], rest[1:]))
+                level = next_level
+                depth += 1
+            self._log(f'Inspecciones {module_key} (niveles: {depth})', len(nodes))
+
+            self._items(module_key, ItemModel, nodes, assets, users, image)
+            self._signatures(SignatureModel, nodes, users)
+
+    def _follow_up_fields(self, Model):
+        fields = ['area', 'inspector', 'inspector_role']
+        names = {f.name for f in Model._meta.get_fields()}
+        fields += [f for f in ('asset', 'inspected_process', 'forklift_type') if f in names]
+        return fields
+
+    def _header(self, module_key, Model, assets, users, schedule, inspection_date):
+        rng = self.rng
+        kwargs = {
+            'inspection_date': inspection_date,
+            'area': schedule.area if schedule else rng.choice(self.areas),
+            'inspector': rng.choice(users),
+            'inspector_role': rng.choice(ROLES),
+            'schedule_item': schedule,
+        }
+        if module_key == 'extinguisher':
+            kwargs['asset'] = None
+        elif module_key == 'first_aid':
+            kwargs['asset'] = rng.choice(assets['botiquin'])
+        elif module_key == 'forklift':
+            kwargs['asset'] = rng.choice(assets['montacargas'])
+            kwargs['forklift_type'] = rng.choice(['Combustible', 'Electrico'])
+        else:
+            kwargs['inspected_process'] = rng.choice(PROCESS_NAMES)
+        return Model(**kwargs)
+
+    def _chain_plan(self):
+        """
+        Estados desde la raíz hasta el último seguimiento.
+        - 60%: cerrada sin hallazgos.
+        - 10%: en proceso (aún sin firmar).
+        - 30%: con hallazgos, cadena de 1 a 3 seguimientos. Si el último
+          seguimiento sigue abierto, todos sus ancestros quedan en
+          'Seguimiento en proceso'; si se cerró, en 'Cerrada con seguimientos'.
+        """
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.6:
+            return ['Cerrada']
+        if roll < 0.7:
+            return ['En proceso']
+        length = rng.randint(1, 3)
+        last = rng.choice(['Cerrada', 'Cerrada', 'Programada', 'En proceso'])
+        ancestor = 'Cerrada con seguimientos' if last == 'Cerrada' else 'Seguimiento en proceso'
+        return [ancestor] * length + [last]
+
+    def _items(self, module_key, ItemModel, nodes, assets, users, image):
+        rng = self.rng
+        item_ct = ContentType.objects.get_for_model(ItemModel)
+        total_items = 0
+        total_evidences = 0
+        extintores_by_area = {}
+        for asset in assets['extintor']:
+            extintores_by_area.setdefault(asset.area_id, []).append(asset)
+
+        for start in range(0, len(nodes), self.batch_size):
+            items = []
+            failed_flags = []
+            for inspection, has_findings in nodes[start:start + self.batch_size]:
+                registered_by = inspection.inspector
+                for position, failed in enumerate(self._failure_pattern(module_key, has_findings)):
+                    items.append(self._item(module_key, ItemModel, inspection, position, failed,
+                                            registered_by, extintores_by_area))
+                    failed_flags.append(failed)
+            created = self._bulk(ItemModel, items)
+            evidences = [
+                InspectionEvidence(
+                    content_type=item_ct,
+                    object_id=item.pk,
+                    image=image,
+                    description='Hallazgo generado',
+                    uploaded_by=rng.choice(users),
+                )
+                for item, failed in zip(created, failed_flags) if failed
+            ]
+            self._bulk(InspectionEvidence, evidences)
+            total_items += len(created)
+            total_evidences += len(evidences)
+        self._log(f'  Ítems {module_key}', total_items)
+        self._log(f'  Evidencias {module_key}', total_evidences)
+
+    def _failure_pattern(self, module_key, has_findings):
+        rng = self.rng
+        if module_key == 'extinguisher':
+            count = rng.randint(3, 8)
+        elif module_key == 'first_aid':
+            count = len(FIRST_AID_ELEMENTS)
+        else:
+            count = len(CHECKLISTS[module_key])
+        flags = [False] * count
+        if has_findings:
+            for position in rng.sample(range(count), rng.randint(1, min(3, count))):
+                flags[position] = True
+        return flags
+
+    def _item(self, module_key, ItemModel, inspection, position, failed, registered_by, extintores_by_area):
+        rng = self.rng
+        if module_key == 'extinguisher':
+            candidates = extintores_by_area.get(inspection.area_id)
+            return ItemModel(
+                inspection=inspection,
+                asset=candidates[position % len(candidates)] if candidates else None,
+                pressure_gauge_ok=not failed,
+                status=rng.choice(['Malo', 'Recargar']) if failed else 'Bueno',
+                observations='Requiere atención' if failed else '',
+                registered_by=registered_by,
+            )
+        if module_key == 'first_aid':
+            return ItemModel(
+                inspection=inspection,
+                element_name=FIRST_AID_ELEMENTS[position],
+                quantity=rng.randint(1, 10),
+                expiration_date=inspection.inspection_date + timedelta(days=rng.randint(30, 720)),
+                status='No Existe' if failed else 'Existe',
+                registered_by=registered_by,
+            )
+        return ItemModel(
+            inspection=inspection,
+            question=CHECKLISTS[module_key][position],
+            response='No' if failed else 'Si',
+            item_status='Malo' if failed else rng.choice(['Bueno', 'Bueno', 'Regular']),
+            observations='Requiere atención' if failed else '',
+            registered_by=registered_by,
+        )
+
+    def _signatures(self, SignatureModel, nodes, users):
+        rng = self.rng
+        rows = []
+        for inspection, _ in nodes:
+            if inspection.status in ('Programada', 'En proceso'):
+                continue
+            signers = {inspection.inspector_id} | {u.pk for u in rng.sample(users, rng.randint(0, 2))}
+            rows += [
+                SignatureModel(inspection=inspection, user_id=user_id, signature=SIGNATURE_SNAPSHOT)
+                for user_id in sorted(signers)
+            ]
+        self._bulk(SignatureModel, rows)
+        self._log('  Firmas', len(rows))
+
+    # ------------------------------------------------------------------
+    # Limpieza
+    # ------------------------------------------------------------------
+
+    def _flush(self):
+        self.stdout.write(f'Eliminando datos con prefijo "{self.prefix}"...')
+        areas = Area.objects.filter(name__startswith=f'{self.prefix} ')
+        assets = Asset.objects.filter(code__startswith=f'{self.prefix}-')
+        with transaction.atomic():
+            InspectionEvidence.objects.filter(image=PLACEHOLDER_NAME).delete()
+            for _, _, Model, _, _ in MODULES:
+                Model.objects.filter(area__in=areas).delete()
+            InspectionSchedule.objects.filter(area__in=areas).delete()
+            MovimientoActivo.objects.filter(activo__in=assets).delete()
+            assets.delete()
+            areas.delete()
+            get_user_model().objects.filter(email__endswith='@dataset.local',
+                                            username__startswith=f'{self.prefix.lower()}_').delete()
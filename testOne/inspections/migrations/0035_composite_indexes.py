@@ -0,0 +1,93 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gestion_activos', '0008_movimiento_indexes'),
+        ('inspections', '0034_firstaidinspection_manual_participants_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='extinguisherinspection',
+            index=models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='extinguisherinspection_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='extinguisherinspection',
+            index=models.Index(fields=['area', 'inspection_date'], name='extinguisherinspection_ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='extinguisherinspection',
+            index=models.Index(condition=models.Q(('parent_inspection__isnull', True)), fields=['-inspection_date'], name='extinguisherinspection_rt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='firstaidinspection',
+            index=models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='firstaidinspection_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='firstaidinspection',
+            index=models.Index(fields=['area', 'inspection_date'], name='firstaidinspection_ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='firstaidinspection',
+            index=models.Index(condition=models.Q(('parent_inspection__isnull', True)), fields=['-inspection_date'], name='firstaidinspection_rt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forkliftinspection',
+            index=models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='forkliftinspection_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forkliftinspection',
+            index=models.Index(fields=['area', 'inspection_date'], name='forkliftinspection_ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forkliftinspection',
+            index=models.Index(condition=models.Q(('parent_inspection__isnull', True)), fields=['-inspection_date'], name='forkliftinspection_rt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionevidence',
+            index=models.Index(fields=['content_type', 'object_id'], name='evidence_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionschedule',
+            index=models.Index(fields=['inspection_type', 'scheduled_date'], name='schedule_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionschedule',
+            index=models.Index(fields=['area', 'scheduled_date'], name='schedule_area_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionschedule',
+            index=models.Index(fields=['status'], name='schedule_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processinspection',
+            index=models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='processinspection_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processinspection',
+            index=models.Index(fields=['area', 'inspection_date'], name='processinspection_ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processinspection',
+            index=models.Index(condition=models.Q(('parent_inspection__isnull', True)), fields=['-inspection_date'], name='processinspection_rt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageinspection',
+            index=models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='storageinspection_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageinspection',
+            index=models.Index(fields=['area', 'inspection_date'], name='storageinspection_ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageinspection',
+            index=models.Index(condition=models.Q(('parent_inspection__isnull', True)), fields=['-inspection_date'], name='storageinspection_rt_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:35
+
+from django.db import migrations
+
+
+# Índices GIN con pg_trgm para las búsquedas icontains (solo PostgreSQL).
+# La expresión UPPER(col::text) coincide con la que genera Django para icontains.
+# En otros motores la migración no hace nada.
+TRIGRAM_INDEXES = [
+    ('schedule_type_trgm_idx', 'inspections_inspectionschedule', 'inspection_type'),
+    ('area_name_trgm_idx', 'inspections_area', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0035_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0036_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionschedule',
+            name='module_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Derivado de inspection_type al guardar (extinguisher, first_aid, process, storage, forklift)', max_length=20, verbose_name='Módulo'),
+        ),
+    ]
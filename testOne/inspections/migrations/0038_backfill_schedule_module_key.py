@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:10
+
+from django.db import migrations
+from django.db.models import Q
+
+
+# Copia congelada de MODULE_KEY_PATTERNS (inspections/models.py) al momento de la migración.
+MODULE_KEY_PATTERNS = [
+    ('extinguisher', ['extintor']),
+    ('first_aid', ['botiquin']),
+    ('process', ['proceso', 'instalacion']),
+    ('storage', ['almacen', 'storage']),
+    ('forklift', ['montacarga']),
+]
+
+
+def backfill_module_key(apps, schema_editor):
+    InspectionSchedule = apps.get_model('inspections', 'InspectionSchedule')
+    # Un UPDATE por módulo; el orden respeta la prioridad (gana el primer patrón)
+    for key, patterns in MODULE_KEY_PATTERNS:
+        type_q = Q()
+        for p in patterns:
+            type_q |= Q(inspection_type__icontains=p)
+        InspectionSchedule.objects.filter(type_q, module_key='').update(module_key=key)
+
+
+def clear_module_key(apps, schema_editor):
+    InspectionSchedule = apps.get_model('inspections', 'InspectionSchedule')
+    InspectionSchedule.objects.update(module_key='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0037_inspectionschedule_module_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_module_key, clear_module_key),
+    ]
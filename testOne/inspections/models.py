@@ -25,6 +25,70 @@ class Area(models.Model):
     def __str__(self):
         return self.name
 
+# Módulo de inspección al que pertenece cada tipo de cronograma.
+# El orden importa: gana el primer patrón contenido en inspection_type.
+MODULE_KEY_PATTERNS = [
+    ('extinguisher', ['extintor']),
+    ('first_aid', ['botiquin']),
+    ('process', ['proceso', 'instalacion']),
+    ('storage', ['almacen', 'storage']),
+    ('forklift', ['montacarga']),
+]
+
+
+def resolve_module_key(inspection_type):
+    """Traduce un inspection_type libre ('Extintores', 'Instalaciones de Proceso'...) a su module_key."""
+    t = (inspection_type or '').lower()
+    for key, patterns in MODULE_KEY_PATTERNS:
+        if any(p in t for p in patterns):
+            return key
+    return ''
+
+
+# Inspección real vinculada a un cronograma: (module_key, modelo, url de detalle).
+# Mismo orden de prioridad que InspectionSchedule.get_actual_inspection().
+SCHEDULE_INSPECTION_MODULES = [
+    ('extinguisher', 'ExtinguisherInspection', 'extinguisher_detail'),
+    ('first_aid', 'FirstAidInspection', 'first_aid_detail'),
+    ('process', 'ProcessInspection', 'process_detail'),
+    ('storage', 'StorageInspection', 'storage_detail'),
+    ('forklift', 'ForkliftInspection', 'forklift_detail'),
+]
+
+
+class InspectionScheduleQuerySet(models.QuerySet):
+    def with_inspection_status(self):
+        """
+        Anota cada cronograma con la inspección vinculada (módulo, pk y estado)
+        mediante subconsultas sobre las cinco tablas de inspección:
+        linked_inspection_module, linked_inspection_pk, linked_inspection_status.
+        status_label, status_css_class, is_executable y get_absolute_url_result
+        leen estas anotaciones en vez de consultar fila por fila.
+        """
+        from django.apps import apps
+        from django.db.models import Case, OuterRef, Subquery, Value, When
+        from django.db.models.functions import Coalesce
+
+        aliases = {}
+        module_whens = []
+        pk_fields = []
+        status_fields = []
+        for key, model_name, _url in SCHEDULE_INSPECTION_MODULES:
+            Model = apps.get_model('inspections', model_name)
+            linked = Model.objects.filter(schedule_item=OuterRef('pk')).order_by(*Model._meta.ordering, 'pk')
+            aliases[f'_linked_{key}_pk'] = Subquery(linked.values('pk')[:1])
+            aliases[f'_linked_{key}_status'] = Subquery(linked.values('status')[:1])
+            module_whens.append(When(**{f'_linked_{key}_pk__isnull': False}, then=Value(key)))
+            pk_fields.append(f'_linked_{key}_pk')
+            status_fields.append(f'_linked_{key}_status')
+
+        return self.alias(**aliases).annotate(
+            linked_inspection_module=Case(*module_whens, default=Value(''), output_field=models.CharField()),
+            linked_inspection_pk=Coalesce(*pk_fields),
+            linked_inspection_status=Coalesce(*status_fields),
+        )
+
+
 # Existing InspectionSchedule Model
 class InspectionSchedule(models.Model):
     FREQUENCY_CHOICES = [
@@ -50,6 +114,15 @@ class InspectionSchedule(models.Model):
         help_text="Seleccione el área donde se realizará la inspección"
     )
     inspection_type = models.CharField(max_length=200, verbose_name="Tipo de Inspección")
+    module_key = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="Módulo",
+        help_text="Derivado de inspection_type al guardar (extinguisher, first_aid, process, storage, forklift)"
+    )
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, verbose_name="Frecuencia")
     scheduled_date = models.DateField(verbose_name="Fecha Programada")
     responsible = models.ForeignKey(
@@ -70,9 +143,12 @@ class InspectionSchedule(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InspectionScheduleQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if self.scheduled_date:
             self.year = self.scheduled_date.year
+        self.module_key = resolve_module_key(self.inspection_type)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -82,6 +158,11 @@ class InspectionSchedule(models.Model):
         verbose_name = "Cronograma de Inspección"
         verbose_name_plural = "Cronogramas de Inspección"
         ordering = ['scheduled_date']
+        indexes = [
+            models.Index(fields=['inspection_type', 'scheduled_date'], name='schedule_type_date_idx'),
+            models.Index(fields=['area', 'scheduled_date'], name='schedule_area_date_idx'),
+            models.Index(fields=['status'], name='schedule_status_idx'),
+        ]
 
     def get_actual_inspection(self):
         """Helper to find the actual inspection object related to this schedule item."""
@@ -106,16 +187,26 @@ class InspectionSchedule(models.Model):
         """Returns the URL of the actual inspection registered for this schedule item."""
         from django.urls import reverse
         if self.status == 'Realizada':
-            insp = self.get_actual_inspection()
-            if insp:
-                cls_name = insp.__class__.__name__
-                if 'Extinguisher' in cls_name: return reverse('extinguisher_detail', args=[insp.pk])
-                if 'FirstAid' in cls_name: return reverse('first_aid_detail', args=[insp.pk])
-                if 'Process' in cls_name: return reverse('process_detail', args=[insp.pk])
-                if 'Storage' in cls_name: return reverse('storage_detail', args=[insp.pk])
-                if 'Forklift' in cls_name: return reverse('forklift_detail', args=[insp.pk])
+            module, pk, _status = self.get_linked_inspection_info()
+            if pk:
+                url_name = {key: url for key, _model, url in SCHEDULE_INSPECTION_MODULES}[module]
+                return reverse(url_name, args=[pk])
         return None
 
+    def get_linked_inspection_info(self):
+        """
+        (module_key, pk, status) de la inspección vinculada, o ('', None, None).
+        Usa las anotaciones de with_inspection_status() si están presentes.
+        """
+        if hasattr(self, 'linked_inspection_module'):
+            return self.linked_inspection_module, self.linked_inspection_pk, self.linked_inspection_status
+        insp = self.get_actual_inspection()
+        if not insp:
+            return '', None, None
+        model_name = insp.__class__.__name__
+        module = next(key for key, name, _url in SCHEDULE_INSPECTION_MODULES if name == model_name)
+        return module, insp.pk, insp.status
+
     @property
     def is_executable(self):
         """Determines if the inspection can be executed today (on or after the scheduled date)."""
@@ -181,31 +272,21 @@ class InspectionSchedule(models.Model):
     @property
     def status_label(self):
         if self.status == 'Realizada':
-            insp = self.get_actual_inspection()
-            if insp:
-                # Check for 'status' field (workflow)
-                if hasattr(insp, 'status'):
-                    # Mapeo de estados internos a etiquetas visibles
-                    st = insp.status
-                    if st == 'Programada': return 'Programada'
-                    if st == 'En proceso': return 'En proceso'
-                    if st == 'Seguimiento en proceso': return 'Seguimiento en proceso'
-                    if st == 'Cerrada': return 'Cerrada'
-                    if st == 'Cerrada con seguimientos': return 'Cerrada con seguimientos'
-                    
-                    # Fallback para estados viejos que puedan quedar en DB
-                    if st == 'Cerrada con Hallazgos': return 'Seguimiento en proceso'
-                    if st == 'Pendiente de Firmas': return 'En proceso'
-                    if st == 'Pendiente': return 'Programada'
-                    
-                    return st
+            _module, pk, st = self.get_linked_inspection_info()
+            if pk:
+                # Mapeo de estados internos a etiquetas visibles
+                if st == 'Programada': return 'Programada'
+                if st == 'En proceso': return 'En proceso'
+                if st == 'Seguimiento en proceso': return 'Seguimiento en proceso'
+                if st == 'Cerrada': return 'Cerrada'
+                if st == 'Cerrada con seguimientos': return 'Cerrada con seguimientos'
+                
+                # Fallback para estados viejos que puedan quedar en DB
+                if st == 'Cerrada con Hallazgos': return 'Seguimiento en proceso'
+                if st == 'Pendiente de Firmas': return 'En proceso'
+                if st == 'Pendiente': return 'Programada'
                 
-                # Fallback to general_status
-                if hasattr(insp, 'general_status'):
-                     gs = insp.general_status
-                     if gs == 'No Cumple': return 'Seguimiento en proceso' # Antes era Cerrada con Hallazgos
-                     if gs == 'Cumple': return 'Cerrada'
-                     return gs
+                return st
             return "Programada"
         # Non-realized - Check if overdue
         if self.scheduled_date < date.today():
@@ -215,20 +296,12 @@ class InspectionSchedule(models.Model):
     @property
     def status_css_class(self):
         if self.status == 'Realizada':
-            insp = self.get_actual_inspection()
-            if insp:
-                if hasattr(insp, 'status'):
-                    st = insp.status
-                    if st in ['Cerrada', 'Cerrada con seguimientos']: return 'badge-success'
-                    if st in ['Seguimiento en proceso', 'Cerrada con Hallazgos']: return 'badge-orange'
-                    if st in ['En proceso', 'Pendiente de Firmas']: return 'badge-primary'
-                    if st == 'Programada': return 'badge-secondary'
-                    return 'badge-secondary'
-                
-                if hasattr(insp, 'general_status'):
-                    gs = insp.general_status
-                    if gs == 'Cumple': return 'badge-success'
-                    if gs == 'No Cumple': return 'badge-orange-dark'
+            _module, pk, st = self.get_linked_inspection_info()
+            if pk:
+                if st in ['Cerrada', 'Cerrada con seguimientos']: return 'badge-success'
+                if st in ['Seguimiento en proceso', 'Cerrada con Hallazgos']: return 'badge-orange'
+                if st in ['En proceso', 'Pendiente de Firmas']: return 'badge-primary'
+                return 'badge-secondary'
             return 'badge-secondary'
         if self.scheduled_date < date.today():
              return 'badge-danger'
@@ -245,22 +318,22 @@ class InspectionSchedule(models.Model):
     @property
     def is_executable(self):
          # If 'Realizada' but orphan (no actual inspection), treat as executable if date passed
-         if self.status == 'Realizada' and not self.get_actual_inspection():
+         if self.status == 'Realizada' and not self.get_linked_inspection_info()[1]:
              return self.scheduled_date <= date.today()
          return self.scheduled_date <= date.today() and self.status != 'Realizada'
 
     def get_module_url(self):
         """Returns the URL for the corresponding inspection module list."""
         from django.urls import reverse
-        t = self.inspection_type.lower()
+        key = self.module_key or resolve_module_key(self.inspection_type)
         url = None
         
         # Map types to module list URLs
-        if 'extintor' in t: url = reverse('extinguisher_list')
-        elif 'botiquin' in t: url = reverse('first_aid_list')
-        elif 'proceso' in t or 'instalacion' in t: url = reverse('process_list')
-        elif 'almacen' in t or 'storage' in t: url = reverse('storage_list')
-        elif 'montacarga' in t: url = reverse('forklift_list')
+        if key == 'extinguisher': url = reverse('extinguisher_list')
+        elif key == 'first_aid': url = reverse('first_aid_list')
+        elif key == 'process': url = reverse('process_list')
+        elif key == 'storage': url = reverse('storage_list')
+        elif key == 'forklift': url = reverse('forklift_list')
         
         if url:
              return f"{url}?schedule_id={self.id}"
@@ -314,6 +387,17 @@ class BaseInspection(models.Model):
     class Meta:
         abstract = True
         ordering = ['-inspection_date']
+        # parent_inspection se define en cada módulo; los índices se resuelven en el modelo concreto
+        indexes = [
+            models.Index(fields=['inspection_date', 'parent_inspection', 'schedule_item'], name='%(class)s_dps_idx'),
+            models.Index(fields=['area', 'inspection_date'], name='%(class)s_ad_idx'),
+            # Solo inspecciones raíz (no seguimientos): listados, matriz y dashboard
+            models.Index(
+                fields=['-inspection_date'],
+                name='%(class)s_rt_idx',
+                condition=models.Q(parent_inspection__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self._meta.verbose_name} - {self.area} ({self.inspection_date})"
@@ -343,6 +427,9 @@ class InspectionEvidence(models.Model):
         verbose_name = "Evidencia de Inspección"
         verbose_name_plural = "Evidencias de Inspección"
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='evidence_target_idx'),
+        ]
 
     def __str__(self):
         return f"Evidencia {self.id} de {self.content_object}"
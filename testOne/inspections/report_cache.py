@@ -0,0 +1,104 @@
+"""
+inspections/report_cache.py
+---------------------------
+Caché del HTML de los reportes de inspecciones cerradas.
+
+Una inspección en TERMINAL_STATUSES ya no cambia, así que el cuerpo de su
+reporte (templates/inspections/includes/<modulo>_report_body.html) se
+renderiza una vez y se reutiliza. La clave incluye:
+  - modelo, pk y updated_at de la inspección (reabrirla cambia updated_at),
+  - la versión de su cadena de seguimientos, que `inspections/signals.py`
+    incrementa cuando cambian ítems, evidencias, firmas o cualquier
+    inspección de la cadena (el reporte de botiquines muestra la línea de tiempo),
+  - la versión de nombres (usuarios, áreas, tipos de agente), que
+    `inspections/signals.py` incrementa al guardarlos o eliminarlos, y la
+    versión de estado de activos (gestion_activos/cache.py): el cuerpo
+    muestra nombres de inspectores y firmantes, áreas, códigos y detalles
+    de activos que no pertenecen a la inspección,
+  - el día actual: el estado del activo (Asset.estado_actual) depende de la
+    fecha, así que un reporte cacheado no sobrevive al cambio de día,
+  - la versión del template del cuerpo (hash de su fuente).
+
+Las versiones viven en la caché compartida (CACHES en settings), de modo que
+una invalidación en un worker la ven todos.
+
+La misma clave, junto con el usuario y la versión de permisos del menú,
+forma el ETag fuerte que permite responder 304 a peticiones condicionales.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.template.loader import get_template
+
+from .services import TERMINAL_STATUSES
+
+REPORT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+REPORT_VERSION_KEY = 'inspections:report_version:{label}:{pk}'
+REPORT_NAMES_VERSION_KEY = 'inspections:report_names_version'
+
+# Hash de la fuente de cada template de cuerpo (fijo durante la vida del proceso)
+_template_versions = {}
+
+
+def is_cacheable(inspection):
+    return inspection.status in TERMINAL_STATUSES
+
+
+def chain_root_pk(inspection):
+    """pk de la inspección raíz de la cadena de seguimientos."""
+    model = inspection.__class__
+    pk, parent_pk = inspection.pk, inspection.parent_inspection_id
+    while parent_pk:
+        pk, parent_pk = parent_pk, model.objects.filter(pk=parent_pk).values_list('parent_inspection_id', flat=True).first()
+    return pk
+
+
+def _version_key(inspection):
+    return REPORT_VERSION_KEY.format(label=inspection._meta.label_lower, pk=chain_root_pk(inspection))
+
+
+def report_version(inspection):
+    key = _version_key(inspection)
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def bump_report_version(inspection):
+    cache.set(_version_key(inspection), time.time_ns(), None)
+
+
+def names_version():
+    cache.add(REPORT_NAMES_VERSION_KEY, time.time_ns(), None)
+    return cache.get(REPORT_NAMES_VERSION_KEY)
+
+
+def bump_names_version():
+    cache.set(REPORT_NAMES_VERSION_KEY, time.time_ns(), None)
+
+
+def template_version(template_name):
+    if template_name not in _template_versions:
+        source = get_template(template_name).template.source
+        _template_versions[template_name] = hashlib.md5(source.encode('utf-8')).hexdigest()[:12]
+    return _template_versions[template_name]
+
+
+def report_cache_key(inspection, template_name):
+    from gestion_activos.cache import asset_state_version
+    return 'inspections:report:{label}:{pk}:{updated}:{version}:{names}:{assets}:{day}:{template}'.format(
+        label=inspection._meta.label_lower,
+        pk=inspection.pk,
+        updated=int(inspection.updated_at.timestamp() * 1_000_000),
+        version=report_version(inspection),
+        names=names_version(),
+        assets=asset_state_version(),
+        day=timezone.localdate().isoformat(),
+        template=template_version(template_name),
+    )
+
+
+def report_etag(cache_key, user, permission_version):
+    digest = hashlib.md5(f'{cache_key}:{user.pk}:{permission_version}'.encode('utf-8')).hexdigest()
+    return f'"{digest}"'
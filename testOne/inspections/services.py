@@ -0,0 +1,362 @@
+"""
+inspections/services.py
+-----------------------
+Lógica de negocio compartida por los cinco módulos de inspección.
+
+Firma y cierre de inspecciones
+    `sign_inspection()` registra la firma de un participante y evalúa el
+    cierre dentro de UNA transacción con la fila de la inspección bloqueada
+    (`select_for_update`). Dos participantes firmando al mismo tiempo quedan
+    serializados: solo uno ve "todas las firmas completas" y el seguimiento
+    se genera exactamente una vez. Reintentos del mismo usuario son
+    idempotentes (devuelven 'already_signed' sin escribir nada).
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    InspectionEvidence, InspectionSignature,
+    ExtinguisherInspection, ExtinguisherItem,
+    FirstAidInspection, FirstAidItem, FirstAidSignature,
+    ProcessInspection, ProcessCheckItem, ProcessSignature,
+    StorageInspection, StorageCheckItem, StorageSignature,
+    ForkliftInspection, ForkliftCheckItem, ForkliftSignature,
+)
+
+logger = logging.getLogger(__name__)
+
+# Estados en los que ya no se aceptan firmas
+CLOSED_STATUSES = ['Cerrada', 'Cerrada con Hallazgos']
+# Estados terminales de un seguimiento (permiten cerrar al padre)
+TERMINAL_STATUSES = ['Cerrada', 'Cerrada con seguimientos']
+
+
+def _follow_up_observations(item, empty_text='Seguimiento'):
+    if item.observations:
+        return f"Seguimiento: {item.observations}"[:255]
+    return empty_text
+
+
+def _extinguisher_item_fields(item, inspection, user):
+    return {
+        'asset_id': item.asset_id or inspection.asset_id,
+        'pressure_gauge_ok': item.pressure_gauge_ok,
+        'safety_pin_ok': item.safety_pin_ok,
+        'hose_nozzle_ok': item.hose_nozzle_ok,
+        'signage_ok': item.signage_ok,
+        'access_ok': item.access_ok,
+        'label_ok': item.label_ok,
+        'status': 'Malo',
+        'observations': _follow_up_observations(item, 'Seguimiento pendiente'),
+        'registered_by': user,
+    }
+
+
+def _first_aid_item_fields(item, inspection, user):
+    return {
+        'element_name': item.element_name,
+        'quantity': item.quantity,
+        'expiration_date': item.expiration_date,
+        'status': 'No Existe',
+        'observations': _follow_up_observations(item),
+    }
+
+
+def _checklist_item_fields(item, inspection, user):
+    return {
+        'question': item.question,
+        'response': 'No',
+        'item_status': 'Malo',
+        'observations': _follow_up_observations(item),
+    }
+
+
+def _forklift_item_fields(item, inspection, user):
+    fields = _checklist_item_fields(item, inspection, user)
+    fields['response'] = item.response
+    return fields
+
+
+# Configuración por módulo. Todo lo que difiere entre módulos vive aquí;
+# el flujo de firma/cierre es uno solo.
+#   failed_filter       -> ítems que generan seguimiento
+#   follow_up_fields    -> campos de cabecera copiados al seguimiento
+#   item_fields         -> cómo se clona un ítem fallido
+#   track_general_status-> sincroniza general_status (Cumple / No Cumple)
+#   notify_bosses       -> notifica al grupo "Jefes" al generar seguimiento
+#   advance_schedule    -> al cerrar sin hallazgos marca el cronograma y genera la siguiente
+SIGNATURE_MODULES = {
+    'extinguisher': {
+        'model': ExtinguisherInspection,
+        'signature_model': InspectionSignature,
+        'item_model': ExtinguisherItem,
+        'label': 'extintores',
+        'detail_url': 'extinguisher_detail',
+        'failed_filter': {'status__in': ['Malo', 'Recargar']},
+        'follow_up_fields': ['area', 'asset', 'inspector', 'inspector_role'],
+        'item_fields': _extinguisher_item_fields,
+        'track_general_status': False,
+        'notify_bosses': True,
+        'advance_schedule': False,
+    },
+    'first_aid': {
+        'model': FirstAidInspection,
+        'signature_model': FirstAidSignature,
+        'item_model': FirstAidItem,
+        'label': 'botiquines',
+        'detail_url': 'first_aid_detail',
+        'failed_filter': {'status': 'No Existe'},
+        'follow_up_fields': ['area', 'asset', 'inspector', 'inspector_role'],
+        'item_fields': _first_aid_item_fields,
+        'track_general_status': True,
+        'notify_bosses': False,
+        'advance_schedule': True,
+    },
+    'process': {
+        'model': ProcessInspection,
+        'signature_model': ProcessSignature,
+        'item_model': ProcessCheckItem,
+        'label': 'procesos',
+        'detail_url': 'process_detail',
+        'failed_filter': {'item_status': 'Malo'},
+        'follow_up_fields': ['area', 'inspector', 'inspector_role', 'inspected_process'],
+        'item_fields': _checklist_item_fields,
+        'track_general_status': False,
+        'notify_bosses': False,
+        'advance_schedule': True,
+    },
+    'storage': {
+        'model': StorageInspection,
+        'signature_model': StorageSignature,
+        'item_model': StorageCheckItem,
+        'label': 'almacenamiento',
+        'detail_url': 'storage_detail',
+        'failed_filter': {'item_status': 'Malo'},
+        'follow_up_fields': ['area', 'inspector', 'inspector_role', 'inspected_process'],
+        'item_fields': _checklist_item_fields,
+        'track_general_status': False,
+        'notify_bosses': False,
+        'advance_schedule': True,
+    },
+    'forklift': {
+        'model': ForkliftInspection,
+        'signature_model': ForkliftSignature,
+        'item_model': ForkliftCheckItem,
+        'label': 'montacargas',
+        'detail_url': 'forklift_detail',
+        'failed_filter': {'item_status': 'Malo'},
+        'follow_up_fields': ['area', 'asset', 'inspector', 'inspector_role', 'forklift_type'],
+        'item_fields': _forklift_item_fields,
+        'track_general_status': False,
+        'notify_bosses': False,
+        'advance_schedule': True,
+    },
+}
+
+
+def sign_inspection(module_key, pk, user):
+    """
+    Registra la firma de `user` sobre la inspección `pk` del módulo indicado
+    y, si ya firmaron todos los participantes, cierra la inspección.
+
+    Retorna un dict con:
+      - outcome: 'not_participant' | 'already_signed' | 'no_signature_profile' |
+                 'closed' | 'pending' | 'follow_up' | 'closed_clean'
+      - inspection, follow_up, next_schedule, parent_closed
+      - summary: resumen de `generate_follow_up()` cuando se generó el seguimiento
+    """
+    config = SIGNATURE_MODULES[module_key]
+    Model = config['model']
+
+    result = {
+        'outcome': None,
+        'inspection': None,
+        'follow_up': None,
+        'next_schedule': None,
+        'parent_closed': False,
+        'summary': None,
+    }
+
+    with transaction.atomic():
+        # Bloqueo de la fila: serializa firmas concurrentes sobre la misma inspección
+        inspection = get_object_or_404(Model.objects.select_for_update(), pk=pk)
+        result['inspection'] = inspection
+
+        if not inspection.get_participants().filter(pk=user.pk).exists():
+            result['outcome'] = 'not_participant'
+            return result
+
+        # Idempotencia: un reintento del mismo usuario no vuelve a escribir
+        if inspection.signatures.filter(user=user).exists():
+            result['outcome'] = 'already_signed'
+            return result
+
+        if not getattr(user, 'digital_signature', None):
+            result['outcome'] = 'no_signature_profile'
+            return result
+
+        if inspection.status in CLOSED_STATUSES:
+            result['outcome'] = 'closed'
+            return result
+
+        config['signature_model'].objects.create(
+            inspection=inspection,
+            user=user,
+            signature=user.digital_signature
+        )
+
+        if inspection.signatures.count() < inspection.get_participants().count():
+            inspection.status = 'En proceso'
+            inspection.save(update_fields=['status', 'updated_at'])
+            result['outcome'] = 'pending'
+            return result
+
+        _close_inspection(config, inspection, user, result)
+
+    return result
+
+
+def _close_inspection(config, inspection, user, result):
+    """Cierre completo. Se ejecuta con la fila de `inspection` bloqueada."""
+    failed_items = inspection.items.filter(**config['failed_filter'])
+
+    if failed_items.exists():
+        inspection.status = 'Seguimiento en proceso'
+        if config['track_general_status']:
+            inspection.general_status = 'No Cumple'
+        inspection.save()
+
+        # Exactamente una vez: si ya existe un seguimiento no se genera otro
+        follow_up = inspection.follow_ups.order_by('pk').first()
+        if follow_up is None:
+            summary = generate_follow_up(config, inspection, failed_items, user)
+            follow_up = summary['follow_up']
+            result['summary'] = summary
+            logger.info(
+                f"Seguimiento #{follow_up.pk} generado desde {config['label']} #{inspection.pk}: "
+                f"{summary['items_cloned']} ítems, {summary['evidences_cloned']} evidencias"
+            )
+            if config['notify_bosses']:
+                _notify_bosses(config, inspection, follow_up)
+        result['follow_up'] = follow_up
+        result['outcome'] = 'follow_up'
+        return
+
+    inspection.status = 'Cerrada'
+    if config['track_general_status']:
+        inspection.general_status = 'Cumple'
+    inspection.save()
+    result['outcome'] = 'closed_clean'
+
+    if inspection.parent_inspection_id:
+        # Seguimiento: cerrar la jerarquía mientras todos los hijos estén en estado terminal
+        curr = inspection
+        while curr.parent_inspection_id:
+            parent = type(inspection).objects.select_for_update().get(pk=curr.parent_inspection_id)
+            if parent.follow_ups.exclude(status__in=TERMINAL_STATUSES).exists():
+                break
+            parent.status = 'Cerrada con seguimientos'
+            parent.save()
+            result['parent_closed'] = True
+            curr = parent
+    elif config['advance_schedule'] and inspection.schedule_item_id:
+        s_item = inspection.schedule_item
+        s_item.status = 'Realizada'
+        s_item.save()
+        result['next_schedule'] = s_item.generate_next_schedule()
+
+
+def generate_follow_up(config, inspection, failed_items, user):
+    """
+    Crea la inspección de seguimiento clonando los ítems fallidos y sus evidencias.
+
+    Los ítems se insertan con un único `bulk_create` y las evidencias también:
+    el seguimiento referencia el MISMO archivo de imagen que el ítem original
+    (no se copian bytes). Ver `delete_evidence_file()` para el borrado seguro.
+
+    Retorna un dict resumen: follow_up, follow_up_date, items_cloned, evidences_cloned.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from system_config.models import SystemConfig
+
+    days = SystemConfig.get_value('dias_seguimiento_auto', 15)
+    follow_up_date = timezone.now().date() + timedelta(days=days)
+
+    Model = config['model']
+    ItemModel = config['item_model']
+
+    header = {name: getattr(inspection, name) for name in config['follow_up_fields']}
+    follow_up = Model.objects.create(
+        parent_inspection=inspection,
+        inspection_date=follow_up_date,
+        status='Programada',
+        **header
+    )
+
+    failed_items = list(failed_items.order_by('pk'))
+    new_items = ItemModel.objects.bulk_create([
+        ItemModel(inspection=follow_up, **config['item_fields'](item, inspection, user))
+        for item in failed_items
+    ])
+    # bulk_create conserva el orden: original -> clon
+    clone_map = {old.pk: new.pk for old, new in zip(failed_items, new_items)}
+
+    item_ct = ContentType.objects.get_for_model(ItemModel)
+    evidences = InspectionEvidence.objects.filter(
+        content_type=item_ct, object_id__in=clone_map.keys()
+    ).order_by('pk')
+    new_evidences = InspectionEvidence.objects.bulk_create([
+        InspectionEvidence(
+            content_type=item_ct,
+            object_id=clone_map[evidence.object_id],
+            image=evidence.image.name,
+            description=evidence.description,
+            uploaded_by_id=evidence.uploaded_by_id
+        )
+        for evidence in evidences
+    ])
+
+    return {
+        'follow_up': follow_up,
+        'follow_up_date': follow_up_date,
+        'items_cloned': len(new_items),
+        'evidences_cloned': len(new_evidences),
+    }
+
+
+def delete_evidence_file(evidence):
+    """
+    Elimina el archivo de una evidencia solo si ninguna otra evidencia lo
+    referencia (los seguimientos comparten la imagen con el ítem original).
+    """
+    name = evidence.image.name
+    if not name:
+        return False
+    if InspectionEvidence.objects.filter(image=name).exclude(pk=evidence.pk).exists():
+        return False
+    evidence.image.delete(save=False)
+    return True
+
+
+def _notify_bosses(config, inspection, follow_up):
+    from notifications.models import NotificationGroup, Notification
+    try:
+        jefes_group = NotificationGroup.objects.get(name="Jefes", is_active=True)
+    except NotificationGroup.DoesNotExist:
+        return
+    link = reverse(config['detail_url'], kwargs={'pk': follow_up.pk})
+    Notification.objects.bulk_create([
+        Notification(
+            user=boss,
+            title=f"Hallazgos Críticos - Inspección #{inspection.pk}",
+            message=f"Se ha cerrado la inspección de {config['label']} en {inspection.area} con hallazgos. Se generó seguimiento automático.",
+            link=link,
+            notification_type='alert'
+        )
+        for boss in jefes_group.users.all()
+    ])
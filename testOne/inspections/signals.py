@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Area, InspectionSchedule, InspectionEvidence
+from .facets import FACET_INSPECTION_MODELS, invalidate_facets
+from .report_cache import bump_names_version, bump_report_version
+from .services import SIGNATURE_MODULES
+
+
+# Facetas de filtros (años / áreas / tipos): se recalculan tras cualquier escritura
+@receiver(post_save, sender=InspectionSchedule)
+@receiver(post_delete, sender=InspectionSchedule)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+def invalidate_schedule_facets(sender, **kwargs):
+    invalidate_facets()
+
+
+def invalidate_inspection_facets(sender, **kwargs):
+    invalidate_facets()
+
+
+for _model in FACET_INSPECTION_MODELS:
+    post_save.connect(invalidate_inspection_facets, sender=_model, dispatch_uid=f'facets_save_{_model._meta.label_lower}')
+    post_delete.connect(invalidate_inspection_facets, sender=_model, dispatch_uid=f'facets_delete_{_model._meta.label_lower}')
+
+
+# Reportes cacheados de inspecciones cerradas (report_cache.py): cualquier cambio
+# en la inspección, sus ítems, firmas o evidencias invalida su cadena
+def invalidate_inspection_report(sender, instance, **kwargs):
+    bump_report_version(instance)
+
+
+def invalidate_related_report(sender, instance, **kwargs):
+    try:
+        inspection = instance.inspection
+    except ObjectDoesNotExist:
+        return
+    bump_report_version(inspection)
+
+
+@receiver(post_save, sender=InspectionEvidence)
+@receiver(post_delete, sender=InspectionEvidence)
+def invalidate_evidence_report(sender, instance, **kwargs):
+    target = instance.content_object
+    if target is None:
+        return
+    inspection = getattr(target, 'inspection', target)
+    if hasattr(inspection, 'parent_inspection_id'):
+        bump_report_version(inspection)
+
+
+for _config in SIGNATURE_MODULES.values():
+    _label = _config['model']._meta.label_lower
+    post_save.connect(invalidate_inspection_report, sender=_config['model'], dispatch_uid=f'report_save_{_label}')
+    for _related in (_config['item_model'], _config['signature_model']):
+        _uid = _related._meta.label_lower
+        post_save.connect(invalidate_related_report, sender=_related, dispatch_uid=f'report_save_{_uid}')
+        post_delete.connect(invalidate_related_report, sender=_related, dispatch_uid=f'report_delete_{_uid}')
+
+
+# Nombres que muestran los reportes cacheados sin pertenecer a la inspección
+# (inspectores, firmantes, áreas, tipos de agente). Los activos y sus detalles
+# ya están cubiertos por la versión de estado de gestion_activos.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender='gestion_activos.TipoExtintor')
+@receiver(post_delete, sender='gestion_activos.TipoExtintor')
+def invalidate_report_names(sender, update_fields=None, **kwargs):
+    # El login solo actualiza last_login: no invalida los reportes
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_names_version()
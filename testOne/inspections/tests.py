@@ -1,3 +1,17 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == 'postgresql', 'Los planes de consulta se validan sobre PostgreSQL.')
+class QueryPlanTests(TestCase):
+    """Las consultas críticas usan sus índices con un volumen realista y estadísticas actualizadas."""
+
+    SEED_ROWS = 20000
+
+    def test_critical_queries_use_expected_indexes(self):
+        # check_query_plans lanza CommandError si alguna consulta no usa el índice esperado
+        call_command('check_query_plans', seed=self.SEED_ROWS, stdout=StringIO())
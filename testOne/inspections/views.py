@@ -9,6 +9,10 @@ from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.safestring import mark_safe
 
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
@@ -16,8 +20,6 @@ import os
 import logging
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +40,11 @@ from .forms import (
     StorageInspectionForm, StorageItemFormSet, StorageCheckItemForm,
     ForkliftInspectionForm, ForkliftItemFormSet, ForkliftCheckItemForm
 )
-from notifications.models import NotificationGroup, Notification
 from roles.mixins import RolePermissionRequiredMixin
+from .services import SIGNATURE_MODULES, sign_inspection, delete_evidence_file
+from . import facets
+from . import report_cache
+from roles.cache import permission_version
 
 # --- Mixin to provide form user context ---
 class InspectionFormUserMixin:
@@ -110,6 +115,38 @@ class EvidenceMixin:
 
         return context
 
+# --- Mixin: reportes de inspecciones cerradas servidos desde caché ---
+class ClosedReportCacheMixin:
+    """
+    Renderiza el cuerpo del reporte (report_body_template) por separado del
+    layout. Si la inspección está cerrada el HTML se guarda en caché
+    (ver report_cache.py) y se responde con ETag fuerte / 304.
+    """
+    report_body_template = None
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if not report_cache.is_cacheable(self.object):
+            context = self.get_context_data(object=self.object)
+            context['report_body'] = render_to_string(self.report_body_template, context, request)
+            return self.render_to_response(context)
+
+        cache_key = report_cache.report_cache_key(self.object, self.report_body_template)
+        # El layout (menú, usuario) depende de quién consulta
+        etag = report_cache.report_etag(cache_key, request.user, permission_version())
+        # If-None-Match con lista de ETags o '*' (RFC 9110)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            body = cache.get(cache_key)
+            if body is None:
+                context = self.get_context_data(object=self.object)
+                body = render_to_string(self.report_body_template, context, request)
+                cache.set(cache_key, body, report_cache.REPORT_CACHE_TIMEOUT)
+            response = self.render_to_response({'object': self.object, 'view': self, 'report_body': mark_safe(body)})
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
 # --- Mixin to provide matrix context to any view ---
 class MatrixContextMixin:
     def get_context_data(self, **kwargs):
@@ -126,14 +163,14 @@ class MatrixContextMixin:
         selected_area = self.request.GET.get('area', '')
         selected_type = self.request.GET.get('inspection_type', '')
         
-        years_qs = list(InspectionSchedule.objects.values_list('scheduled_date__year', flat=True).distinct())
+        years_qs = facets.schedule_years()
         if current_year not in years_qs:
             years_qs.append(current_year)
         years_qs.sort(reverse=True)
         context['years_data'] = [{'val': str(y), 'selected': str(y) == selected_year} for y in years_qs if y is not None]
         
         # FIX: Use area name instead of ID for dropdown
-        areas_qs = InspectionSchedule.objects.values_list('area__id', 'area__name').distinct().order_by('area__name')
+        areas_qs = facets.schedule_areas()
         try:
              sel_area_id = int(selected_area) if selected_area else None
         except ValueError:
@@ -155,11 +192,11 @@ class MatrixContextMixin:
         # 1. Permission Mapping
         user = self.request.user
         inspection_modules = [
-            {'name': 'Extintores', 'key': 'extinguisher', 'patterns': ['extintor'], 'model': ExtinguisherInspection},
-            {'name': 'Botiquines', 'key': 'first_aid', 'patterns': ['botiquin'], 'model': FirstAidInspection},
-            {'name': 'Instalaciones de Proceso', 'key': 'process', 'patterns': ['proceso', 'instalacion'], 'model': ProcessInspection},
-            {'name': 'Almacenamiento', 'key': 'storage', 'patterns': ['almacen', 'storage'], 'model': StorageInspection},
-            {'name': 'Montacargas', 'key': 'forklift', 'patterns': ['montacarga'], 'model': ForkliftInspection},
+            {'name': 'Extintores', 'key': 'extinguisher', 'model': ExtinguisherInspection},
+            {'name': 'Botiquines', 'key': 'first_aid', 'model': FirstAidInspection},
+            {'name': 'Instalaciones de Proceso', 'key': 'process', 'model': ProcessInspection},
+            {'name': 'Almacenamiento', 'key': 'storage', 'model': StorageInspection},
+            {'name': 'Montacargas', 'key': 'forklift', 'model': ForkliftInspection},
         ]
         
         allowed_keys = []
@@ -168,7 +205,6 @@ class MatrixContextMixin:
         type_to_key = {} # Map 'Extintores' -> 'extinguisher'
 
         from django.db.models import Q
-        type_filter_q = Q(pk__in=[])
 
         for mod in inspection_modules:
             if user.has_perm_custom(mod['key'], 'view'):
@@ -176,13 +212,11 @@ class MatrixContextMixin:
                 allowed_types.append(mod['name'])
                 model_mapping[mod['name']] = mod['model']
                 type_to_key[mod['name']] = mod['key']
-                # Filter Q for database
-                t_q = Q()
-                for p in mod['patterns']:
-                    t_q |= Q(inspection_type__icontains=p)
-                type_filter_q |= t_q
 
-        found_types = list(InspectionSchedule.objects.filter(type_filter_q).values_list('inspection_type', flat=True).distinct())
+        # Filter Q for database (module_key indexado)
+        type_filter_q = Q(module_key__in=allowed_keys)
+
+        found_types = facets.schedule_types(allowed_keys)
         all_types = sorted(list(set(allowed_types + found_types)))
 
         # New context for filter dropdown
@@ -355,10 +389,10 @@ class ScheduledInspectionsMixin:
     Mixin to add pending scheduled inspections to any inspection module list view.
     Automatically filters by inspection type based on the module.
     """
-    # Map of module types to their inspection_type keywords
+    # Module types with scheduled inspections (InspectionSchedule.module_key)
     INSPECTION_TYPE_MAP = {
         'extinguisher': 'Extintores',
-        'first_aid': 'Botiquin',
+        'first_aid': 'Botiquines',
         'process': 'Instalaciones de Proceso',
         'storage': 'Almacenamiento',
         'forklift': 'Montacargas',
@@ -371,10 +405,8 @@ class ScheduledInspectionsMixin:
         context = super().get_context_data(**kwargs)
         
         if self.inspection_module_type and self.inspection_module_type in self.INSPECTION_TYPE_MAP:
-            keyword = self.INSPECTION_TYPE_MAP[self.inspection_module_type]
-            
             qs = InspectionSchedule.objects.filter(
-                inspection_type__icontains=keyword
+                module_key=self.inspection_module_type
             )
             
             schedule_id = self.request.GET.get('schedule_id')
@@ -413,22 +445,10 @@ class InspectionListView(LoginRequiredMixin, RolePermissionRequiredMixin, Matrix
         
         # Permission filter
         from django.db.models import Q
-        inspection_modules = [
-            {'key': 'extinguisher', 'patterns': ['extintor']},
-            {'key': 'first_aid', 'patterns': ['botiquin']},
-            {'key': 'process', 'patterns': ['proceso', 'instalacion']},
-            {'key': 'storage', 'patterns': ['almacen', 'storage']},
-            {'key': 'forklift', 'patterns': ['montacarga']},
-        ]
-        type_filter_q = Q(pk__in=[])
-        for mod in inspection_modules:
-            if user.has_perm_custom(mod['key'], 'view'):
-                t_q = Q()
-                for p in mod['patterns']:
-                    t_q |= Q(inspection_type__icontains=p)
-                type_filter_q |= t_q
+        module_keys = ['extinguisher', 'first_aid', 'process', 'storage', 'forklift']
+        allowed_keys = [key for key in module_keys if user.has_perm_custom(key, 'view')]
         
-        qs = qs.filter(type_filter_q)
+        qs = qs.filter(module_key__in=allowed_keys)
         
         get_year = self.request.GET.get('year')
         selected_year = str(date.today().year) if get_year is None else get_year
@@ -556,16 +576,12 @@ class InspectionListView(LoginRequiredMixin, RolePermissionRequiredMixin, Matrix
         all_areas = set()
         
         for model in allowed_models_for_filters:
-            years = model.objects.values_list('inspection_date__year', flat=True).distinct()
-            all_years.update(years)
-            areas = model.objects.values_list('area__id', 'area__name').distinct()
-            all_areas.update(areas)
+            all_years.update(facets.inspection_years(model))
+            all_areas.update(facets.inspection_areas(model))
         
         # Also include years/areas from schedule
-        schedule_years = InspectionSchedule.objects.values_list('scheduled_date__year', flat=True).distinct()
-        all_years.update(schedule_years)
-        schedule_areas = InspectionSchedule.objects.values_list('area__id', 'area__name').distinct()
-        all_areas.update(schedule_areas)
+        all_years.update(facets.schedule_years())
+        all_areas.update(facets.schedule_areas())
         
         # Ensure current year is always present
         all_years.add(current_year)
@@ -742,6 +758,46 @@ class FormsetMixin:
         return super().form_valid(form)
 
 # 1. Extinguishers
+class SignInspectionMixin:
+    """
+    Firma de una inspección por un participante (POST).
+    Toda la lógica de validación, cierre y seguimiento vive en
+    `services.sign_inspection`; aquí solo se traducen los resultados a mensajes.
+    """
+    module_key = None
+
+    def post(self, request, pk):
+        config = SIGNATURE_MODULES[self.module_key]
+        detail_url = config['detail_url']
+        result = sign_inspection(self.module_key, pk, request.user)
+        outcome = result['outcome']
+
+        if outcome == 'not_participant':
+            messages.error(request, 'No está en la lista de participantes.')
+        elif outcome == 'already_signed':
+            messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
+        elif outcome == 'no_signature_profile':
+            messages.error(request, 'Debe registrar su firma en el perfil.')
+        elif outcome == 'closed':
+            messages.error(request, 'La inspección ya está cerrada.')
+        elif outcome == 'pending':
+            messages.success(request, 'Firma registrada. Pendiente de firmas de otros participantes.')
+        elif outcome == 'follow_up':
+            follow_up_date = result['follow_up'].inspection_date
+            messages.info(request, f"Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime('%d/%m/%Y')}")
+        elif result['inspection'].parent_inspection_id:
+            if result['parent_closed']:
+                messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
+            else:
+                messages.success(request, 'Seguimiento completado.')
+        else:
+            next_s = result['next_schedule']
+            if next_s:
+                messages.info(request, f"📅 Nueva programación generada para {next_s.scheduled_date}")
+            messages.success(request, 'Inspección cerrada exitosamente.')
+
+        return redirect(detail_url, pk=pk)
+
 class ExtinguisherListView(LoginRequiredMixin, RolePermissionRequiredMixin, ScheduledInspectionsMixin, ListView):
     permission_required = ('extinguisher', 'view')
     model = ExtinguisherInspection
@@ -975,148 +1031,14 @@ class ExtinguisherDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, Ev
         
         return context
 
-class SignExtinguisherInspectionView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        inspection = get_object_or_404(ExtinguisherInspection, pk=pk)
-        user = request.user
-        
-        # STEP 1: Participant Validation
-        participants = inspection.get_participants()
-        if user not in participants:
-             messages.error(request, 'No está en la lista de participantes.')
-             return redirect('extinguisher_detail', pk=pk)
-             
-        # DUPLICATE VALIDATION
-        if inspection.signatures.filter(user=user).exists():
-             messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
-             return redirect('extinguisher_detail', pk=pk)
-
-        # STEP 2: Signature Profile Validation
-        if not getattr(user, 'digital_signature', None):
-             messages.error(request, 'Debe registrar su firma en el perfil.')
-             return redirect('extinguisher_detail', pk=pk)
-             
-        if inspection.status in ['Cerrada', 'Cerrada con Hallazgos']:
-             messages.error(request, 'La inspección ya está cerrada.')
-             return redirect('extinguisher_detail', pk=pk)
-
-        # Record signature
-        InspectionSignature.objects.create(
-            inspection=inspection,
-            user=user,
-            signature=user.digital_signature
-        )
-        
-        # CHECK IF ALL SIGNED
-        all_participants = inspection.get_participants()
-        signatures_count = inspection.signatures.count()
-        
-        if signatures_count >= all_participants.count():
-            # FULL CLOSURE LOGIC
-            failed_items = inspection.items.filter(status__in=['Malo', 'Recargar'])
-            
-            if failed_items.exists():
-                inspection.status = 'Seguimiento en proceso'
-                inspection.save()
-                
-                # Generación de Seguimiento
-                from system_config.models import SystemConfig
-                days = SystemConfig.get_value('dias_seguimiento_auto', 15)
-                follow_up_date = timezone.now().date() + timedelta(days=days)
-                
-                follow_up = ExtinguisherInspection.objects.create(
-                    parent_inspection=inspection,
-                    area=inspection.area,
-                    asset=inspection.asset,
-                    inspector=inspection.inspector, 
-                    inspector_role=inspection.inspector_role,
-                    inspection_date=follow_up_date,
-                    status='Programada',
-                )
-                
-                for item in failed_items:
-                    target_asset_id = item.asset_id or inspection.asset_id
-                    new_item = ExtinguisherItem.objects.create(
-                        inspection=follow_up,
-                        asset_id=target_asset_id,
-                        pressure_gauge_ok=item.pressure_gauge_ok,
-                        safety_pin_ok=item.safety_pin_ok,
-                        hose_nozzle_ok=item.hose_nozzle_ok,
-                        signage_ok=item.signage_ok,
-                        access_ok=item.access_ok,
-                        label_ok=item.label_ok,
-                        status='Malo',
-                        observations=f"Seguimiento: {item.observations}"[:255] if item.observations else "Seguimiento pendiente",
-                        registered_by=user
-                    )
-                    # Copiar evidencias del ítem original al nuevo ítem de seguimiento
-                    from django.contrib.contenttypes.models import ContentType
-                    import shutil, os
-                    from django.core.files.base import ContentFile
-                    item_ct = ContentType.objects.get_for_model(ExtinguisherItem)
-                    for evidence in InspectionEvidence.objects.filter(content_type=item_ct, object_id=item.pk):
-                        try:
-                            evidence.image.open('rb')
-                            file_content = evidence.image.read()
-                            evidence.image.close()
-                            orig_name = os.path.basename(evidence.image.name)
-                            InspectionEvidence.objects.create(
-                                content_type=item_ct,
-                                object_id=new_item.pk,
-                                description=evidence.description,
-                                uploaded_by=evidence.uploaded_by,
-                                image=ContentFile(file_content, name=orig_name)
-                            )
-                        except Exception:
-                            pass  # Si la imagen no se puede copiar, continuar sin bloquear
-                
-                try:
-                    jefes_group = NotificationGroup.objects.get(name="Jefes", is_active=True)
-                    for boss in jefes_group.users.all():
-                        Notification.objects.create(
-                            user=boss,
-                            title=f"Hallazgos Críticos - Inspección #{inspection.pk}",
-                            message=f"Se ha cerrado la inspección de extintores en {inspection.area} con hallazgos. Se generó seguimiento automático.",
-                            link=reverse('extinguisher_detail', kwargs={'pk': follow_up.pk}),
-                            notification_type='alert'
-                        )
-                except: pass
-                messages.success(request, f'Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime("%d/%m/%Y")}.')
-            else:
-                inspection.status = 'Cerrada'
-                inspection.save()
-                
-                # SI ES UN SEGUIMIENTO, verificar si el padre ya se puede cerrar definitivamente
-                if inspection.parent_inspection:
-                    curr = inspection
-                    parent_updated = False
-                    while curr.parent_inspection:
-                        p = curr.parent_inspection
-                        # Solo cerramos el padre si todos sus hijos directos están en estados terminales
-                        if not p.follow_ups.exclude(status__in=['Cerrada', 'Cerrada con seguimientos']).exists():
-                            p.status = 'Cerrada con seguimientos'
-                            p.save()
-                            curr = p
-                            parent_updated = True
-                        else:
-                            break
-                    if parent_updated:
-                        messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
-                    else:
-                        messages.success(request, 'Seguimiento completado.')
-                else:
-                    messages.success(request, 'Inspección cerrada exitosamente.')
-        else:
-            inspection.status = 'En proceso'
-            inspection.save()
-            messages.success(request, 'Firma registrada exitosamente. Pendiente de firmas de otros participantes.')
-            
-        return redirect('extinguisher_detail', pk=pk)
+class SignExtinguisherInspectionView(LoginRequiredMixin, SignInspectionMixin, View):
+    module_key = 'extinguisher'
 
-class ExtinguisherReportView(LoginRequiredMixin, RolePermissionRequiredMixin, EvidenceMixin, DetailView):
+class ExtinguisherReportView(LoginRequiredMixin, RolePermissionRequiredMixin, ClosedReportCacheMixin, EvidenceMixin, DetailView):
     permission_required = ('extinguisher', 'details')
     model = ExtinguisherInspection
     template_name = 'inspections/extinguisher_report.html'
+    report_body_template = 'inspections/includes/extinguisher_report_body.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1307,123 +1229,14 @@ class FirstAidDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, Eviden
 
         return context
 
-class SignFirstAidInspectionView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        inspection = get_object_or_404(FirstAidInspection, pk=pk)
-        user = request.user
-        
-        # STEP 1: Participant Validation
-        participants = inspection.get_participants()
-        if user not in participants:
-             messages.error(request, 'No está en la lista de participantes.')
-             return redirect('first_aid_detail', pk=pk)
-             
-        # DUPLICATE VALIDATION
-        if inspection.signatures.filter(user=user).exists():
-             messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
-             return redirect('first_aid_detail', pk=pk)
-
-        # STEP 2: Signature Profile Validation
-        if not getattr(user, 'digital_signature', None):
-             messages.error(request, 'Debe registrar su firma en el perfil.')
-             return redirect('first_aid_detail', pk=pk)
-             
-        if inspection.status in ['Cerrada', 'Cerrada con Hallazgos']:
-             messages.error(request, 'La inspección ya está cerrada.')
-             return redirect('first_aid_detail', pk=pk)
-
-        # Record signature
-        from .models import FirstAidSignature, FirstAidItem
-        FirstAidSignature.objects.create(
-            inspection=inspection,
-            user=user,
-            signature=user.digital_signature
-        )
-        
-        # CHECK IF ALL SIGNED
-        all_participants = inspection.get_participants()
-        signatures_count = inspection.signatures.count()
-        
-        if signatures_count >= all_participants.count():
-            missing_items = inspection.items.filter(status='No Existe')
-            if missing_items.exists():
-                inspection.status = 'Seguimiento en proceso'
-                inspection.general_status = 'No Cumple'
-                inspection.save()
-                
-                from system_config.models import SystemConfig
-                days = SystemConfig.get_value('dias_seguimiento_auto', 15)
-                follow_up_date = timezone.now().date() + timedelta(days=days)
-                follow_up = FirstAidInspection.objects.create(
-                    parent_inspection=inspection,
-                    area=inspection.area,
-                    inspector=inspection.inspector,
-                    inspector_role=inspection.inspector_role,
-                    asset=inspection.asset,  # propagar mismo botiquín
-                    inspection_date=follow_up_date,
-                    status='Programada',
-                )
-                for item in missing_items:
-                    new_item = FirstAidItem.objects.create(
-                        inspection=follow_up,
-                        element_name=item.element_name,
-                        quantity=item.quantity,
-                        expiration_date=item.expiration_date,
-                        status='No Existe',
-                        observations=f"Seguimiento: {item.observations}"[:255] if item.observations else "Seguimiento"
-                    )
-                    # Copy evidences from the parent item to the new follow-up item
-                    for evidence in item.evidences.all():
-                        InspectionEvidence.objects.create(
-                            content_type=evidence.content_type,
-                            object_id=new_item.pk,
-                            image=evidence.image,
-                            description=evidence.description,
-                            uploaded_by=evidence.uploaded_by,
-                        )
-                messages.info(request, f"Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime('%d/%m/%Y')}")
-            else:
-                inspection.status = 'Cerrada'
-                inspection.general_status = 'Cumple'
-                inspection.save()
-                
-                # SI ES UN SEGUIMIENTO, verificar si el padre ya se puede cerrar definitivamente
-                if inspection.parent_inspection:
-                    curr = inspection
-                    parent_updated = False
-                    while curr.parent_inspection:
-                        p = curr.parent_inspection
-                        if not p.follow_ups.exclude(status__in=['Cerrada', 'Cerrada con seguimientos']).exists():
-                            p.status = 'Cerrada con seguimientos'
-                            p.save()
-                            curr = p
-                            parent_updated = True
-                        else:
-                            break
-                    if parent_updated:
-                        messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
-                    else:
-                        messages.success(request, 'Seguimiento completado.')
-                else:
-                    if inspection.schedule_item:
-                        s_item = inspection.schedule_item
-                        s_item.status = 'Realizada'
-                        s_item.save()
-                        next_s = s_item.generate_next_schedule()
-                        if next_s:
-                            messages.info(request, f"📅 Nueva programación generada para {next_s.scheduled_date}")
-                    messages.success(request, 'Inspección cerrada por completar todas las firmas.')
-        else:
-            inspection.status = 'En proceso'
-            inspection.save()
-            messages.success(request, 'Firma registrada. Pendiente de firmas de otros participantes.')
-        
-        return redirect('first_aid_detail', pk=pk)
+class SignFirstAidInspectionView(LoginRequiredMixin, SignInspectionMixin, View):
+    module_key = 'first_aid'
 
-class FirstAidReportView(LoginRequiredMixin, RolePermissionRequiredMixin, EvidenceMixin, DetailView):
+class FirstAidReportView(LoginRequiredMixin, RolePermissionRequiredMixin, ClosedReportCacheMixin, EvidenceMixin, DetailView):
     permission_required = ('first_aid', 'details')
     model = FirstAidInspection
     template_name = 'inspections/first_aid_report.html'
+    report_body_template = 'inspections/includes/first_aid_report_body.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1643,132 +1456,14 @@ class ProcessDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, Evidenc
         
         return context
 
-class SignProcessInspectionView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        inspection = get_object_or_404(ProcessInspection, pk=pk)
-        user = request.user
-        
-        # STEP 1: Participant Validation
-        participants = inspection.get_participants()
-        if user not in participants:
-             messages.error(request, 'No está en la lista de participantes.')
-             return redirect('process_detail', pk=pk)
-             
-        # DUPLICATE VALIDATION
-        if inspection.signatures.filter(user=user).exists():
-             messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
-             return redirect('process_detail', pk=pk)
-
-        # STEP 2: Signature Profile Validation
-        if not getattr(user, 'digital_signature', None):
-             messages.error(request, 'Debe registrar su firma en el perfil.')
-             return redirect('process_detail', pk=pk)
-             
-        if inspection.status in ['Cerrada', 'Cerrada con Hallazgos']:
-             messages.error(request, 'La inspección ya está cerrada.')
-             return redirect('process_detail', pk=pk)
-
-        # Record signature
-        ProcessSignature.objects.create(
-            inspection=inspection,
-            user=user,
-            signature=user.digital_signature
-        )
-        
-        # CHECK IF ALL SIGNED
-        all_participants = inspection.get_participants()
-        signatures_count = inspection.signatures.count()
-        
-        if signatures_count >= all_participants.count():
-            failed_items = inspection.items.filter(item_status='Malo')
-            if failed_items.exists():
-                inspection.status = 'Seguimiento en proceso'
-                inspection.save()
-                
-                from system_config.models import SystemConfig
-                days = SystemConfig.get_value('dias_seguimiento_auto', 15)
-                follow_up_date = timezone.now().date() + timedelta(days=days)
-                
-                follow_up = ProcessInspection.objects.create(
-                    parent_inspection=inspection,
-                    area=inspection.area,
-                    inspector=inspection.inspector, 
-                    inspector_role=inspection.inspector_role,
-                    inspected_process=inspection.inspected_process,
-                    inspection_date=follow_up_date,
-                    status='Programada',
-                )
-                for item in failed_items:
-                    new_item = ProcessCheckItem.objects.create(
-                        inspection=follow_up,
-                        question=item.question,
-                        response='No',
-                        item_status='Malo',
-                        observations=f"Seguimiento: {item.observations}"[:255] if item.observations else "Seguimiento"
-                    )
-                    # Copiar evidencias del ítem original al nuevo ítem del seguimiento
-                    from django.core.files.base import ContentFile
-                    from django.contrib.contenttypes.models import ContentType
-                    import os
-                    item_ct = ContentType.objects.get_for_model(ProcessCheckItem)
-                    for evidence in item.evidences.all():
-                        try:
-                            original_name = os.path.basename(evidence.image.name)
-                            evidence.image.open('rb')
-                            file_content = ContentFile(evidence.image.read(), name=original_name)
-                            evidence.image.close()
-                            InspectionEvidence.objects.create(
-                                content_type=item_ct,
-                                object_id=new_item.pk,
-                                image=file_content,
-                                description=evidence.description or '',
-                                uploaded_by=evidence.uploaded_by
-                            )
-                        except Exception as e:
-                            import logging
-                            logging.getLogger(__name__).warning(f"No se pudo copiar evidencia {evidence.pk}: {e}")
-                messages.info(request, f"Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime('%d/%m/%Y')}")
-            else:
-                inspection.status = 'Cerrada'
-                inspection.save()
-                
-                # SI ES UN SEGUIMIENTO, verificar si el padre ya se puede cerrar definitivamente
-                if inspection.parent_inspection:
-                    curr = inspection
-                    parent_updated = False
-                    while curr.parent_inspection:
-                        p = curr.parent_inspection
-                        if not p.follow_ups.exclude(status__in=['Cerrada', 'Cerrada con seguimientos']).exists():
-                            p.status = 'Cerrada con seguimientos'
-                            p.save()
-                            curr = p
-                            parent_updated = True
-                        else:
-                            break
-                    if parent_updated:
-                        messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
-                    else:
-                        messages.success(request, 'Seguimiento completado.')
-                else:
-                    if inspection.schedule_item:
-                        s_item = inspection.schedule_item
-                        s_item.status = 'Realizada'
-                        s_item.save()
-                        next_s = s_item.generate_next_schedule()
-                        if next_s:
-                            messages.info(request, f"📅 Nueva programación generada para {next_s.scheduled_date}")
-                    messages.success(request, 'Inspección cerrada exitosamente.')
-        else:
-            inspection.status = 'En proceso'
-            inspection.save()
-            messages.success(request, 'Firma registrada. Pendiente de firmas de otros participantes.')
-        
-        return redirect('process_detail', pk=pk)
+class SignProcessInspectionView(LoginRequiredMixin, SignInspectionMixin, View):
+    module_key = 'process'
 
-class ProcessReportView(LoginRequiredMixin, RolePermissionRequiredMixin, EvidenceMixin, DetailView):
+class ProcessReportView(LoginRequiredMixin, RolePermissionRequiredMixin, ClosedReportCacheMixin, EvidenceMixin, DetailView):
     permission_required = ('process', 'details')
     model = ProcessInspection
     template_name = 'inspections/process_report.html'
+    report_body_template = 'inspections/includes/process_report_body.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1950,132 +1645,14 @@ class StorageDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, Evidenc
         
         return context
 
-class SignStorageInspectionView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        inspection = get_object_or_404(StorageInspection, pk=pk)
-        user = request.user
-        
-        # STEP 1: Participant Validation
-        participants = inspection.get_participants()
-        if user not in participants:
-             messages.error(request, 'No está en la lista de participantes.')
-             return redirect('storage_detail', pk=pk)
-             
-        # DUPLICATE VALIDATION
-        if inspection.signatures.filter(user=user).exists():
-             messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
-             return redirect('storage_detail', pk=pk)
-
-        # STEP 2: Signature Profile Validation
-        if not getattr(user, 'digital_signature', None):
-             messages.error(request, 'Debe registrar su firma en el perfil.')
-             return redirect('storage_detail', pk=pk)
-             
-        if inspection.status in ['Cerrada', 'Cerrada con Hallazgos']:
-             messages.error(request, 'La inspección ya está cerrada.')
-             return redirect('storage_detail', pk=pk)
-
-        # Record signature
-        StorageSignature.objects.create(
-            inspection=inspection,
-            user=user,
-            signature=user.digital_signature
-        )
-        
-        # CHECK IF ALL SIGNED
-        all_participants = inspection.get_participants()
-        signatures_count = inspection.signatures.count()
-        
-        if signatures_count >= all_participants.count():
-            failed_items = inspection.items.filter(item_status='Malo')
-            if failed_items.exists():
-                inspection.status = 'Seguimiento en proceso'
-                inspection.save()
-                
-                from system_config.models import SystemConfig
-                days = SystemConfig.get_value('dias_seguimiento_auto', 15)
-                follow_up_date = timezone.now().date() + timedelta(days=days)
-                
-                follow_up = StorageInspection.objects.create(
-                    parent_inspection=inspection,
-                    area=inspection.area,
-                    inspector=inspection.inspector, 
-                    inspector_role=inspection.inspector_role,
-                    inspected_process=inspection.inspected_process,
-                    inspection_date=follow_up_date,
-                    status='Programada',
-                )
-                for item in failed_items:
-                    new_item = StorageCheckItem.objects.create(
-                        inspection=follow_up,
-                        question=item.question,
-                        response='No',
-                        item_status='Malo',
-                        observations=f"Seguimiento: {item.observations}"[:255] if item.observations else "Seguimiento"
-                    )
-                    # Copiar evidencias del ítem original al nuevo ítem del seguimiento
-                    from django.core.files.base import ContentFile
-                    from django.contrib.contenttypes.models import ContentType
-                    import os
-                    item_ct = ContentType.objects.get_for_model(StorageCheckItem)
-                    for evidence in item.evidences.all():
-                        try:
-                            original_name = os.path.basename(evidence.image.name)
-                            evidence.image.open('rb')
-                            file_content = ContentFile(evidence.image.read(), name=original_name)
-                            evidence.image.close()
-                            InspectionEvidence.objects.create(
-                                content_type=item_ct,
-                                object_id=new_item.pk,
-                                image=file_content,
-                                description=evidence.description or '',
-                                uploaded_by=evidence.uploaded_by
-                            )
-                        except Exception as e:
-                            import logging
-                            logging.getLogger(__name__).warning(f"No se pudo copiar evidencia {evidence.pk}: {e}")
-                messages.info(request, f"Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime('%d/%m/%Y')}")
-            else:
-                inspection.status = 'Cerrada'
-                inspection.save()
-                
-                # SI ES UN SEGUIMIENTO, verificar si el padre ya se puede cerrar definitivamente
-                if inspection.parent_inspection:
-                    curr = inspection
-                    parent_updated = False
-                    while curr.parent_inspection:
-                        p = curr.parent_inspection
-                        if not p.follow_ups.exclude(status__in=['Cerrada', 'Cerrada con seguimientos']).exists():
-                            p.status = 'Cerrada con seguimientos'
-                            p.save()
-                            curr = p
-                            parent_updated = True
-                        else:
-                            break
-                    if parent_updated:
-                        messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
-                    else:
-                        messages.success(request, 'Seguimiento completado.')
-                else:
-                    if inspection.schedule_item:
-                        s_item = inspection.schedule_item
-                        s_item.status = 'Realizada'
-                        s_item.save()
-                        next_s = s_item.generate_next_schedule()
-                        if next_s:
-                            messages.info(request, f"📅 Nueva programación generada para {next_s.scheduled_date}")
-                    messages.success(request, 'Inspección cerrada exitosamente.')
-        else:
-            inspection.status = 'En proceso'
-            inspection.save()
-            messages.success(request, 'Firma registrada. Pendiente de firmas de otros participantes.')
-        
-        return redirect('storage_detail', pk=pk)
+class SignStorageInspectionView(LoginRequiredMixin, SignInspectionMixin, View):
+    module_key = 'storage'
 
-class StorageReportView(LoginRequiredMixin, RolePermissionRequiredMixin, EvidenceMixin, DetailView):
+class StorageReportView(LoginRequiredMixin, RolePermissionRequiredMixin, ClosedReportCacheMixin, EvidenceMixin, DetailView):
     permission_required = ('storage', 'details')
     model = StorageInspection
     template_name = 'inspections/storage_report.html'
+    report_body_template = 'inspections/includes/storage_report_body.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -2247,134 +1824,14 @@ class ForkliftDetailView(LoginRequiredMixin, RolePermissionRequiredMixin, Eviden
         
         return context
 
-class SignForkliftInspectionView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        inspection = get_object_or_404(ForkliftInspection, pk=pk)
-        user = request.user
-        
-        # STEP 1: Participant Validation
-        participants = inspection.get_participants()
-        if user not in participants:
-             messages.error(request, 'No está en la lista de participantes.')
-             return redirect('forklift_detail', pk=pk)
-             
-        # DUPLICATE VALIDATION
-        if inspection.signatures.filter(user=user).exists():
-             messages.warning(request, 'Firmado (ya ha realizado su firma previamente).')
-             return redirect('forklift_detail', pk=pk)
-
-        # STEP 2: Signature Profile Validation
-        if not getattr(user, 'digital_signature', None):
-             messages.error(request, 'Debe registrar su firma en el perfil.')
-             return redirect('forklift_detail', pk=pk)
-             
-        if inspection.status in ['Cerrada', 'Cerrada con Hallazgos']:
-             messages.error(request, 'La inspección ya está cerrada.')
-             return redirect('forklift_detail', pk=pk)
-
-        # Record signature
-        ForkliftSignature.objects.create(
-            inspection=inspection,
-            user=user,
-            signature=user.digital_signature
-        )
-        
-        # CHECK IF ALL SIGNED
-        all_participants = inspection.get_participants()
-        signatures_count = inspection.signatures.count()
-        
-        if signatures_count >= all_participants.count():
-            failed_items = inspection.items.filter(item_status='Malo')
-            if failed_items.exists():
-                inspection.status = 'Seguimiento en proceso'
-                inspection.save()
-                
-                from system_config.models import SystemConfig
-                days = SystemConfig.get_value('dias_seguimiento_auto', 15)
-                follow_up_date = timezone.now().date() + timedelta(days=days)
-                
-                follow_up = ForkliftInspection.objects.create(
-                    parent_inspection=inspection,
-                    area=inspection.area,
-                    asset=inspection.asset,
-                    inspector=inspection.inspector, 
-                    inspector_role=inspection.inspector_role,
-                    inspection_date=follow_up_date,
-                    status='Programada',
-                    forklift_type=inspection.forklift_type
-                )
-                # Evaluar failed_items en lista ANTES de cambiar el estado de la inspección
-                failed_items_list = list(failed_items.select_related().prefetch_related('evidences'))
-                logger.info(f"[ForkliftSign] Inspeccion #{inspection.pk}: {len(failed_items_list)} items Malo encontrados")
-                for item in failed_items_list:
-                    logger.info(f"  - Item pk={item.pk} question='{item.question[:40]}' evidencias={item.evidences.count()}")
-
-                item_ct = ContentType.objects.get_for_model(ForkliftCheckItem)
-                for item in failed_items_list:
-                    new_item = ForkliftCheckItem.objects.create(
-                        inspection=follow_up,
-                        question=item.question,
-                        response=item.response,
-                        item_status='Malo',
-                        observations=f"Seguimiento: {item.observations}"[:255] if item.observations else "Seguimiento"
-                    )
-                    # Copiar evidencias del ítem original al nuevo ítem
-                    for evidence in item.evidences.all():
-                        try:
-                            with default_storage.open(evidence.image.name, 'rb') as f:
-                                file_data = f.read()
-                            original_name = os.path.basename(evidence.image.name)
-                            InspectionEvidence.objects.create(
-                                content_type=item_ct,
-                                object_id=new_item.pk,
-                                image=ContentFile(file_data, name=original_name),
-                                description=evidence.description or ''
-                            )
-                            logger.info(f"    Evidencia {evidence.pk} copiada al nuevo item {new_item.pk}")
-                        except Exception as e:
-                            logger.error(f"    ERROR copiando evidencia {evidence.pk}: {e}", exc_info=True)
-                messages.info(request, f"Inspección finalizada con hallazgos. Seguimiento generado para {follow_up_date.strftime('%d/%m/%Y')}")
-            else:
-                inspection.status = 'Cerrada'
-                inspection.save()
-                
-                # SI ES UN SEGUIMIENTO, verificar si el padre ya se puede cerrar definitivamente
-                if inspection.parent_inspection:
-                    curr = inspection
-                    parent_updated = False
-                    while curr.parent_inspection:
-                        p = curr.parent_inspection
-                        if not p.follow_ups.exclude(status__in=['Cerrada', 'Cerrada con seguimientos']).exists():
-                            p.status = 'Cerrada con seguimientos'
-                            p.save()
-                            curr = p
-                            parent_updated = True
-                        else:
-                            break
-                    if parent_updated:
-                        messages.success(request, 'Seguimiento completado y jerarquía de inspecciones cerrada.')
-                    else:
-                        messages.success(request, 'Seguimiento completado.')
-                else:
-                    if inspection.schedule_item:
-                        s_item = inspection.schedule_item
-                        s_item.status = 'Realizada'
-                        s_item.save()
-                        next_s = s_item.generate_next_schedule()
-                        if next_s:
-                            messages.info(request, f"📅 Nueva programación generada para {next_s.scheduled_date}")
-                    messages.success(request, 'Inspección cerrada exitosamente.')
-        else:
-            inspection.status = 'En proceso'
-            inspection.save()
-            messages.success(request, 'Firma registrada. Pendiente de firmas de otros participantes.')
-        
-        return redirect('forklift_detail', pk=pk)
+class SignForkliftInspectionView(LoginRequiredMixin, SignInspectionMixin, View):
+    module_key = 'forklift'
 
-class ForkliftReportView(LoginRequiredMixin, RolePermissionRequiredMixin, EvidenceMixin, DetailView):
+class ForkliftReportView(LoginRequiredMixin, RolePermissionRequiredMixin, ClosedReportCacheMixin, EvidenceMixin, DetailView):
     permission_required = ('forklift', 'details')
     model = ForkliftInspection
     template_name = 'inspections/forklift_report.html'
+    report_body_template = 'inspections/includes/forklift_report_body.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -2433,7 +1890,7 @@ class InspectionReportView(RolePermissionRequiredMixin, TemplateView):
             return qs
 
         # A. Process Scheduled items (InspectionSchedule)
-        schedule_qs = InspectionSchedule.objects.all().select_related('area', 'responsible')
+        schedule_qs = InspectionSchedule.objects.with_inspection_status().select_related('area', 'responsible')
         schedule_qs = apply_filters(schedule_qs, 'scheduled_date')
         if f_type:
              # Match by keyword since inspection_type is a string field
@@ -2540,13 +1997,11 @@ class InspectionReportView(RolePermissionRequiredMixin, TemplateView):
         all_years.add(date.today().year) # Always include current year
         
         # Years from schedule
-        sched_years = InspectionSchedule.objects.values_list('scheduled_date__year', flat=True).distinct()
-        all_years.update([y for y in sched_years if y])
+        all_years.update(facets.schedule_years())
         
         # Years from modules
         for model_cls, label, _ in inspection_modules:
-            mod_years = model_cls.objects.values_list('inspection_date__year', flat=True).distinct()
-            all_years.update([y for y in mod_years if y])
+            all_years.update(facets.inspection_years(model_cls))
             
         context['years_data'] = sorted(list(all_years), reverse=True)
         
@@ -2614,7 +2069,7 @@ class InspectionReportExportView(RolePermissionRequiredMixin, View):
         consolidated = []
 
         # Scheduled
-        schedule_qs = InspectionSchedule.objects.all().select_related('area', 'responsible')
+        schedule_qs = InspectionSchedule.objects.with_inspection_status().select_related('area', 'responsible')
         schedule_qs = apply_filters(schedule_qs, 'scheduled_date')
         if f_type: schedule_qs = schedule_qs.filter(inspection_type__icontains=f_type)
         if f_responsible: schedule_qs = schedule_qs.filter(responsible_id=f_responsible)
@@ -2756,6 +2211,6 @@ class EvidenceDeleteView(LoginRequiredMixin, View):
         if inspection and hasattr(inspection, 'status') and inspection.status in CLOSED_STATUSES:
              return JsonResponse({'error': 'No se pueden eliminar evidencias de una inspección cerrada'}, status=403)
 
-        evidence.image.delete() # Remove file
+        delete_evidence_file(evidence)  # Remove file (solo si no lo comparte un seguimiento)
         evidence.delete()
         return JsonResponse({'success': True})
@@ -35,6 +35,9 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
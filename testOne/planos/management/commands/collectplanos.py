@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planos.models import PlanoSVG
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin el paquete 'brotli' solo se generan .gz
+    brotli = None
+
+
+# Metadatos del editor (Inkscape / Sodipodi) que no afectan el render
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_XML_DECL_RE = re.compile(r'<\?xml[^>]*\?>')
+_EDITOR_ELEMENT_RE = re.compile(
+    r'<(sodipodi:namedview|metadata)\b[^>]*?(?:/>|>.*?</\1\s*>)', re.S
+)
+_EDITOR_ATTR_RE = re.compile(r'\s+(?:inkscape|sodipodi):[\w.-]+\s*=\s*"[^"]*"')
+_EDITOR_NS_RE = re.compile(r'\s+xmlns:(?:inkscape|sodipodi)\s*=\s*"[^"]*"')
+_ID_ATTR_RE = re.compile(r'\s+id\s*=\s*"([^"]*)"')
+_ID_REF_RE = re.compile(r'#([\w.:-]+)')
+_GEOMETRY_ATTR_RE = re.compile(r'(\s(?:d|points|transform)\s*=\s*")([^"]*)(")')
+_NUMBER_RE = re.compile(r'-?\d+\.\d+')
+_TAG_GAP_RE = re.compile(r'>\s+<')
+_SPACES_RE = re.compile(r'\s+')
+_LENGTH_RE = re.compile(r'^\s*([\d.]+)\s*(px)?\s*$')
+_START_TAG_RE = re.compile(r'<[a-zA-Z][^>]*>')
+_STYLE_ATTR_RE = re.compile(r'\sstyle="([^"]*)"')
+_SVG_OPEN_RE = re.compile(r'(<svg\b[^>]*>)')
+
+
+def minify_svg(source, precision=3):
+    """Minificación conservadora: sin comentarios, metadatos del editor ni ids sin referencias."""
+    svg = _XML_DECL_RE.sub('', _COMMENT_RE.sub('', source))
+    svg = _EDITOR_ELEMENT_RE.sub('', svg)
+    svg = _EDITOR_NS_RE.sub('', _EDITOR_ATTR_RE.sub('', svg))
+
+    referenced = set(_ID_REF_RE.findall(svg))
+    svg = _ID_ATTR_RE.sub(lambda m: m.group(0) if m.group(1) in referenced else '', svg)
+
+    def _round(match):
+        value = f'{float(match.group(0)):.{precision}f}'.rstrip('0').rstrip('.')
+        return '0' if value in ('', '-0') else value
+
+    svg = _GEOMETRY_ATTR_RE.sub(
+        lambda m: m.group(1) + _SPACES_RE.sub(' ', _NUMBER_RE.sub(_round, m.group(2))).strip() + m.group(3), svg
+    )
+    svg = _TAG_GAP_RE.sub('><', svg)
+    svg = _SPACES_RE.sub(' ', svg).strip()
+    return _hoist_styles(svg)
+
+
+def _hoist_styles(svg):
+    """
+    Los `style` repetidos (Inkscape repite el mismo en cada trazo) pasan a clases
+    de un <style> interno. Solo en elementos sin `class` y si el SVG no trae su
+    propia hoja de estilos, para no alterar la cascada.
+    """
+    if '<style' in svg:
+        return svg
+    tags = [tag for tag in _START_TAG_RE.findall(svg) if ' class=' not in tag]
+    counts = {}
+    for tag in tags:
+        match = _STYLE_ATTR_RE.search(tag)
+        if match:
+            counts[match.group(1)] = counts.get(match.group(1), 0) + 1
+    repeated = sorted((style for style, n in counts.items() if n > 1), key=lambda style: -counts[style])
+    if not repeated:
+        return svg
+    classes = {style: f's{i}' for i, style in enumerate(repeated)}
+
+    def _replace(match):
+        tag = match.group(0)
+        if ' class=' in tag:
+            return tag
+        return _STYLE_ATTR_RE.sub(
+            lambda m: f' class="{classes[m.group(1)]}"' if m.group(1) in classes else m.group(0), tag, count=1
+        )
+
+    svg = _START_TAG_RE.sub(_replace, svg)
+    css = ''.join(f'.{name}{{{style}}}' for style, name in classes.items())
+    return _SVG_OPEN_RE.sub(lambda m: f'{m.group(1)}<style>{css}</style>', svg, count=1)
+
+
+def _length(value):
+    """Ancho/alto en px; None si usa otras unidades (mm, %, ...)."""
+    match = _LENGTH_RE.match(value or '')
+    return float(match.group(1)) if match else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Optimiza los planos SVG de PLANOS_SOURCE_DIR: minifica, genera archivos con hash\n'
+        'en el nombre (caché de larga duración) y sus versiones precomprimidas .gz/.br,\n'
+        'escribe manifest.json en PLANOS_BUILD_DIR y registra dimensiones y viewBox en PlanoSVG.\n'
+        'Ejecutar en cada despliegue antes de collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'planos',
+            nargs='*',
+            help='Planos a procesar (por defecto todos los SVG del directorio fuente).',
+        )
+        parser.add_argument(
+            '--precision',
+            type=int,
+            default=3,
+            help='Decimales conservados en la geometría (d, points, transform).',
+        )
+
+    def handle(self, *args, **options):
+        source_dir = Path(settings.PLANOS_SOURCE_DIR)
+        build_dir = Path(settings.PLANOS_BUILD_DIR)
+        # Las rutas del manifest son relativas a static/: el directorio de salida debe estar dentro
+        static_root = Path(settings.BASE_DIR) / 'static'
+        try:
+            static_prefix = build_dir.resolve().relative_to(static_root.resolve()).as_posix()
+        except ValueError:
+            raise CommandError(f'PLANOS_BUILD_DIR ({build_dir}) debe estar dentro de {static_root}.')
+        build_dir.mkdir(parents=True, exist_ok=True)
+
+        sources = sorted(source_dir.glob('*.svg'))
+        if options['planos']:
+            wanted = {p.upper() for p in options['planos']}
+            sources = [p for p in sources if p.stem.upper() in wanted]
+        if not sources:
+            raise CommandError(f'No hay planos SVG para procesar en {source_dir}.')
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('Paquete "brotli" no instalado: solo se generan archivos .gz.'))
+
+        manifest_path = build_dir / 'manifest.json'
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.exists() else {}
+
+        for source in sources:
+            plano = source.stem.upper()
+            raw = source.read_bytes()
+            minified = minify_svg(raw.decode('utf-8'), options['precision'])
+            try:
+                root = ET.fromstring(minified)
+            except ET.ParseError as exc:
+                raise CommandError(f'{source.name}: el SVG minificado no es XML válido ({exc}).')
+
+            data = minified.encode('utf-8')
+            digest = hashlib.md5(data).hexdigest()[:10]
+            filename = f'{plano}.{digest}.svg'
+
+            # Elimina versiones anteriores del mismo plano
+            for old in build_dir.glob(f'{plano}.*.svg*'):
+                if not old.name.startswith(filename):
+                    old.unlink()
+
+            (build_dir / filename).write_bytes(data)
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            (build_dir / f'{filename}.gz').write_bytes(gz)
+            br = None
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                (build_dir / f'{filename}.br').write_bytes(br)
+
+            meta = {
+                'archivo': f'{static_prefix}/{filename}',
+                'hash': digest,
+                'ancho': _length(root.get('width')),
+                'alto': _length(root.get('height')),
+                'view_box': root.get('viewBox', ''),
+                'bytes_original': len(raw),
+                'bytes_minificado': len(data),
+                'bytes_gzip': len(gz),
+                'bytes_brotli': len(br) if br is not None else None,
+            }
+            manifest[plano] = dict(meta)
+            previous_hash = PlanoSVG.objects.filter(plano=plano).values_list('hash', flat=True).first()
+            if previous_hash and previous_hash != digest:
+                # Las teselas (tileplanos) corresponden al SVG anterior: el visor vuelve al SVG completo
+                meta['teselas'] = None
+                self.stdout.write(self.style.WARNING(f'{plano}: el plano cambió; ejecute de nuevo tileplanos si usa teselas.'))
+            PlanoSVG.objects.update_or_create(plano=plano, defaults=meta)
+
+            self.stdout.write(
+                f'{plano}: {len(raw) / 1024:.0f} KB → {len(data) / 1024:.0f} KB minificado, '
+                f'{len(gz) / 1024:.0f} KB gzip' + (f', {len(br) / 1024:.0f} KB brotli' if br is not None else '')
+            )
+
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'{len(sources)} planos procesados; manifest en {manifest_path}.'))
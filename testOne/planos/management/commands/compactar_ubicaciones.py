@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from planos.models import UbicacionActivo, TrayectoriaUbicacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta el historial de ubicaciones en planos: las ubicaciones "Inactivo" más\n'
+        'antiguas que la ventana de retención se agregan a la trayectoria del activo\n'
+        '(TrayectoriaUbicacion, un registro por activo y plano) y se eliminan de\n'
+        'UbicacionActivo. Las ubicaciones activas nunca se tocan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=180,
+            help='Ventana de retención: se conservan las ubicaciones de los últimos N días (por defecto 180).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Activos procesados por transacción.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa cuántas filas se compactarían.',
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--dias debe ser >= 0 y --batch-size >= 1.')
+
+        corte = timezone.now() - timedelta(days=options['dias'])
+        antiguas = UbicacionActivo.objects.filter(estado='Inactivo', fecha_registro__lt=corte)
+        activo_ids = list(antiguas.order_by().values_list('activo_id', flat=True).distinct())
+        total = antiguas.count()
+
+        self.stdout.write(
+            f'{total} ubicaciones inactivas anteriores a {corte:%Y-%m-%d} en {len(activo_ids)} activos.'
+        )
+        if options['dry_run'] or not total:
+            return
+
+        compactadas = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(activo_ids), batch_size):
+            compactadas += self._compactar(antiguas, activo_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{compactadas} ubicaciones compactadas; quedan {UbicacionActivo.objects.count()} filas en UbicacionActivo.'
+        ))
+
+    def _compactar(self, antiguas, activo_ids):
+        with transaction.atomic():
+            filas = list(
+                antiguas.filter(activo_id__in=activo_ids)
+                .select_for_update()
+                .order_by('fecha_registro', 'id')
+                .values_list('id', 'activo_id', 'plano', 'posicion_x', 'posicion_y', 'fecha_registro', 'usuario_id')
+            )
+            puntos_por_grupo = defaultdict(list)
+            for _, activo_id, plano, x, y, fecha, usuario_id in filas:
+                puntos_por_grupo[(activo_id, plano)].append([float(x), float(y), fecha.isoformat(), usuario_id])
+
+            existentes = {
+                (t.activo_id, t.plano): t
+                for t in TrayectoriaUbicacion.objects.select_for_update().filter(activo_id__in=activo_ids)
+            }
+            nuevas, actualizadas = [], []
+            for (activo_id, plano), puntos in puntos_por_grupo.items():
+                trayectoria = existentes.get((activo_id, plano))
+                if trayectoria is None:
+                    trayectoria = TrayectoriaUbicacion(activo_id=activo_id, plano=plano, puntos=[])
+                    nuevas.append(trayectoria)
+                else:
+                    actualizadas.append(trayectoria)
+                # Fechas ISO con la misma zona: el orden lexicográfico es cronológico
+                trayectoria.puntos = sorted(trayectoria.puntos + puntos, key=lambda punto: punto[2])
+                trayectoria.fecha_inicio = parse_datetime(trayectoria.puntos[0][2])
+                trayectoria.fecha_fin = parse_datetime(trayectoria.puntos[-1][2])
+                trayectoria.total_movimientos = len(trayectoria.puntos)
+
+            TrayectoriaUbicacion.objects.bulk_create(nuevas)
+            TrayectoriaUbicacion.objects.bulk_update(
+                actualizadas, ['puntos', 'fecha_inicio', 'fecha_fin', 'total_movimientos']
+            )
+            UbicacionActivo.objects.filter(id__in=[fila[0] for fila in filas]).delete()
+        return len(filas)
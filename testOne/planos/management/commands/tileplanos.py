@@ -0,0 +1,139 @@
+import io
+import json
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from planos.models import PlanoSVG
+
+try:
+    import cairosvg
+except ImportError:  # Opcional: solo necesario para generar teselas
+    cairosvg = None
+
+
+# Escalas respecto al tamaño base del plano (ancho/alto de PlanoSVG)
+DEFAULT_SCALES = [0.25, 0.5, 1, 2, 4]
+FORMATS = {'webp': 'WEBP', 'png': 'PNG'}
+
+
+def build_levels(image, base_width, base_height, scales, tile_size, fmt, output_dir):
+    """
+    Corta `image` (rasterizada a la escala mayor) en una pirámide de teselas:
+    output_dir/<z>/<col>_<row>.<fmt>. Retorna la descripción de cada nivel.
+    """
+    levels = []
+    for z, scale in enumerate(scales):
+        width, height = max(1, round(base_width * scale)), max(1, round(base_height * scale))
+        level_image = image if image.size == (width, height) else image.resize((width, height), Image.LANCZOS)
+        cols, rows = -(-width // tile_size), -(-height // tile_size)
+        level_dir = output_dir / str(z)
+        level_dir.mkdir(parents=True, exist_ok=True)
+        for col in range(cols):
+            for row in range(rows):
+                box = (col * tile_size, row * tile_size,
+                       min((col + 1) * tile_size, width), min((row + 1) * tile_size, height))
+                tile = level_image.crop(box)
+                params = {'quality': 80, 'method': 6} if fmt == 'webp' else {'optimize': True}
+                tile.save(level_dir / f'{col}_{row}.{fmt}', FORMATS[fmt], **params)
+        levels.append({'z': z, 'scale': scale, 'width': width, 'height': height, 'cols': cols, 'rows': rows})
+    return levels
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-renderiza planos SVG como pirámide de teselas (PNG/WEBP) en PLANOS_TILES_DIR\n'
+        'y guarda el manifest en PlanoSVG.teselas; el visor de planos carga entonces solo\n'
+        'las teselas visibles al zoom actual. Requiere haber ejecutado collectplanos y el\n'
+        'paquete cairosvg. Con --clear el plano vuelve a mostrarse como SVG completo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('planos', nargs='+', help='Planos a teselar, ej: PL2P1 PL2P2.')
+        parser.add_argument('--tile-size', type=int, default=256, help='Lado de cada tesela en px.')
+        parser.add_argument(
+            '--scales',
+            default=','.join(str(s) for s in DEFAULT_SCALES),
+            help='Escalas de la pirámide respecto al tamaño base, separadas por coma.',
+        )
+        parser.add_argument('--format', choices=sorted(FORMATS), default='webp')
+        parser.add_argument('--clear', action='store_true', help='Elimina las teselas de los planos indicados.')
+
+    def handle(self, *args, **options):
+        tiles_root = Path(settings.PLANOS_TILES_DIR)
+        static_root = Path(settings.BASE_DIR) / 'static'
+        # La ruta del manifest es relativa a static/: las teselas deben quedar dentro
+        try:
+            tiles_prefix = tiles_root.resolve().relative_to(static_root.resolve())
+        except ValueError:
+            raise CommandError(f'PLANOS_TILES_DIR ({tiles_root}) debe estar dentro de {static_root}.')
+
+        for plano in (p.upper() for p in options['planos']):
+            meta = PlanoSVG.objects.filter(plano=plano).first()
+            if meta is None:
+                raise CommandError(f'{plano}: sin registro en PlanoSVG; ejecute primero collectplanos.')
+
+            if options['clear']:
+                shutil.rmtree(tiles_root / plano, ignore_errors=True)
+                meta.teselas = None
+                meta.save(update_fields=['teselas'])
+                self.stdout.write(f'{plano}: teselas eliminadas.')
+                continue
+
+            if cairosvg is None:
+                raise CommandError('Se requiere el paquete "cairosvg" para rasterizar los planos (pip install cairosvg).')
+            try:
+                scales = sorted({float(s) for s in options['scales'].split(',') if s.strip()})
+            except ValueError:
+                raise CommandError('--scales debe ser una lista de números, ej: 0.5,1,2.')
+            if not scales or scales[0] <= 0 or options['tile_size'] < 64:
+                raise CommandError('Escalas deben ser > 0 y --tile-size >= 64.')
+
+            base_width, base_height = self._base_size(meta)
+            svg_path = static_root / meta.archivo
+            top = max(scales)
+            png = cairosvg.svg2png(
+                url=str(svg_path),
+                output_width=round(base_width * top),
+                output_height=round(base_height * top),
+            )
+            image = Image.open(io.BytesIO(png)).convert('RGBA')
+
+            # Directorio con el hash del SVG: las URLs cambian cuando cambia el plano
+            output_dir = tiles_root / plano / meta.hash
+            shutil.rmtree(output_dir, ignore_errors=True)
+            levels = build_levels(
+                image, base_width, base_height, scales, options['tile_size'], options['format'], output_dir
+            )
+            # Versiones anteriores se eliminan después de escribir las nuevas
+            for old in (tiles_root / plano).iterdir():
+                if old != output_dir:
+                    shutil.rmtree(old, ignore_errors=True)
+
+            manifest = {
+                'ruta': (tiles_prefix / plano / meta.hash).as_posix(),
+                'formato': options['format'],
+                'tile_size': options['tile_size'],
+                'width': base_width,
+                'height': base_height,
+                'levels': levels,
+            }
+            (output_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+            meta.teselas = manifest
+            meta.save(update_fields=['teselas'])
+
+            total = sum(level['cols'] * level['rows'] for level in levels)
+            self.stdout.write(self.style.SUCCESS(f'{plano}: {len(levels)} niveles, {total} teselas en {output_dir}.'))
+
+    def _base_size(self, meta):
+        """Tamaño en px con el que el visor muestra el plano (mismo sistema que las coordenadas de los marcadores)."""
+        if meta.ancho and meta.alto:
+            return round(meta.ancho), round(meta.alto)
+        try:
+            _, _, width, height = (float(v) for v in meta.view_box.replace(',', ' ').split())
+        except ValueError:
+            raise CommandError(f'{meta.plano}: no se pudo determinar el tamaño del plano (ancho/alto ni viewBox).')
+        return round(width), round(height)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_activos', '0008_movimiento_indexes'),
+        ('planos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ubicacionactivo',
+            index=models.Index(fields=['plano', 'estado', 'activo'], name='ubicacion_plano_estado_idx'),
+        ),
+    ]
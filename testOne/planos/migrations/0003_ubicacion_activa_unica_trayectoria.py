@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def inactivar_duplicadas(apps, schema_editor):
+    """Antes del índice único: deja activa solo la ubicación más reciente de cada activo/plano."""
+    UbicacionActivo = apps.get_model('planos', 'UbicacionActivo')
+    duplicadas = (
+        UbicacionActivo.objects.filter(estado='Activo')
+        .values('plano', 'activo').annotate(n=Count('id')).filter(n__gt=1)
+    )
+    for grupo in duplicadas:
+        activas = UbicacionActivo.objects.filter(plano=grupo['plano'], activo=grupo['activo'], estado='Activo')
+        vigente = activas.order_by('-fecha_registro', '-id').values_list('id', flat=True).first()
+        activas.exclude(id=vigente).update(estado='Inactivo')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_activos', '0009_asset_code_trigram_index'),
+        ('planos', '0002_ubicacion_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrayectoriaUbicacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano', models.CharField(max_length=20, verbose_name='Plano')),
+                ('fecha_inicio', models.DateTimeField(verbose_name='Primer registro')),
+                ('fecha_fin', models.DateTimeField(verbose_name='Último registro compactado')),
+                ('total_movimientos', models.PositiveIntegerField(default=0, verbose_name='Movimientos')),
+                ('puntos', models.JSONField(default=list, verbose_name='Puntos')),
+            ],
+            options={
+                'verbose_name': 'Trayectoria de Activo en Plano',
+                'verbose_name_plural': 'Trayectorias de Activos en Planos',
+            },
+        ),
+        migrations.RunPython(inactivar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ubicacionactivo',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'Activo')), fields=('plano', 'activo'), name='ubicacion_activa_unica'),
+        ),
+        migrations.AddField(
+            model_name='trayectoriaubicacion',
+            name='activo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trayectorias_plano', to='gestion_activos.asset', verbose_name='Activo'),
+        ),
+        migrations.AddConstraint(
+            model_name='trayectoriaubicacion',
+            constraint=models.UniqueConstraint(fields=('activo', 'plano'), name='trayectoria_activo_plano_unica'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0003_ubicacion_activa_unica_trayectoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanoSVG',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano', models.CharField(max_length=20, unique=True, verbose_name='Plano')),
+                ('archivo', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('hash', models.CharField(max_length=20, verbose_name='Hash del contenido')),
+                ('ancho', models.FloatField(blank=True, null=True, verbose_name='Ancho')),
+                ('alto', models.FloatField(blank=True, null=True, verbose_name='Alto')),
+                ('view_box', models.CharField(blank=True, max_length=100, verbose_name='viewBox')),
+                ('bytes_original', models.PositiveIntegerField(default=0, verbose_name='Bytes originales')),
+                ('bytes_minificado', models.PositiveIntegerField(default=0, verbose_name='Bytes minificados')),
+                ('bytes_gzip', models.PositiveIntegerField(default=0, verbose_name='Bytes gzip')),
+                ('bytes_brotli', models.PositiveIntegerField(blank=True, null=True, verbose_name='Bytes brotli')),
+                ('generado_en', models.DateTimeField(auto_now=True, verbose_name='Generado en')),
+            ],
+            options={
+                'verbose_name': 'SVG de Plano',
+                'verbose_name_plural': 'SVG de Planos',
+                'ordering': ['plano'],
+            },
+        ),
+    ]
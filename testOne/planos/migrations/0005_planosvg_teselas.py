@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0004_planosvg'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planosvg',
+            name='teselas',
+            field=models.JSONField(blank=True, null=True, verbose_name='Teselas'),
+        ),
+    ]
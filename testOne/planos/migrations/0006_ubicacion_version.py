@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0005_planosvg_teselas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPlano',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano', models.CharField(max_length=20, unique=True, verbose_name='Plano')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de Plano',
+                'verbose_name_plural': 'Versiones de Planos',
+            },
+        ),
+        migrations.AddField(
+            model_name='ubicacionactivo',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Versión'),
+        ),
+        migrations.AddIndex(
+            model_name='ubicacionactivo',
+            index=models.Index(fields=['plano', 'version'], name='ubicacion_plano_version_idx'),
+        ),
+    ]
@@ -7,6 +7,7 @@ class UbicacionActivo(models.Model):
     Almacena la posición de un activo dentro de un plano SVG.
     Cada vez que se mueve un activo se crea un nuevo registro
     y el anterior queda marcado como 'Inactivo' (historial).
+    Ambos llevan la versión del plano (VersionPlano) de ese movimiento.
     """
 
     ESTADO_CHOICES = [
@@ -55,14 +56,121 @@ class UbicacionActivo(models.Model):
         related_name='ubicaciones_registradas',
         verbose_name='Registrado por',
     )
+    # Versión del plano en la que se escribió la fila; cursor de la sincronización incremental
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versión')
 
     class Meta:
         verbose_name = 'Ubicación de Activo en Plano'
         verbose_name_plural = 'Ubicaciones de Activos en Planos'
         ordering = ['-fecha_registro']
+        indexes = [
+            models.Index(fields=['plano', 'estado', 'activo'], name='ubicacion_plano_estado_idx'),
+            models.Index(fields=['plano', 'version'], name='ubicacion_plano_version_idx'),
+        ]
+        constraints = [
+            # Índice parcial: una sola ubicación 'Activo' por activo y plano.
+            # También sirve a la consulta de marcadores (solo filas vivas).
+            models.UniqueConstraint(
+                fields=['plano', 'activo'],
+                condition=models.Q(estado='Activo'),
+                name='ubicacion_activa_unica',
+            ),
+        ]
 
     def __str__(self):
         return (
             f"{self.activo.code} → {self.plano} "
             f"({self.posicion_x}, {self.posicion_y}) [{self.estado}]"
         )
+
+
+class VersionPlano(models.Model):
+    """
+    Contador de movimientos por plano, en orden de commit.
+
+    `siguiente()` incrementa la fila con un UPDATE, que la bloquea hasta el
+    fin de la transacción: las escrituras sobre un mismo plano se serializan
+    y una versión leída por otra sesión implica que todas las filas con
+    versión menor o igual ya están confirmadas. Sirve de ETag y de cursor a
+    PlanoMarkersView (a diferencia de fecha_registro, que se fija antes del
+    commit).
+    """
+    plano = models.CharField(max_length=20, unique=True, verbose_name='Plano')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versión')
+
+    class Meta:
+        verbose_name = 'Versión de Plano'
+        verbose_name_plural = 'Versiones de Planos'
+
+    def __str__(self):
+        return f"{self.plano} v{self.version}"
+
+    @classmethod
+    def actual(cls, plano):
+        return cls.objects.filter(plano=plano).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def siguiente(cls, plano):
+        """Incrementa y retorna la versión del plano; debe llamarse dentro de transaction.atomic()."""
+        cls.objects.get_or_create(plano=plano)
+        cls.objects.filter(plano=plano).update(version=models.F('version') + 1)
+        return cls.actual(plano)
+
+
+class TrayectoriaUbicacion(models.Model):
+    """
+    Historial compactado de un activo en un plano.
+    El comando `compactar_ubicaciones` mueve aquí las ubicaciones 'Inactivo'
+    más antiguas que la ventana de retención y las elimina de UbicacionActivo.
+    """
+    activo = models.ForeignKey(
+        'gestion_activos.Asset',
+        on_delete=models.CASCADE,
+        related_name='trayectorias_plano',
+        verbose_name='Activo',
+    )
+    plano = models.CharField(max_length=20, verbose_name='Plano')
+    fecha_inicio = models.DateTimeField(verbose_name='Primer registro')
+    fecha_fin = models.DateTimeField(verbose_name='Último registro compactado')
+    total_movimientos = models.PositiveIntegerField(default=0, verbose_name='Movimientos')
+    # [[x, y, fecha ISO, usuario_id], ...] en orden cronológico
+    puntos = models.JSONField(default=list, verbose_name='Puntos')
+
+    class Meta:
+        verbose_name = 'Trayectoria de Activo en Plano'
+        verbose_name_plural = 'Trayectorias de Activos en Planos'
+        constraints = [
+            models.UniqueConstraint(fields=['activo', 'plano'], name='trayectoria_activo_plano_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.activo.code} → {self.plano} ({self.total_movimientos} movimientos)"
+
+
+class PlanoSVG(models.Model):
+    """
+    Metadatos del SVG optimizado de cada plano, generados por `collectplanos`.
+    PlanosView lee esta tabla en lugar de consultar el sistema de archivos.
+    """
+    plano = models.CharField(max_length=20, unique=True, verbose_name='Plano')
+    # Ruta relativa a STATIC_URL del archivo minificado con hash, ej: planos/PL2P1.3f9a1c2b7d.svg
+    archivo = models.CharField(max_length=255, verbose_name='Archivo')
+    hash = models.CharField(max_length=20, verbose_name='Hash del contenido')
+    ancho = models.FloatField(null=True, blank=True, verbose_name='Ancho')
+    alto = models.FloatField(null=True, blank=True, verbose_name='Alto')
+    view_box = models.CharField(max_length=100, blank=True, verbose_name='viewBox')
+    bytes_original = models.PositiveIntegerField(default=0, verbose_name='Bytes originales')
+    bytes_minificado = models.PositiveIntegerField(default=0, verbose_name='Bytes minificados')
+    bytes_gzip = models.PositiveIntegerField(default=0, verbose_name='Bytes gzip')
+    bytes_brotli = models.PositiveIntegerField(null=True, blank=True, verbose_name='Bytes brotli')
+    # Manifest de teselas (`tileplanos`); null = el visor usa el SVG completo
+    teselas = models.JSONField(null=True, blank=True, verbose_name='Teselas')
+    generado_en = models.DateTimeField(auto_now=True, verbose_name='Generado en')
+
+    class Meta:
+        verbose_name = 'SVG de Plano'
+        verbose_name_plural = 'SVG de Planos'
+        ordering = ['plano']
+
+    def __str__(self):
+        return f"{self.plano} → {self.archivo}"
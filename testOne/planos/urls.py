@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import PlanosView, UbicarActivoView
+from .views import PlanosView, UbicarActivoView, UbicarActivosLoteView, PlanoMarkersView
 
 urlpatterns = [
     path('', PlanosView.as_view(), name='planos_view'),
     path('ubicar/', UbicarActivoView.as_view(), name='planos_ubicar_activo'),
+    path('ubicar/lote/', UbicarActivosLoteView.as_view(), name='planos_ubicar_lote'),
+    path('<str:plano>/markers.json', PlanoMarkersView.as_view(), name='planos_markers'),
 ]
@@ -1,9 +1,15 @@
 from django.views.generic import TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.conf import settings
-from django.db import transaction
+from django.templatetags.static import static
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from roles.mixins import RolePermissionRequiredMixin
+import hashlib
+import json
+import math
 import os
 
 
@@ -52,15 +58,11 @@ class PlanosView(LoginRequiredMixin, RolePermissionRequiredMixin, TemplateView):
         if plano_id not in ids_validos:
             plano_id = PLANO_DEFAULT
 
-        svg_existe = plano_exists(plano_id)
-        svg_url = f"{settings.STATIC_URL}planos/{plano_id}.svg" if svg_existe else None
+        svg = self._get_svg(plano_id)
 
-        # Activos asignados al plano
+        # Activos asignados al plano (los marcadores se cargan desde planos_markers)
         activos = self._get_activos_del_plano(plano_id)
 
-        # Ubicaciones persistidas para este plano
-        ubicaciones = self._get_ubicaciones(plano_id)
-
         # Permisos de edición
         user = self.request.user
         puede_editar = user.is_superuser or (
@@ -70,26 +72,32 @@ class PlanosView(LoginRequiredMixin, RolePermissionRequiredMixin, TemplateView):
         context.update({
             'planos_disponibles': PLANOS_DISPONIBLES,
             'plano_seleccionado': plano_id,
-            'svg_existe': svg_existe,
-            'svg_url': svg_url,
+            'svg_existe': svg['url'] is not None,
+            'svg_url': svg['url'],
+            'svg_ancho': svg['ancho'],
+            'svg_alto': svg['alto'],
+            'svg_teselas': svg['teselas'],
             'activos': activos,
-            'ubicaciones': ubicaciones,
             'puede_editar': puede_editar,
         })
         return context
 
-    def _get_fechas_activo(self, asset):
-        """Retorna la fecha de ultima inspección / mantenimiento str formated."""
-        if hasattr(asset, 'extintor_detail'):
-            return asset.extintor_detail.fecha_recarga.strftime('%d/%m/%Y') if getattr(asset.extintor_detail, 'fecha_recarga', None) else 'Sin registro'
-        if hasattr(asset, 'montacargas_detail'):
-            return asset.montacargas_detail.fecha_ultimo_mantenimiento.strftime('%d/%m/%Y') if getattr(asset.montacargas_detail, 'fecha_ultimo_mantenimiento', None) else 'Sin registro'
-        if hasattr(asset, 'botiquin_detail'):
-            return asset.botiquin_detail.fecha_ultima_revision.strftime('%d/%m/%Y') if getattr(asset.botiquin_detail, 'fecha_ultima_revision', None) else 'Sin registro'
-        return 'Sin registro'
+    def _get_svg(self, plano_id):
+        """SVG optimizado registrado por `collectplanos`; sin registro se usa el archivo original."""
+        from .models import PlanoSVG
+        meta = PlanoSVG.objects.filter(plano=plano_id).values('archivo', 'ancho', 'alto', 'teselas').first()
+        if meta:
+            teselas = meta['teselas']
+            if teselas:
+                # Modo teselado (`tileplanos`): el visor pide solo las teselas visibles
+                teselas = dict(teselas, url=f"{settings.STATIC_URL}{teselas['ruta']}")
+            return {'url': static(meta['archivo']), 'ancho': meta['ancho'], 'alto': meta['alto'], 'teselas': teselas}
+        # Entornos donde aún no se ejecutó collectplanos
+        url = f"{settings.STATIC_URL}planos/{plano_id}.svg" if plano_exists(plano_id) else None
+        return {'url': url, 'ancho': None, 'alto': None, 'teselas': None}
 
     def _get_activos_del_plano(self, plano_id):
-        from gestion_activos.models import Asset, AssetType
+        from gestion_activos.models import Asset, ultima_fecha_expression
         try:
             # Aquí se pueden cargar todos los activos si algún día se hace un buscador global,
             # pero por ahora respetamos el filtro por plano para la lista lateral.
@@ -101,7 +109,8 @@ class PlanosView(LoginRequiredMixin, RolePermissionRequiredMixin, TemplateView):
                     asset_type__name__in=TIPOS_VISIBLES,
                 )
                 .select_related('asset_type', 'area', 'plano')
-                .prefetch_related('extintor_detail', 'montacargas_detail', 'botiquin_detail')
+                .with_estado()
+                .annotate(ultima_fecha=ultima_fecha_expression())
                 .order_by('asset_type__name', 'code')
             )
             result = []
@@ -114,48 +123,104 @@ class PlanosView(LoginRequiredMixin, RolePermissionRequiredMixin, TemplateView):
                     'estado_css': asset.estado_css,
                     'pk':         asset.pk,
                     'icono':      _icono_por_tipo(asset.asset_type.name),
-                    'ultima_insp': self._get_fechas_activo(asset),
+                    'ultima_insp': _formato_fecha(asset.ultima_fecha),
                     'plano_asignado': asset.plano.nombre if asset.plano else '',
                 })
             return result
         except Exception:
             return []
 
-    def _get_ubicaciones(self, plano_id):
-        """Retorna ubicaciones activas del plano como lista de dicts para el template."""
-        from .models import UbicacionActivo
+
+def _formato_fecha(fecha):
+    return fecha.strftime('%d/%m/%Y') if fecha else 'Sin registro'
+
+
+# ── API: Marcadores del plano (JSON con ETag y sincronización incremental) ───
+class PlanoMarkersView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
+    permission_required = ('planos', 'view')
+    """
+    GET /planos/<plano>/markers.json[?since=<version>&state=<state>]
+
+    Ubicaciones activas del plano en una sola consulta (estado y última
+    fecha calculados en SQL). El ETag cambia con la versión del plano
+    (VersionPlano, incrementada en orden de commit por cada movimiento), la
+    versión de estado de activos y el día (el estado depende de la fecha
+    actual).
+
+    Con `since` (la `version` de una respuesta anterior) y `state` igual al
+    actual se devuelven solo los marcadores escritos en versiones
+    posteriores; si el estado de los activos cambió o `since` no es válido
+    se devuelve la lista completa (`full`).
+    """
+
+    def get(self, request, plano, *args, **kwargs):
+        from gestion_activos.cache import asset_state_version
+        from gestion_activos.models import ESTADO_LABELS, estado_expression, ultima_fecha_expression
+        from .models import UbicacionActivo, VersionPlano
+
+        plano = plano.upper()
+        if plano not in [p['id'] for p in PLANOS_DISPONIBLES]:
+            return JsonResponse({'error': f'Plano "{plano}" no válido.'}, status=404)
+
+        # Se lee antes que las filas: las de versión mayor que se cuelen se reenvían luego (idempotente)
+        version = VersionPlano.actual(plano)
+        state = str(asset_state_version())
+        etag_source = f"{plano}:{version}:{state}:{timezone.localdate()}"
+        etag = '"%s"' % hashlib.md5(etag_source.encode('utf-8')).hexdigest()
+        # If-None-Match con lista de ETags o '*' (RFC 9110)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+
+        qs = UbicacionActivo.objects.filter(
+            plano=plano,
+            estado='Activo',
+            activo__plano__nombre=plano,  # Solo si el activo pertenece a este plano realmente
+        )
         try:
-            qs = (
-                UbicacionActivo.objects
-                .filter(
-                    plano=plano_id, 
-                    estado='Activo',
-                    activo__plano__nombre=plano_id  # <--- CORRECCIÓN CRÍTICA: Solo si el activo pertenece a este plano realmente
-                )
-                .select_related('activo__asset_type', 'activo__area', 'activo__plano')
-                .prefetch_related('activo__extintor_detail', 'activo__montacargas_detail', 'activo__botiquin_detail')
+            since = int(request.GET['since'])
+        except (KeyError, ValueError):
+            since = None
+        full = since is None or since > version or request.GET.get('state') != state
+        if not full:
+            qs = qs.filter(version__gt=since)
+
+        rows = (
+            qs.annotate(estado_sql=estado_expression('activo__'), ultima_fecha=ultima_fecha_expression('activo__'))
+            .order_by()
+            .values(
+                'activo_id', 'activo__code', 'activo__asset_type__name', 'posicion_x', 'posicion_y',
+                'fecha_registro', 'estado_sql', 'ultima_fecha',
             )
-            result = []
-            for ub in qs:
-                asset = ub.activo
-                tipo  = asset.asset_type.name if asset.asset_type else 'Otro'
-                plano_asignado = asset.plano.nombre if asset.plano else ''
-                
-                result.append({
-                    'pk':    asset.pk,
-                    'code':  asset.code,
-                    'tipo':  tipo,
-                    'icono': _icono_por_tipo(tipo),
-                    'x':     float(ub.posicion_x),
-                    'y':     float(ub.posicion_y),
-                    'plano_asignado': plano_asignado,
-                    'estado': asset.estado_label,
-                    'ultima_insp': self._get_fechas_activo(asset),
-                })
-            return result
-        except Exception as e:
-            print("ERROR _get_ubicaciones:", e)
-            return []
+        )
+        # ubicacion_activa_unica garantiza una sola fila activa por activo y plano
+        markers = []
+        for row in rows:
+            tipo = row['activo__asset_type__name'] or 'Otro'
+            markers.append({
+                'pk':    row['activo_id'],
+                'code':  row['activo__code'],
+                'tipo':  tipo,
+                'icono': _icono_por_tipo(tipo),
+                'x':     float(row['posicion_x']),
+                'y':     float(row['posicion_y']),
+                'estado': ESTADO_LABELS.get(row['estado_sql'], row['estado_sql']),
+                'ultima_insp': _formato_fecha(row['ultima_fecha']),
+                'fecha': row['fecha_registro'].isoformat(),
+            })
+
+        payload = {
+            'plano': plano,
+            'full': full,
+            'version': version,
+            'state': state,
+            'markers': markers,
+        }
+        response = HttpResponse(json.dumps(payload, ensure_ascii=False), content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 # ── API: Guardar / Mover ubicación ───────────────────────────────────────────
@@ -172,7 +237,7 @@ class UbicarActivoView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
     def post(self, request, *args, **kwargs):
         import json
         from gestion_activos.models import Asset
-        from .models import UbicacionActivo
+        from .models import UbicacionActivo, VersionPlano
 
         # Verificar permisos de edición
         user = request.user
@@ -211,23 +276,29 @@ class UbicarActivoView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
         except Asset.DoesNotExist:
             return JsonResponse({'error': 'Activo no encontrado.'}, status=404)
 
-        with transaction.atomic():
-            # Marcar ubicaciones anteriores de este activo en este plano como Inactivo
-            UbicacionActivo.objects.filter(
-                activo=asset,
-                plano=plano,
-                estado='Activo',
-            ).update(estado='Inactivo')
-
-            # Crear nueva ubicación activa
-            nueva = UbicacionActivo.objects.create(
-                activo=asset,
-                plano=plano,
-                posicion_x=round(x, 2),
-                posicion_y=round(y, 2),
-                estado='Activo',
-                usuario=user,
-            )
+        try:
+            with transaction.atomic():
+                version = VersionPlano.siguiente(plano)
+                # Marcar ubicaciones anteriores de este activo en este plano como Inactivo
+                UbicacionActivo.objects.filter(
+                    activo=asset,
+                    plano=plano,
+                    estado='Activo',
+                ).update(estado='Inactivo', version=version)
+
+                # Crear nueva ubicación activa
+                nueva = UbicacionActivo.objects.create(
+                    activo=asset,
+                    plano=plano,
+                    posicion_x=round(x, 2),
+                    posicion_y=round(y, 2),
+                    estado='Activo',
+                    usuario=user,
+                    version=version,
+                )
+        except IntegrityError:
+            # ubicacion_activa_unica: otro usuario movió el mismo activo al mismo tiempo
+            return JsonResponse({'error': 'El activo se movió simultáneamente desde otra sesión; intente de nuevo.'}, status=409)
 
         tipo = asset.asset_type.name if asset.asset_type else 'Otro'
         return JsonResponse({
@@ -242,3 +313,139 @@ class UbicarActivoView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
                 'fecha': nueva.fecha_registro.strftime('%d/%m/%Y %H:%M'),
             }
         })
+
+
+# ── API: Guardar / Mover ubicaciones en lote ─────────────────────────────────
+# Máximo de movimientos por petición
+MAX_UBICACIONES_LOTE = 500
+
+
+class UbicarActivosLoteView(LoginRequiredMixin, RolePermissionRequiredMixin, View):
+    permission_required = ('planos', 'edit')
+    """
+    POST /planos/ubicar/lote/
+    Body JSON: { plano, movimientos: [{ activo_pk, x, y }, ...] }
+
+    Igual que UbicarActivoView pero para varios activos en una sola petición:
+    una consulta para validar los activos y, en una transacción, un UPDATE
+    que inactiva las ubicaciones anteriores y un bulk_create con las nuevas.
+    Los activos deben existir, estar activos y pertenecer al plano.
+    Retorna un resultado por movimiento, en el mismo orden recibido.
+    """
+
+    def post(self, request, *args, **kwargs):
+        from gestion_activos.models import Asset
+        from .models import UbicacionActivo, VersionPlano
+
+        user = request.user
+        puede_editar = user.is_superuser or (
+            hasattr(user, 'has_perm_custom') and user.has_perm_custom('planos', 'edit')
+        )
+        if not puede_editar:
+            return JsonResponse({'error': 'Sin permiso para editar planos.'}, status=403)
+
+        try:
+            data = json.loads(request.body)
+        except (ValueError, TypeError):
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+
+        plano = (data.get('plano') or '').strip().upper()
+        movimientos = data.get('movimientos')
+        if plano not in [p['id'] for p in PLANOS_DISPONIBLES]:
+            return JsonResponse({'error': f'Plano "{plano}" no válido.'}, status=400)
+        if not isinstance(movimientos, list) or not movimientos:
+            return JsonResponse({'error': 'Se requiere una lista de movimientos.'}, status=400)
+        if len(movimientos) > MAX_UBICACIONES_LOTE:
+            return JsonResponse({'error': f'Máximo {MAX_UBICACIONES_LOTE} movimientos por petición.'}, status=400)
+
+        # 1. Validación de formato; si un activo se repite, gana el último movimiento
+        resultados = []
+        validos = {}
+        for mov in movimientos:
+            activo_pk = mov.get('activo_pk') if isinstance(mov, dict) else None
+            resultado = {'activo_pk': activo_pk, 'ok': False}
+            resultados.append(resultado)
+            try:
+                activo_pk = int(activo_pk)
+                x = round(float(mov['x']), 2)
+                y = round(float(mov['y']), 2)
+            except (KeyError, TypeError, ValueError):
+                resultado['error'] = 'Faltan campos o son inválidos: activo_pk, x, y.'
+                continue
+            if not (math.isfinite(x) and math.isfinite(y)):
+                resultado['error'] = 'Coordenadas inválidas.'
+                continue
+            if activo_pk in validos:
+                validos[activo_pk][0]['error'] = 'Reemplazado por un movimiento posterior del mismo activo.'
+            validos[activo_pk] = (resultado, x, y)
+
+        # 2. Una sola consulta para validar los activos: existen, están activos y pertenecen
+        #    a este plano (PlanoMarkersView solo muestra activos con plano__nombre=plano)
+        activos = {
+            a['pk']: a for a in Asset.objects.filter(pk__in=validos).values(
+                'pk', 'code', 'asset_type__name', 'activo', 'plano__nombre',
+            )
+        }
+        pendientes = []
+        for activo_pk, (resultado, x, y) in validos.items():
+            if 'error' in resultado:
+                continue
+            activo = activos.get(activo_pk)
+            if activo is None:
+                resultado['error'] = 'Activo no encontrado.'
+                continue
+            if not activo['activo']:
+                resultado['error'] = 'El activo está inactivo.'
+                continue
+            if activo['plano__nombre'] != plano:
+                resultado['error'] = f'El activo no pertenece al plano {plano}.'
+                continue
+            pendientes.append((activo_pk, resultado, x, y))
+
+        # 3. Una transacción: un UPDATE y un INSERT múltiple
+        if pendientes:
+            try:
+                with transaction.atomic():
+                    version = VersionPlano.siguiente(plano)
+                    UbicacionActivo.objects.filter(
+                        plano=plano,
+                        estado='Activo',
+                        activo_id__in=[activo_pk for activo_pk, _, _, _ in pendientes],
+                    ).update(estado='Inactivo', version=version)
+                    nuevas = UbicacionActivo.objects.bulk_create([
+                        UbicacionActivo(
+                            activo_id=activo_pk,
+                            plano=plano,
+                            posicion_x=x,
+                            posicion_y=y,
+                            estado='Activo',
+                            usuario=user,
+                            version=version,
+                        )
+                        for activo_pk, _, x, y in pendientes
+                    ])
+            except IntegrityError:
+                # ubicacion_activa_unica: otra sesión movió alguno de los activos al mismo tiempo
+                return JsonResponse({'error': 'Algún activo se movió simultáneamente desde otra sesión; intente de nuevo.'}, status=409)
+
+            for (activo_pk, resultado, x, y), nueva in zip(pendientes, nuevas):
+                tipo = activos[activo_pk]['asset_type__name'] or 'Otro'
+                resultado['ok'] = True
+                resultado['ubicacion'] = {
+                    'pk':    activo_pk,
+                    'code':  activos[activo_pk]['code'],
+                    'tipo':  tipo,
+                    'icono': _icono_por_tipo(tipo),
+                    'x':     x,
+                    'y':     y,
+                    'fecha': nueva.fecha_registro.strftime('%d/%m/%Y %H:%M'),
+                }
+
+        return JsonResponse({
+            'ok': True,
+            'guardados': len(pendientes),
+            'errores': len(resultados) - len(pendientes),
+            'resultados': resultados,
+        })
@@ -0,0 +1,60 @@
+"""
+roles/cache.py
+--------------
+Versión global de permisos para los fragmentos cacheados (sidebar).
+
+Cada fragmento que depende de permisos incluye `permission_version()` en su
+clave de caché. La versión se deriva de datos persistidos (número de roles y
+último `Role.updated_at`), no de un valor en caché: todos los workers ven la
+misma versión apenas se confirma el cambio. `roles/signals.py` llama a
+`bump_permission_version()` cuando cambia un permiso o la asignación de
+permisos de un rol, lo que actualiza `updated_at` de los roles afectados; las
+claves anteriores quedan huérfanas y expiran solas.
+"""
+from django.db.models import Count, Max
+from django.utils import timezone
+
+# Tiempo de vida del fragmento del sidebar
+SIDEBAR_CACHE_TIMEOUT = 60 * 60
+
+# Enlaces del sidebar cuyo estado 'active' depende del url_name
+SIDEBAR_URL_NAMES = {
+    'dashboard', 'inspection_list', 'asset_list', 'asset_detail',
+    'asset_report', 'inspection_reports',
+}
+# Enlaces del sidebar cuyo estado 'active' depende de un fragmento de request.path
+SIDEBAR_PATH_SECTIONS = ('extinguisher', 'first-aid', 'process', 'storage', 'forklift', 'planos')
+
+
+def permission_version():
+    """Una consulta agregada sobre Role; crear, editar o eliminar un rol cambia el resultado."""
+    from .models import Role
+    data = Role.objects.aggregate(total=Count('pk'), updated=Max('updated_at'))
+    updated = data['updated']
+    return f"{data['total']}-{int(updated.timestamp() * 1_000_000) if updated else 0}"
+
+
+def bump_permission_version(role_ids=None):
+    """Marca como modificados los roles indicados (todos si role_ids es None)."""
+    from .models import Role
+    roles = Role.objects.all() if role_ids is None else Role.objects.filter(pk__in=role_ids)
+    roles.update(updated_at=timezone.now())
+
+
+def effective_role_key(request):
+    """Identifica el conjunto de permisos con el que se renderiza la request."""
+    user = request.user
+    simulated_role = getattr(user, '_simulated_role', None)
+    if simulated_role is not None:
+        return f'sim{simulated_role.pk}'
+    if user.is_superuser:
+        return 'su'
+    return f'r{user.role_id}' if getattr(user, 'role_id', None) else 'none'
+
+
+def sidebar_section(request):
+    """Todo lo que decide qué enlaces del sidebar se marcan como activos."""
+    match = request.resolver_match
+    url_name = match.url_name if match and match.url_name in SIDEBAR_URL_NAMES else ''
+    paths = '.'.join(s for s in SIDEBAR_PATH_SECTIONS if s in request.path)
+    return f'{url_name}:{paths}'
@@ -21,3 +21,19 @@ def role_simulation(request):
     return {
         'simulated_role': simulated_role,
     }
+
+
+def sidebar_cache(request):
+    """
+    Partes de la clave del fragmento {% cache %} del sidebar en base.html:
+    rol efectivo (real o simulado), sección activa y versión de permisos.
+    """
+    if not hasattr(request, 'user') or not request.user.is_authenticated:
+        return {}
+    from .cache import SIDEBAR_CACHE_TIMEOUT, effective_role_key, permission_version, sidebar_section
+    return {
+        'sidebar_cache_timeout': SIDEBAR_CACHE_TIMEOUT,
+        'sidebar_role_key': effective_role_key(request),
+        'sidebar_section': sidebar_section(request),
+        'permission_version': permission_version(),
+    }
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Role, Permission
+from .cache import bump_permission_version
+
+
+# Sidebar y demás fragmentos por rol: la versión de permisos se deriva de Role
+# (número de roles y último updated_at). Guardar o eliminar un rol ya la cambia;
+# los cambios de permisos actualizan updated_at de los roles afectados.
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_role_fragments(sender, **kwargs):
+    bump_permission_version()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_role_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_permission_version([instance.pk])
+    elif pk_set:
+        # permission.roles.add/remove(...): pk_set son los roles afectados
+        bump_permission_version(pk_set)
+    else:
+        # permission.roles.clear(): los roles ya no se conocen
+        bump_permission_version()
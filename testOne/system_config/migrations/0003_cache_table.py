@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:02
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def crear_tabla_cache(apps, schema_editor):
+    """Tabla de la caché en BD (CACHES sin REDIS_URL); no hace nada si ya existe o si se usa Redis."""
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_config', '0002_plano'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla_cache, migrations.RunPython.noop),
+    ]
@@ -6,7 +6,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, F, Value, CharField
 from .models import CustomUser
 from .forms import CustomUserCreationForm, CustomUserChangeForm, UserProfileForm, UserSignatureForm, AdminResetPasswordForm
 from inspections.models import (
@@ -36,6 +36,52 @@ class CustomLoginView(LoginView):
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'users/dashboard.html'
+    FINDINGS_PAGE_SIZE = 5
+
+    def _get_active_findings(self, allowed_mods, page):
+        """
+        Inspecciones 'Cerrada con Hallazgos' cuyo último seguimiento no está 'Cerrada'
+        (o que no tienen seguimiento). El estado del último seguimiento se obtiene con
+        Subquery y los módulos se combinan en un UNION ALL con ORDER BY / LIMIT en BD.
+        """
+        from django.db.models import OuterRef, Subquery
+        branches = []
+        mods_by_key = {}
+        for mod in allowed_mods:
+            model_cls = mod['model']
+            latest_follow_up = model_cls.objects.filter(
+                parent_inspection=OuterRef('pk')
+            ).order_by('-inspection_date', '-pk').values('status')[:1]
+            qs = model_cls.objects.filter(status='Cerrada con Hallazgos').order_by().annotate(
+                latest_follow_up_status=Subquery(latest_follow_up)
+            ).filter(
+                Q(latest_follow_up_status__isnull=True) | ~Q(latest_follow_up_status='Cerrada')
+            ).annotate(
+                module=Value(mod['key'], output_field=CharField()),
+                area_name=F('area__name'),
+            ).values('id', 'inspection_date', 'module', 'area_name')
+            branches.append(qs)
+            mods_by_key[mod['key']] = mod
+
+        if not branches:
+            return [], 0
+
+        union_qs = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        total = union_qs.count()
+        start = (page - 1) * self.FINDINGS_PAGE_SIZE
+        rows = union_qs.order_by('-inspection_date', '-id')[start:start + self.FINDINGS_PAGE_SIZE]
+
+        findings = []
+        for row in rows:
+            mod = mods_by_key[row['module']]
+            findings.append({
+                'pk': row['id'],
+                'inspection_type': mod['label'],
+                'area': row['area_name'],
+                'inspection_date': row['inspection_date'],
+                'get_detail_url': reverse(mod['url'], args=[row['id']]),
+            })
+        return findings, total
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -83,25 +129,24 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         }
         # ─────────────────────────────────────────────────────────────
         
-        # 1. Define modules and their patterns for InspectionSchedule
+        # 1. Define modules (InspectionSchedule.module_key)
         inspection_modules = [
-            {'key': 'extinguisher', 'patterns': ['extintor'], 'model': ExtinguisherInspection},
-            {'key': 'first_aid', 'patterns': ['botiquin'], 'model': FirstAidInspection},
-            {'key': 'process', 'patterns': ['proceso', 'instalacion'], 'model': ProcessInspection},
-            {'key': 'storage', 'patterns': ['almacen', 'storage'], 'model': StorageInspection},
-            {'key': 'forklift', 'patterns': ['montacarga'], 'model': ForkliftInspection},
+            {'key': 'extinguisher', 'model': ExtinguisherInspection, 'label': 'Extintores', 'url': 'extinguisher_detail'},
+            {'key': 'first_aid', 'model': FirstAidInspection, 'label': 'Botiquines', 'url': 'first_aid_detail'},
+            {'key': 'process', 'model': ProcessInspection, 'label': 'Instalaciones de Proceso', 'url': 'process_detail'},
+            {'key': 'storage', 'model': StorageInspection, 'label': 'Almacenamiento', 'url': 'storage_detail'},
+            {'key': 'forklift', 'model': ForkliftInspection, 'label': 'Montacargas', 'url': 'forklift_detail'},
         ]
         
         # 2. Check general permissions and build filter for schedules
         from django.db.models import Q
-        schedule_filter = Q(pk__in=[]) # Default to none if no perms
         
         context['perm_schedule'] = user.has_perm_custom('schedule', 'view')
         context['perm_users'] = user.has_perm_custom('users', 'view')
         context['perm_roles'] = user.has_perm_custom('roles', 'view')
         
         allowed_keys = []
-        active_findings = []
+        allowed_mods = []
 
         for mod in inspection_modules:
             has_view = user.has_perm_custom(mod['key'], 'view')
@@ -109,30 +154,21 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             
             if has_view:
                 allowed_keys.append(mod['key'])
-                # Add to schedule filter
-                type_q = Q()
-                for p in mod['patterns']:
-                    type_q |= Q(inspection_type__icontains=p)
-                schedule_filter |= type_q
-                
-                # Add to active findings
-                # Inspections marked as 'Cerrada con Hallazgos' that are not fully resolved
-                closed_with_findings = mod['model'].objects.filter(status='Cerrada con Hallazgos')
-                for insp in closed_with_findings:
-                    follow_up = insp.follow_ups.last()
-                    if not follow_up or follow_up.status != 'Cerrada':
-                        # Standardize name for dashboard display
-                        labels = {
-                            'extinguisher': 'Extintores',
-                            'first_aid': 'Botiquines',
-                            'process': 'Instalaciones de Proceso',
-                            'storage': 'Almacenamiento',
-                            'forklift': 'Montacargas'
-                        }
-                        insp.inspection_type = labels.get(mod['key'], 'Inspección')
-                        active_findings.append(insp)
-
-        # 3. Filter Schedules
+                allowed_mods.append(mod)
+
+        # Hallazgos activos: un solo UNION paginado en BD (ver _get_active_findings)
+        try:
+            findings_page = max(int(self.request.GET.get('findings_page', 1)), 1)
+        except ValueError:
+            findings_page = 1
+        active_findings, findings_total = self._get_active_findings(allowed_mods, findings_page)
+        context['active_findings_total'] = findings_total
+        context['active_findings_page'] = findings_page
+        context['active_findings_has_prev'] = findings_page > 1
+        context['active_findings_has_next'] = findings_page * self.FINDINGS_PAGE_SIZE < findings_total
+
+        # 3. Filter Schedules (module_key indexado)
+        schedule_filter = Q(module_key__in=allowed_keys)
         context['overdue_inspections'] = InspectionSchedule.objects.filter(
             schedule_filter,
             scheduled_date__lt=today
@@ -181,15 +217,15 @@ class DashboardModalDataView(LoginRequiredMixin, View):
     """
 
     INSPECTION_MODULES = [
-        {'key': 'extinguisher', 'patterns': ['extintor'], 'model': ExtinguisherInspection,
+        {'key': 'extinguisher', 'model': ExtinguisherInspection,
          'label': 'Extintores', 'url': 'extinguisher_detail'},
-        {'key': 'first_aid', 'patterns': ['botiquin'], 'model': FirstAidInspection,
+        {'key': 'first_aid', 'model': FirstAidInspection,
          'label': 'Botiquines', 'url': 'first_aid_detail'},
-        {'key': 'process', 'patterns': ['proceso', 'instalacion'], 'model': ProcessInspection,
+        {'key': 'process', 'model': ProcessInspection,
          'label': 'Instalaciones de Proceso', 'url': 'process_detail'},
-        {'key': 'storage', 'patterns': ['almacen', 'storage'], 'model': StorageInspection,
+        {'key': 'storage', 'model': StorageInspection,
          'label': 'Almacenamiento', 'url': 'storage_detail'},
-        {'key': 'forklift', 'patterns': ['montacarga'], 'model': ForkliftInspection,
+        {'key': 'forklift', 'model': ForkliftInspection,
          'label': 'Montacargas', 'url': 'forklift_detail'},
     ]
 
@@ -211,15 +247,8 @@ class DashboardModalDataView(LoginRequiredMixin, View):
         main_area = request.GET.get('main_area', '').strip()
 
         # Build permission filter for schedule
-        schedule_filter = Q(pk__in=[])
-        allowed_mods = []
-        for mod in self.INSPECTION_MODULES:
-            if user.has_perm_custom(mod['key'], 'view'):
-                allowed_mods.append(mod)
-                t_q = Q()
-                for p in mod['patterns']:
-                    t_q |= Q(inspection_type__icontains=p)
-                schedule_filter |= t_q
+        allowed_mods = [mod for mod in self.INSPECTION_MODULES if user.has_perm_custom(mod['key'], 'view')]
+        schedule_filter = Q(module_key__in=[mod['key'] for mod in allowed_mods])
 
         if table == 'schedule':
             rows, total_count = self._get_schedule_data(
@@ -296,11 +325,14 @@ class DashboardModalDataView(LoginRequiredMixin, View):
 
     def _get_executed_data(self, allowed_mods, q, f_date, f_type, f_status,
                            main_year, main_type, main_area, page, per_page):
-        all_items = []
+        """
+        Un solo UNION ALL sobre las tablas de inspección permitidas, proyectado a
+        las mismas columnas. ORDER BY / LIMIT / OFFSET y el COUNT se resuelven en BD.
+        """
+        branches = []
+        mods_by_key = {}
         for mod in allowed_mods:
-            model_cls = mod['model']
             label = mod['label']
-            url_name = mod['url']
 
             # ── Filtro general: tipo de inspección ──
             # Si main_type está activo y no coincide con este módulo, se omite
@@ -311,9 +343,7 @@ class DashboardModalDataView(LoginRequiredMixin, View):
             if f_type and f_type != label:
                 continue
 
-            qs = model_cls.objects.select_related('area', 'inspector').all()
-            if hasattr(model_cls, 'parent_inspection'):
-                qs = qs.filter(parent_inspection__isnull=True)
+            qs = mod['model'].objects.filter(parent_inspection__isnull=True)
 
             # ── Filtro general (fuente de verdad) ──
             if main_year:
@@ -333,29 +363,46 @@ class DashboardModalDataView(LoginRequiredMixin, View):
             if f_status:
                 qs = qs.filter(status=f_status)
 
-            for insp in qs:
-                status_val = getattr(insp, 'status', None) or getattr(insp, 'general_status', '')
-                all_items.append({
-                    'date_raw': insp.inspection_date,
-                    'id': insp.pk,
-                    'date': insp.inspection_date.strftime('%d/%m/%Y') if insp.inspection_date else '',
-                    'type': label,
-                    'area': str(insp.area) if insp.area else '',
-                    'inspector': insp.inspector.get_full_name() if insp.inspector else 'N/A',
-                    'status': status_val,
-                    'detail_url': reverse(url_name, args=[insp.pk]),
-                })
-
-        # Sort by date descending
-        all_items.sort(key=lambda x: x.get('date_raw') or date.min, reverse=True)
-        # Remove sort key before pagination
-        for item in all_items:
-            item.pop('date_raw', None)
-
-        total = len(all_items)
+            # Mismas columnas y en el mismo orden en cada rama del UNION
+            branches.append(
+                qs.order_by().annotate(
+                    module=Value(mod['key'], output_field=CharField()),
+                    area_name=F('area__name'),
+                    inspector_first=F('inspector__first_name'),
+                    inspector_last=F('inspector__last_name'),
+                ).values(
+                    'id', 'inspection_date', 'status', 'module',
+                    'area_name', 'inspector_id', 'inspector_first', 'inspector_last',
+                )
+            )
+            mods_by_key[mod['key']] = mod
+
+        if not branches:
+            return [], 0
+
+        union_qs = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        total = union_qs.count()
+
         start = (page - 1) * per_page
-        end = start + per_page
-        return all_items[start:end], total
+        page_rows = union_qs.order_by('-inspection_date', '-id')[start:start + per_page]
+
+        rows = []
+        for row in page_rows:
+            mod = mods_by_key[row['module']]
+            if row['inspector_id']:
+                inspector = f"{row['inspector_first'] or ''} {row['inspector_last'] or ''}".strip()
+            else:
+                inspector = 'N/A'
+            rows.append({
+                'id': row['id'],
+                'date': row['inspection_date'].strftime('%d/%m/%Y') if row['inspection_date'] else '',
+                'type': mod['label'],
+                'area': row['area_name'] or '',
+                'inspector': inspector,
+                'status': row['status'] or '',
+                'detail_url': reverse(mod['url'], args=[row['id']]),
+            })
+        return rows, total
 
 class UserListView(LoginRequiredMixin, RolePermissionRequiredMixin, ListView):
     permission_required = ('users', 'view')